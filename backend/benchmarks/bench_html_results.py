@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Benchmark de l'extraction des résultats DuckDuckGo : avant / après.
+
+Les pages de benchmarks/fixtures reproduisent le balisage de
+html.duckduckgo.com (page avec résultats, page sans résultat). Pour
+chacune, on mesure le temps d'analyse
+(médiane sur --runs exécutions) et le pic mémoire (tracemalloc) :
+
+- bs4 : ancienne implémentation de simple_app.py, arbre BeautifulSoup
+  'html.parser' complet puis find_all('a', class_='result__a')[:5] ;
+- lower+regex : ancienne implémentation de final_app.py, page entière mise
+  en minuscules puis parcourue par mot-clé ;
+- flux : html_results.extract_results, page lue par morceaux de --chunk
+  caractères, arrêt après les --limit premiers résultats.
+
+Usage : python benchmarks/bench_html_results.py [--runs 50] [--limit 5] [--chunk 16384]
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from html_results import extract_results  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def legacy_bs4(page, limit):
+    """Ancienne implémentation de duckduckgo_lookup (simple_app.py)"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page, 'html.parser')
+    return [result.get_text().strip() for result in soup.find_all('a', class_='result__a')[:limit]]
+
+
+def legacy_lower_scan(page, limit):
+    """Ancienne implémentation de real_search (final_app.py)"""
+    text = page.lower()
+    return [word for word in ("lacoste", "nike", "adidas", "sneakers", "shoes", "polo") if word in text]
+
+
+def streaming(page, limit, chunk):
+    return [result["title"] for result in extract_results(
+        (page[i:i + chunk] for i in range(0, len(page), chunk)), limit)]
+
+
+def measure(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak
+
+
+def main(args):
+    candidates = [("flux", lambda page: streaming(page, args.limit, args.chunk)),
+                  ("lower+regex", lambda page: legacy_lower_scan(page, args.limit))]
+    try:
+        import bs4  # noqa: F401
+        candidates.insert(0, ("bs4", lambda page: legacy_bs4(page, args.limit)))
+    except ImportError:
+        print("beautifulsoup4 non installé : comparaison bs4 ignorée (pip install beautifulsoup4)\n")
+
+    print(f"{'Page':<34} {'Méthode':<12} {'Temps (ms)':>11} {'Pic mémoire (Ko)':>17}")
+    for path in sorted(FIXTURES.glob("*.html")):
+        page = path.read_text(encoding="utf-8")
+        for name, fn in candidates:
+            median, peak = measure(lambda: fn(page), args.runs)
+            print(f"{path.stem:<34} {name:<12} {median * 1000:>11.3f} {peak / 1024:>17.1f}")
+        if "bs4" in dict(candidates):
+            same = legacy_bs4(page, args.limit) == streaming(page, args.limit, args.chunk)
+            print(f"{'':<34} titres identiques bs4 / flux : {'oui' if same else 'NON'}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--chunk", type=int, default=16384)
+    sys.exit(main(parser.parse_args()))
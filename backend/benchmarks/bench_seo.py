@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Benchmark des champs SEO (titre, méta-description, slug) : avant / après.
+
+Pour chacun des trois formats de fiche (server.py via sheets.py,
+simple_app.py, final_app.py), compare par produit :
+
+- avant : f-strings, coupes [:n] et .replace()/re.sub des anciennes versions ;
+- après : gabarits SeoTemplate compilés et slugs mémorisés par (marque, nom).
+
+Les produits reprennent --models modèles distincts déclinés sur --items
+lignes (tailles, coloris), comme un import de catalogue. Affiche le temps
+moyen par produit et les slugs qui perdaient des caractères (accents).
+
+Usage : python benchmarks/bench_seo.py [--items 20000] [--models 500] [--runs 5]
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from seo import SeoTemplate, product_slug  # noqa: E402
+from sheets import SEO_DESCRIPTION, SEO_TITLE, sheet_slug  # noqa: E402
+
+BRANDS = ["Lacoste", "Nike", "Adidas", "Le Coq Sportif", "Hugo Boss"]
+NAMES = ["Polo Classic Fit Piqué", "Air Max 97 Noir/Blanc", "Stan Smith Édition Crème",
+         "Sweat-shirt à capuche zippé", "T-shirt Logo Brodé Coton Bio"]
+
+# Gabarits de simple_app.py et final_app.py (importer ces modules lancerait les applications)
+SIMPLE_TITLE = SeoTemplate("{brand} {name:.30} - Prix {price}€", 60,
+                           fallback=SeoTemplate("{brand} {name:.20} - {price}€", 60))
+SIMPLE_DESCRIPTION = SeoTemplate(
+    "Achetez {name} {brand} au meilleur prix {price}€. Livraison gratuite dès 50€. Retour 30 jours. Authentique garanti.", 160,
+    fallback=SeoTemplate("{brand} {name:.40} - {price}€. Livraison gratuite. Retour 30j. Authentique.", 160)
+)
+FINAL_TITLE = SeoTemplate("{brand} {name:.30} - {price}€", 60)
+FINAL_DESCRIPTION = SeoTemplate("Achetez {name} {brand} à {price}€. Livraison gratuite dès 50€. Retour 30j. Authentique.", 160)
+
+
+def legacy_server(p):
+    brand = p["brand"]
+    name = p["name"].split()[0] if p["name"] else "Produit"
+    return (f"{brand} {name} - {p['type']}"[:60],
+            f"Achetez {p['name']} {brand} à {p['price']}€. {p['description'][:80]}. Livraison gratuite."[:160],
+            f"{brand.lower()}-{name.lower()}-{p['sku'].lower()}".replace(" ", "-"))
+
+
+def legacy_simple(p):
+    brand, name, price = p["brand"], p["name"], p["price"]
+    seo_title = f"{brand} {name[:30]} - Prix {price}€"
+    if len(seo_title) > 60:
+        seo_title = f"{brand} {name[:20]} - {price}€"
+    seo_description = f"Achetez {name} {brand} au meilleur prix {price}€. Livraison gratuite dès 50€. Retour 30 jours. Authentique garanti."
+    if len(seo_description) > 160:
+        seo_description = f"{brand} {name[:40]} - {price}€. Livraison gratuite. Retour 30j. Authentique."
+    url_slug = f"{brand.lower()}-{name[:25].lower()}".replace(" ", "-").replace("'", "")
+    return seo_title, seo_description, re.sub(r'[^a-z0-9-]', '', url_slug)
+
+
+def legacy_final(p):
+    brand, name, price = p["brand"], p["name"], p["price"]
+    return (f"{brand} {name[:30]} - {price}€"[:60],
+            f"Achetez {name} {brand} à {price}€. Livraison gratuite dès 50€. Retour 30j. Authentique."[:160],
+            re.sub(r'[^a-z0-9-]', '', f"{brand.lower()}-{name[:25].lower()}".replace(" ", "-")))
+
+
+def templated_server(p):
+    word = p["name"].split()[0] if p["name"] else "Produit"
+    return (SEO_TITLE.render(brand=p["brand"], word=word, type=p["type"]),
+            SEO_DESCRIPTION.render(name=p["name"], brand=p["brand"], price=p["price"], description=p["description"]),
+            sheet_slug(p["brand"], word, p["sku"]))
+
+
+def templated_simple(p):
+    return (SIMPLE_TITLE.render(brand=p["brand"], name=p["name"], price=p["price"]),
+            SIMPLE_DESCRIPTION.render(brand=p["brand"], name=p["name"], price=p["price"]),
+            product_slug(p["brand"], p["name"], 25))
+
+
+def templated_final(p):
+    return (FINAL_TITLE.render(brand=p["brand"], name=p["name"], price=p["price"]),
+            FINAL_DESCRIPTION.render(name=p["name"], brand=p["brand"], price=p["price"]),
+            product_slug(p["brand"], p["name"], 25))
+
+
+def build_products(items, models):
+    return [{
+        "brand": BRANDS[i % models % len(BRANDS)],
+        "name": f"{NAMES[i % models // len(BRANDS) % len(NAMES)]} {i % models}",
+        "type": "Sneakers" if i % 2 else "Polo",
+        "price": 49.99 + i % models,
+        "sku": f"SKU-{i:06d}",
+        "description": "Matière premium, coupe ajustée, finitions soignées et logo brodé ton sur ton. Fabriqué au Portugal."
+    } for i in range(items)]
+
+
+def alnum(slug):
+    return sum(char.isalnum() for char in slug)
+
+
+def per_item(fn, products, runs):
+    timings = []
+    for _ in range(runs):
+        product_slug.cache_clear()
+        start = time.perf_counter()
+        for product in products:
+            fn(product)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) / len(products)
+
+
+def main(args):
+    products = build_products(args.items, args.models)
+    print(f"{args.items} produits, {args.models} modèles, médiane sur {args.runs} exécutions")
+    print(f"{'Format':<12} {'avant (µs)':>11} {'après (µs)':>11} {'slugs abîmés avant':>19}")
+    for name, legacy, templated in (("server", legacy_server, templated_server),
+                                    ("simple_app", legacy_simple, templated_simple),
+                                    ("final_app", legacy_final, templated_final)):
+        before = per_item(legacy, products, args.runs)
+        after = per_item(templated, products, args.runs)
+        # Modèles dont l'ancien slug a perdu des lettres (accents supprimés au lieu d'être translittérés)
+        lossy = sum(1 for product in products[:args.models]
+                    if alnum(legacy(product)[2]) < alnum(templated(product)[2]))
+        print(f"{name:<12} {before * 1e6:>11.2f} {after * 1e6:>11.2f} {lossy:>19}")
+    sample = products[2]
+    print(f"\nExemple « {sample['name']} » : avant {legacy_final(sample)[2]!r}, après {templated_final(sample)[2]!r}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--models", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark de la génération de fiches PrestaShop : unitaire / par lots.
+
+Pour chaque taille de lot (--sizes), génère les fiches de produits variés
+(Lacoste / autres marques, sneakers / polos / divers, avec ou sans tailles
+et couleurs) :
+
+- unitaire : generate_prestashop_sheet appelé produit par produit ;
+- lots : prestashop_sheets sur les colonnes du lot (temps de construction
+  des colonnes compris).
+
+Les deux résultats sont comparés champ à champ (hors id et created_at),
+puis les temps médians sur --runs exécutions sont affichés.
+
+Usage : python benchmarks/bench_sheets.py [--sizes 1000,10000,100000] [--runs 3]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sheets import generate_prestashop_sheet, prestashop_sheets  # noqa: E402
+
+BRANDS = ["Lacoste", "Nike", "Adidas", "Puma", "Hugo Boss"]
+TYPES = ["Sneakers", "Polo", "T-shirt", "Produit", "Sneakers Running"]
+NAMES = ["Polo Classic Fit Piqué", "Air Max 97", "Stan Smith Blanc", "Suede Classic", "T-shirt Logo Brodé"]
+VOLATILE = ("id", "created_at")
+
+
+def build_batch(count):
+    """(produits, données sources) d'un lot synthétique"""
+    products, sources = [], []
+    for i in range(count):
+        brand, ptype, name = BRANDS[i % 5], TYPES[i // 5 % 5], NAMES[i // 25 % 5]
+        source = {"sizes": ["S", "M", "L", "XL", "XXL", "3XL"], "colors": ["Blanc", "Marine", "Noir"]} if i % 3 else {}
+        products.append({
+            "id": f"product-{i}",
+            "ean": f"{3614270000000 + i}",
+            "sku": f"SKU-{brand[:3].upper()} {i}",
+            "name": f"{name} {i}",
+            "brand": brand,
+            "type": ptype,
+            "price": 49.99 + i % 150,
+            "description": f"{brand} {name} : matière premium, coupe ajustée, finitions soignées, référence {i}.",
+            "category": f"Vêtements > {ptype} > {brand}",
+            "material": "Coton" if i % 2 else "Polyester recyclé",
+        })
+        sources.append(source)
+    return products, sources
+
+
+def columns(products, sources):
+    cols = {field: [product[field] for product in products]
+            for field in ("id", "ean", "sku", "name", "brand", "type", "price", "description", "category", "material")}
+    cols["sizes"] = [source.get("sizes") for source in sources]
+    cols["colors"] = [source.get("colors") for source in sources]
+    return cols
+
+
+def stable(sheet):
+    return {key: value for key, value in sheet.items() if key not in VOLATILE}
+
+
+def median_time(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(args):
+    print(f"{'Produits':>9} {'unitaire (ms)':>14} {'lots (ms)':>10} {'gain':>6} {'identiques':>11}")
+    for size in (int(value) for value in args.sizes.split(",")):
+        products, sources = build_batch(size)
+        scalar = [generate_prestashop_sheet(product, source) for product, source in zip(products, sources)]
+        batch = prestashop_sheets(columns(products, sources))
+        same = all(stable(a) == stable(b) for a, b in zip(scalar, batch)) and len(scalar) == len(batch)
+
+        scalar_time = median_time(
+            lambda: [generate_prestashop_sheet(product, source) for product, source in zip(products, sources)],
+            args.runs)
+        batch_time = median_time(lambda: prestashop_sheets(columns(products, sources)), args.runs)
+        print(f"{size:>9} {scalar_time * 1000:>14.1f} {batch_time * 1000:>10.1f} "
+              f"{scalar_time / batch_time:>5.1f}x {'oui' if same else 'NON':>11}")
+        if not same:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="tailles de lots, séparées par des virgules")
+    parser.add_argument("--runs", type=int, default=3)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""Détection de la marque, du type et de la catégorie d'un produit.
+
+Le vocabulaire vient de keywords.json : pour chaque champ, un libellé et
+ses mots-clés, par ordre de priorité. Tous les mots-clés sont compilés une
+fois, à l'import, en une seule expression régulière factorisée en arbre
+préfixe : un texte est parcouru une seule fois quel que soit le nombre de
+marques, puis chaque champ retient le libellé le plus prioritaire trouvé.
+Les mots-clés sont cherchés comme sous-chaînes du texte en minuscules,
+comme les tests `in` qu'ils remplacent.
+
+Un appelant qui ne reconnaît qu'une partie des libellés construit son
+propre classifieur avec from_file(brands=[...], types=[...]) : seuls ces
+libellés sont cherchés, dans l'ordre de priorité donné.
+"""
+import json
+import re
+from pathlib import Path
+
+KEYWORDS_FILE = Path(__file__).parent / "keywords.json"
+
+FIELDS = ("brand", "type", "category")
+_SECTIONS = {"brand": "brands", "type": "types", "category": "categories"}
+
+
+def _trie_pattern(node):
+    """Expression régulière d'un arbre préfixe ; les continuations les plus longues sont essayées d'abord"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        body = "(?:" + body + ")?"
+    return body
+
+
+def _compile(keywords):
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+    return re.compile(_trie_pattern(trie))
+
+
+class KeywordClassifier:
+    """Classifieur marque / type / catégorie construit à partir d'un dictionnaire de mots-clés"""
+
+    def __init__(self, vocabulary):
+        # mot-clé → [(champ, priorité, libellé)]
+        hits = {}
+        for field in FIELDS:
+            for priority, (label, keywords) in enumerate(vocabulary.get(_SECTIONS[field], {}).items()):
+                for keyword in keywords:
+                    hits.setdefault(keyword.lower(), []).append((field, priority, label))
+        # Une occurrence consomme le mot-clé le plus long ; elle vaut aussi pour
+        # ceux qu'il contient (« t-shirt » compte comme « shirt »)
+        self._hits = {
+            keyword: [hit for other, other_hits in hits.items() if other in keyword for hit in other_hits]
+            for keyword in hits
+        }
+        self._pattern = _compile(self._hits) if self._hits else None
+
+    @classmethod
+    def from_file(cls, path=KEYWORDS_FILE, **labels):
+        """Classifieur du fichier ; `brands=`, `types=` ou `categories=` restreint une section
+        aux libellés donnés, dans cet ordre de priorité (ValueError si un libellé est inconnu)"""
+        with open(path, encoding="utf-8") as f:
+            vocabulary = json.load(f)
+        for section, wanted in labels.items():
+            known = vocabulary.get(section, {})
+            unknown = [label for label in wanted if label not in known]
+            if unknown:
+                raise ValueError(f"Libellés inconnus dans {section}: {', '.join(unknown)}")
+            vocabulary[section] = {label: known[label] for label in wanted}
+        return cls(vocabulary)
+
+    def classify(self, text):
+        """Retourne {"brand", "type", "category"} ; None pour un champ non détecté"""
+        best = {}
+        if self._pattern is not None and text:
+            for keyword in set(self._pattern.findall(text.lower())):
+                for field, priority, label in self._hits[keyword]:
+                    if field not in best or priority < best[field][0]:
+                        best[field] = (priority, label)
+        return {field: best[field][1] if field in best else None for field in FIELDS}
+
+
+default_classifier = KeywordClassifier.from_file()
+
+
+def classify(text):
+    return default_classifier.classify(text)
@@ -0,0 +1,262 @@
+"""Export CSV PrestaShop.
+
+Une ligne par produit (import « Produits ») et une ligne par déclinaison
+(import « Combinaisons »). Les en-têtes sont fixes pour que l'export d'un
+catalogue entier puisse être écrit ligne à ligne, sans tout charger.
+
+Les fichiers sont produits en octets UTF-8 (avec BOM sur demande, pour
+Excel) et livrés tels quels, compressés en gzip ou réunis dans une archive
+zip ; dans tous les cas au fil de l'eau, bloc par bloc.
+"""
+import csv
+import io
+import uuid
+import zipfile
+import zlib
+from datetime import datetime
+
+MAX_CHARACTERISTICS = 5
+
+PRODUCT_COLUMNS = [
+    "ID", "Actif", "Nom", "Catégories", "Prix HT", "Prix TTC", "Référence", "EAN-13",
+    "Description courte", "Description", "Balise titre", "Méta-description", "URL simplifiée",
+    "Image", "Poids", "Quantité", "Visibilité", "Marque",
+] + [f"Caractéristique_{i + 1}" for i in range(MAX_CHARACTERISTICS)]
+
+COMBINATION_COLUMNS = [
+    "ID Produit", "Attribut (Nom:Type:Position)", "Valeur (Valeur:Position)",
+    "Référence", "EAN-13", "Quantité", "Impact sur le prix", "Défaut",
+]
+
+# Clé de variation -> (nom d'attribut PrestaShop, type)
+VARIATION_ATTRIBUTES = {
+    "size": ("Taille", "select"),
+    "color": ("Couleur", "color"),
+    "option": ("Option", "select"),
+}
+
+CHUNK_ROWS = 500
+VAT_RATE = 0.2
+
+# Format de livraison -> (type MIME, extension ajoutée au nom du fichier)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", ""),
+    "gzip": ("application/gzip", ".gz"),
+    "zip": ("application/zip", ".zip"),
+}
+UTF8_BOM = b"\xef\xbb\xbf"
+GZIP_LEVEL = 6
+
+
+def legacy_sheet(product):
+    """Fiche temporaire pour un produit de l'ancien format (sans fiche)"""
+    return {
+        "id": str(uuid.uuid4()),
+        "product_id": product["id"],
+        "category": "Produits > Divers",
+        "weight": 0.5,
+        "variations": [{"option": "Standard", "stock": 25, "ean": product.get("ean", "")}],
+        "characteristics": {"Matière": "Standard", "Qualité": "Norme européenne"},
+        "seo_title": f"{product.get('brand', 'Produit')} {product.get('name', '')}"[:60],
+        "seo_description": f"Achetez {product.get('name', '')} à {product.get('price', 0)}€",
+        "url_slug": f"produit-{product['id'][:8]}",
+        "visibility": "both",
+        "available_for_order": True,
+        "condition": "new"
+    }
+
+
+def split_item(item):
+    """(produit, fiche) d'une entrée, nouveau format ou ancien format plat"""
+    if "product" in item:
+        return item["product"], item["sheet"]
+    return item, legacy_sheet(item)
+
+
+def ttc_price(price):
+    """Prix TTC (TVA 20 %) arrondi au centime"""
+    return round(float(price) * (1 + VAT_RATE), 2)
+
+
+def product_reference(product):
+    return product.get("sku", product.get("id")[:8])
+
+
+def product_row(product, sheet):
+    """Ligne principale du produit"""
+    row = {
+        "ID": product["id"],
+        "Actif": "1",
+        "Nom": product.get("name", "Produit"),
+        "Catégories": sheet["category"],
+        "Prix HT": str(product.get("price", 0)),
+        "Prix TTC": str(ttc_price(product.get("price", 0))),
+        "Référence": product_reference(product),
+        "EAN-13": product.get("ean", ""),
+        "Description courte": product.get("description", "")[:300],
+        "Description": f"<h2>{product.get('name', 'Produit')}</h2><p>{product.get('description', '')}</p>",
+        "Balise titre": sheet["seo_title"],
+        "Méta-description": sheet["seo_description"],
+        "URL simplifiée": sheet["url_slug"],
+        "Image": product.get("image", ""),
+        "Poids": str(sheet["weight"]),
+        "Quantité": "100",
+        "Visibilité": "both",
+        "Marque": product.get("brand", "")
+    }
+
+    # Ajouter les caractéristiques
+    for i, (key, value) in enumerate(sheet["characteristics"].items()):
+        if i < MAX_CHARACTERISTICS:
+            row[f"Caractéristique_{i+1}"] = f"{key}: {value}"
+
+    return row
+
+
+def combination_rows(product, sheet):
+    """Une ligne de combinaison PrestaShop par variation de la fiche"""
+    reference = product_reference(product)
+    for i, variation in enumerate(sheet.get("variations", [])):
+        attributes = [(VARIATION_ATTRIBUTES[key], variation[key]) for key in VARIATION_ATTRIBUTES if key in variation]
+        yield {
+            "ID Produit": product["id"],
+            "Attribut (Nom:Type:Position)": ",".join(f"{name}:{kind}:{pos}" for pos, ((name, kind), _) in enumerate(attributes)),
+            "Valeur (Valeur:Position)": ",".join(f"{value}:{pos}" for pos, (_, value) in enumerate(attributes)),
+            "Référence": f"{reference}-{i + 1}",
+            "EAN-13": variation.get("ean", ""),
+            "Quantité": str(variation.get("stock", 0)),
+            "Impact sur le prix": "0",
+            "Défaut": "1" if i == 0 else "0"
+        }
+
+
+def parse_date(value, name):
+    """Valide une date ISO (AAAA-MM-JJ ou date-heure) ; ValueError sinon"""
+    if value is None:
+        return None
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} invalide - date ISO attendue (AAAA-MM-JJ)")
+    return value
+
+
+def item_filter(brand=None, category=None, date_from=None, date_to=None, ids=None):
+    """Filtre sur la marque (exacte), la catégorie (contenue), la date de création
+    et, si `ids` est fourni, l'identifiant du produit ou de sa fiche"""
+    brand = brand.lower() if brand else None
+    category = category.lower() if category else None
+    ids = set(ids) if ids else None
+
+    def matches(product, sheet):
+        if ids is not None and product["id"] not in ids and sheet.get("id") not in ids:
+            return False
+        if brand and product.get("brand", "").lower() != brand:
+            return False
+        if category and category not in sheet.get("category", "").lower():
+            return False
+        created_at = product.get("created_at", "")
+        # Comparaison de chaînes ISO ; date_to inclut toute la journée
+        if date_from and created_at < date_from:
+            return False
+        if date_to and created_at[:len(date_to)] > date_to:
+            return False
+        return True
+
+    return matches
+
+
+def catalogue_rows(items, matches, combinations=False):
+    """Lignes produits (ou combinaisons) des entrées retenues, une à une"""
+    for item in items:
+        product, sheet = split_item(item)
+        if not matches(product, sheet):
+            continue
+        if combinations:
+            yield from combination_rows(product, sheet)
+        else:
+            yield product_row(product, sheet)
+
+
+def iter_csv(rows, columns, chunk_rows=CHUNK_ROWS, bom=False):
+    """Écrit les lignes en CSV (séparateur ;) par blocs de `chunk_rows` lignes"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, delimiter=';')
+    if bom:
+        # Sans BOM, Excel lit le fichier en Windows-1252 et casse les accents
+        yield UTF8_BOM
+    writer.writeheader()
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % chunk_rows == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    """Compresse un flux d'octets au format gzip, bloc par bloc"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ZipSink(io.RawIOBase):
+    """Destination non positionnable de zipfile : les octets écrits sont repris au fur et à mesure"""
+
+    def __init__(self):
+        super().__init__()
+        self.pending = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pending.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.pending)
+        self.pending = []
+        return data
+
+
+def zip_chunks(files):
+    """Archive zip de `files` [(nom, flux d'octets)], produite sans tampon complet"""
+    sink = _ZipSink()
+
+    def parts():
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=GZIP_LEVEL) as archive:
+            for name, chunks in files:
+                with archive.open(name, "w") as entry:
+                    for chunk in chunks:
+                        entry.write(chunk)
+                        yield sink.drain()
+                yield sink.drain()
+        # Répertoire central, écrit à la fermeture de l'archive
+        yield sink.drain()
+
+    return (data for data in parts() if data)
+
+
+def package_export(files, fmt="csv", archive_name="prestashop_export"):
+    """(flux d'octets, type MIME, nom de fichier) d'un export au format `fmt`
+
+    csv et gzip livrent un seul fichier ; zip réunit tous les fichiers.
+    ValueError si le format est inconnu ou ne peut pas contenir plusieurs fichiers.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format invalide - {', '.join(EXPORT_FORMATS)} attendu")
+    media_type, extension = EXPORT_FORMATS[fmt]
+    if fmt == "zip":
+        return zip_chunks(files), media_type, archive_name + extension
+    if len(files) != 1:
+        raise ValueError("plusieurs fichiers - utilisez format=zip")
+    name, chunks = files[0]
+    if fmt == "gzip":
+        chunks = gzip_chunks(chunks)
+    return chunks, media_type, name + extension
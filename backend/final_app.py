@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, Response
 from pydantic import BaseModel
 from typing import Optional
@@ -8,13 +9,41 @@ import re
 from datetime import datetime
 import requests
 import asyncio
+from pathlib import Path
+
+try:
+    from .batch import normalize_code
+    from .classifier import KeywordClassifier
+    from .html_results import extract_results
+    from .lookup_cache import MISS, open_lookup_cache
+    from .seo import SeoTemplate, product_slug
+    from .singleflight import SingleFlight
+    from .static_page import StaticPage
+except ImportError:
+    from batch import normalize_code
+    from classifier import KeywordClassifier
+    from html_results import extract_results
+    from lookup_cache import MISS, open_lookup_cache
+    from seo import SeoTemplate, product_slug
+    from singleflight import SingleFlight
+    from static_page import StaticPage
 
 app = FastAPI()
 
+# Cache persistant des recherches (LRU mémoire + SQLite)
+lookup_cache = open_lookup_cache(Path(__file__).parent / "lookup_cache.sqlite3")
+
+# Une seule recherche web en vol par code, les requêtes concurrentes attendent son résultat
+lookup_flight = SingleFlight("lookup")
+
 class SearchRequest(BaseModel):
     ean: Optional[str] = None
     sku: Optional[str] = None
 
+# Marques et types reconnus par real_search ; chaussures avant polos
+SEARCH_CLASSIFIER = KeywordClassifier.from_file(brands=["Lacoste", "Nike", "Adidas"],
+                                                types=["Sneakers", "Chaussures", "Polo"])
+
 def real_search(ean_sku):
     """Vraie recherche produit"""
     try:
@@ -24,29 +53,24 @@ def real_search(ean_sku):
         
         # Recherche via DuckDuckGo
         search_url = f"https://html.duckduckgo.com/html/?q={ean_sku}+product+price"
-        response = requests.get(search_url, headers=headers, timeout=8)
+        with requests.get(search_url, headers=headers, timeout=8, stream=True) as response:
+            if response.status_code != 200:
+                return fallback_analysis(ean_sku)
+            response.encoding = response.encoding or "utf-8"
+            # Titres et extraits des premiers résultats, lus au fil du flux
+            results = extract_results(response.iter_content(chunk_size=16384, decode_unicode=True))
+        text = " ".join(f"{result['title']} {result['snippet']}" for result in results)
         
-        if response.status_code == 200:
-            text = response.text.lower()
-            
-            # Détecter marque
-            brand = "Marque Inconnue"
-            if "lacoste" in text:
-                brand = "Lacoste"
-            elif "nike" in text:
-                brand = "Nike"
-            elif "adidas" in text:
-                brand = "Adidas"
-            
-            # Détecter type
-            product_type = "Produit"
-            if "sneakers" in text or "shoes" in text:
+        if results:
+            # Détecter marque et type
+            detected = SEARCH_CLASSIFIER.classify(text)
+            brand = detected["brand"] or "Marque Inconnue"
+            product_type = detected["type"] or "Produit"
+            if product_type == "Chaussures":
                 product_type = "Sneakers"
-            elif "polo" in text:
-                product_type = "Polo"
             
             # Extraire prix
-            price_match = re.search(r'[\$€£](\d+(?:[.,]\d{2})?)', response.text)
+            price_match = re.search(r'[\$€£](\d+(?:[.,]\d{2})?)', text)
             price = float(price_match.group(1).replace(',', '.')) if price_match else 79.99
             
             return {
@@ -55,12 +79,16 @@ def real_search(ean_sku):
                 "price": price,
                 "type": product_type,
                 "description": f"{brand} {product_type} trouvé par recherche web",
-                "confidence": 85 if brand != "Marque Inconnue" else 50
+                "confidence": 85 if brand != "Marque Inconnue" else 50,
+                "source": "web_search"
             }
     except:
         pass
     
-    # Fallback analyse EAN/SKU
+    return fallback_analysis(ean_sku)
+
+def fallback_analysis(ean_sku):
+    """Fallback analyse EAN/SKU"""
     if ean_sku.startswith('360807'):
         return {
             "name": "Polo Lacoste Classic",
@@ -68,7 +96,8 @@ def real_search(ean_sku):
             "price": 95.00,
             "type": "Polo",
             "description": "Polo Lacoste identifié par préfixe EAN",
-            "confidence": 75
+            "confidence": 75,
+            "source": "ean_analysis"
         }
     elif 'SMA' in ean_sku:
         return {
@@ -77,7 +106,8 @@ def real_search(ean_sku):
             "price": 120.00,
             "type": "Sneakers", 
             "description": "Sneakers Lacoste identifié par code SKU",
-            "confidence": 70
+            "confidence": 70,
+            "source": "sku_analysis"
         }
     else:
         return {
@@ -86,12 +116,24 @@ def real_search(ean_sku):
             "price": 49.99,
             "type": "Produit",
             "description": "Produit non identifié",
-            "confidence": 30
+            "confidence": 30,
+            "source": "fallback"
         }
 
-@app.get("/", response_class=HTMLResponse)
-def main():
-    return """
+def cached_search(ean_sku):
+    """Recherche produit avec cache (les échecs web sont mis en cache plus brièvement)"""
+    cached = lookup_cache.get("extract", ean_sku)
+    if cached is None:
+        return fallback_analysis(ean_sku)
+    if cached is not MISS:
+        return cached
+    
+    product_info = real_search(ean_sku)
+    lookup_cache.set("extract", ean_sku, product_info if product_info["source"] == "web_search" else None)
+    return product_info
+
+# Page construite et compressée une seule fois, au chargement du module
+APP_PAGE = StaticPage("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -319,7 +361,11 @@ def main():
     </script>
 </body>
 </html>
-    """
+""")
+
+@app.get("/", response_class=HTMLResponse)
+def main(request: Request):
+    return APP_PAGE.response(request)
 
 @app.post("/api/search")
 async def search_product(request: SearchRequest):
@@ -331,8 +377,8 @@ async def search_product(request: SearchRequest):
     
     print(f"🔍 RECHERCHE RÉELLE: {search_type} = {search_term}")
     
-    # Vraie recherche web
-    product_info = real_search(search_term)
+    # Vraie recherche web (ou cache), hors de la boucle d'événements
+    product_info = await lookup_flight.do(normalize_code(search_term), run_in_threadpool, cached_search, search_term)
     
     print(f"✅ Trouvé: {product_info['name']} - {product_info['brand']} - Confiance: {product_info['confidence']}%")
     
@@ -347,7 +393,7 @@ async def search_product(request: SearchRequest):
         "type": product_info["type"],
         "description": product_info["description"],
         "confidence": product_info["confidence"],
-        "source": "web_search"
+        "source": product_info["source"]
     }
     
     # Générer fiche SEO complète
@@ -360,6 +406,11 @@ async def search_product(request: SearchRequest):
         "sheet": sheet
     }
 
+# Gabarits SEO : titre 60 caractères, méta-description 160
+SEO_TITLE = SeoTemplate("{brand} {name:.30} - {price}€", 60)
+SEO_DESCRIPTION = SeoTemplate("Achetez {name} {brand} à {price}€. Livraison gratuite dès 50€. Retour 30j. Authentique.", 160)
+SEO_KEYWORDS = SeoTemplate("{brand}, {type}, {name:.20}, authentique, livraison gratuite")
+
 def generate_seo_sheet(product, product_info):
     """Fiche SEO complète"""
     brand = product['brand']
@@ -367,9 +418,9 @@ def generate_seo_sheet(product, product_info):
     price = product['price']
     
     # SEO optimisé
-    seo_title = f"{brand} {name[:30]} - {price}€"[:60]
-    seo_description = f"Achetez {name} {brand} à {price}€. Livraison gratuite dès 50€. Retour 30j. Authentique."[:160]
-    url_slug = re.sub(r'[^a-z0-9-]', '', f"{brand.lower()}-{name[:25].lower()}".replace(" ", "-"))
+    seo_title = SEO_TITLE.render(brand=brand, name=name, price=price)
+    seo_description = SEO_DESCRIPTION.render(name=name, brand=brand, price=price)
+    url_slug = product_slug(brand, name, 25)
     
     # Variations selon type
     if "sneakers" in product_info["type"].lower():
@@ -411,7 +462,7 @@ def generate_seo_sheet(product, product_info):
         "weight": weight,
         "characteristics": characteristics,
         "variations": variations,
-        "keywords": f"{brand}, {product_info['type']}, {name[:20]}, authentique, livraison gratuite",
+        "keywords": SEO_KEYWORDS.render(brand=brand, type=product_info["type"], name=name),
         "meta_robots": "index, follow",
         "canonical_url": f"https://monsite.com/produit/{url_slug}",
         "structured_data": {
@@ -428,6 +479,11 @@ def generate_seo_sheet(product, product_info):
         }
     }
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    """Statistiques du cache de recherche et des recherches fusionnées"""
+    return {**lookup_cache.stats(), "single_flight": lookup_flight.stats()}
+
 @app.get("/api/export/{product_id}")
 def export_csv(product_id: str):
     csv_content = f"""ID;Actif;Nom;Categories;Prix HT;Prix TTC;Référence;EAN-13;Description courte;Description;Balise titre;Méta-description;URL simplifiée;Image;Poids;Quantité;Visibilité
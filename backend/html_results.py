@@ -0,0 +1,78 @@
+"""Extraction incrémentale des résultats d'une page DuckDuckGo HTML.
+
+Seuls les liens `result__a` (titre, URL) et `result__snippet` (extrait)
+sont retenus ; aucun arbre n'est construit. La page est analysée au fil
+des morceaux reçus et la lecture s'arrête dès que `limit` résultats sont
+complets : le reste de la page n'est ni analysé ni téléchargé.
+"""
+from html.parser import HTMLParser
+
+RESULT_LIMIT = 5
+TITLE_CLASS = "result__a"
+SNIPPET_CLASS = "result__snippet"
+
+
+class ResultExtractor(HTMLParser):
+    """Analyseur HTML en flux qui ne garde que les titres, liens et extraits de résultats"""
+
+    def __init__(self, limit=RESULT_LIMIT):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.results = []
+        self.done = False
+        self._field = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a" or self.done:
+            return
+        classes = (dict(attrs).get("class") or "").split()
+        if TITLE_CLASS in classes:
+            # Le titre suivant marque la fin du dernier résultat retenu
+            if len(self.results) == self.limit:
+                self.done = True
+                return
+            self.results.append({"title": "", "url": dict(attrs).get("href") or "", "snippet": ""})
+            self._field = "title"
+        elif SNIPPET_CLASS in classes and self.results:
+            self._field = "snippet"
+        else:
+            return
+        self._text = []
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag != "a" or self._field is None:
+            return
+        self.results[-1][self._field] = " ".join("".join(self._text).split())
+        if self._field == "snippet" and len(self.results) == self.limit:
+            self.done = True
+        self._field = None
+
+    def _finish(self):
+        self.close()
+        # Un titre coupé par la fin du flux reste vide : ce n'est pas un résultat
+        return [result for result in self.results if result["title"]]
+
+
+def extract_results(chunks, limit=RESULT_LIMIT):
+    """Résultats d'une page reçue par morceaux (str), en s'arrêtant au `limit`-ième"""
+    parser = ResultExtractor(limit)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser._finish()
+
+
+async def aextract_results(chunks, limit=RESULT_LIMIT):
+    """Variante asynchrone d'extract_results (ex. httpx Response.aiter_text())"""
+    parser = ResultExtractor(limit)
+    async for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser._finish()
@@ -0,0 +1,163 @@
+"""Cache des recherches EAN/SKU.
+
+Deux niveaux : un LRU en mémoire devant une base SQLite sur disque, pour
+que les codes déjà résolus ne repassent pas par la recherche web. Chaque
+espace (résultats bruts, infos extraites, sortie IA) a son propre TTL et
+les échecs sont mis en cache plus brièvement (cache négatif).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    from .batch import normalize_code
+except ImportError:
+    from batch import normalize_code
+
+DEFAULT_TTLS = {
+    "search": float(os.environ.get("CACHE_TTL_SEARCH", 24 * 3600)),
+    "extract": float(os.environ.get("CACHE_TTL_EXTRACT", 7 * 24 * 3600)),
+    "ai": float(os.environ.get("CACHE_TTL_AI", 30 * 24 * 3600)),
+}
+NEGATIVE_TTL = float(os.environ.get("CACHE_TTL_NEGATIVE", 3600))
+MEMORY_ENTRIES = int(os.environ.get("CACHE_MEMORY_ENTRIES", 2048))
+
+MISS = object()  # absent du cache
+_NEGATIVE = {"__miss__": True}
+
+
+class LRUCache:
+    """LRU en mémoire avec expiration par entrée"""
+
+    def __init__(self, max_entries=MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clé -> (expire_at, valeur)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """Niveau persistant : une table clé → (valeur JSON, expiration)"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lookup_cache "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM lookup_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return MISS, 0.0
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO lookup_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at)
+            )
+
+    def purge_expired(self):
+        with self._lock:
+            return self._db.execute("DELETE FROM lookup_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class LookupCache:
+    """Cache à deux niveaux par espace (search / extract / ai) et code normalisé"""
+
+    def __init__(self, store, ttls=None, negative_ttl=NEGATIVE_TTL, memory_entries=MEMORY_ENTRIES):
+        self.store = store
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.negative_ttl = negative_ttl
+        self.memory = LRUCache(memory_entries)
+        self._stats = {}
+
+    def _count(self, namespace, event):
+        counters = self._stats.setdefault(
+            namespace, {"memory_hits": 0, "store_hits": 0, "negative_hits": 0, "misses": 0}
+        )
+        counters[event] += 1
+
+    @staticmethod
+    def key(namespace, code):
+        return f"{namespace}:{normalize_code(code)}"
+
+    def get(self, namespace, code):
+        """Retourne MISS, None (échec connu) ou la valeur en cache"""
+        key = self.key(namespace, code)
+        value = self.memory.get(key)
+        if value is MISS:
+            value, expires_at = self.store.get(key)
+            if value is MISS:
+                self._count(namespace, "misses")
+                return MISS
+            self.memory.set(key, value, expires_at)
+            self._count(namespace, "store_hits")
+        else:
+            self._count(namespace, "memory_hits")
+        if value == _NEGATIVE:
+            self._count(namespace, "negative_hits")
+            return None
+        return value
+
+    def set(self, namespace, code, value):
+        """Met en cache une valeur ; None enregistre un échec (TTL négatif)"""
+        key = self.key(namespace, code)
+        if value is None:
+            value, ttl = _NEGATIVE, self.negative_ttl
+        else:
+            ttl = self.ttls[namespace]
+        expires_at = time.time() + ttl
+        self.memory.set(key, value, expires_at)
+        self.store.set(key, value, expires_at)
+
+    def stats(self):
+        namespaces = {}
+        for namespace, counters in self._stats.items():
+            lookups = counters["memory_hits"] + counters["store_hits"] + counters["misses"]
+            hits = counters["memory_hits"] + counters["store_hits"]
+            namespaces[namespace] = dict(counters, hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+        return {
+            "memory_entries": len(self.memory),
+            "ttls": self.ttls,
+            "negative_ttl": self.negative_ttl,
+            "namespaces": namespaces
+        }
+
+
+def open_lookup_cache(path):
+    store = SQLiteStore(path)
+    store.purge_expired()
+    return LookupCache(store)
@@ -0,0 +1,102 @@
+"""Résolution multi-sources concurrente.
+
+Toutes les sources sont interrogées en parallèle sous une échéance globale ;
+la première qui renvoie un résultat au-dessus du seuil de confiance gagne et
+les autres sont annulées. La source gagnante et la durée de chaque source
+sont enregistrées.
+"""
+import asyncio
+import time
+
+
+class ResolverStats:
+    """Victoires et durées cumulées par source"""
+
+    def __init__(self):
+        self.resolutions = 0
+        self.unresolved = 0
+        self._sources = {}
+
+    def record(self, winner, timings):
+        self.resolutions += 1
+        if winner is None:
+            self.unresolved += 1
+        for name, timing in timings.items():
+            source = self._sources.setdefault(name, {"wins": 0, "runs": 0, "total_ms": 0.0, "statuses": {}})
+            source["runs"] += 1
+            source["total_ms"] += timing["ms"]
+            source["statuses"][timing["status"]] = source["statuses"].get(timing["status"], 0) + 1
+            if name == winner:
+                source["wins"] += 1
+
+    def stats(self):
+        return {
+            "resolutions": self.resolutions,
+            "unresolved": self.unresolved,
+            "sources": {
+                name: {
+                    "wins": source["wins"],
+                    "runs": source["runs"],
+                    "avg_ms": round(source["total_ms"] / source["runs"], 1),
+                    "statuses": source["statuses"]
+                }
+                for name, source in self._sources.items()
+            }
+        }
+
+
+async def resolve_first(sources, deadline, threshold, confidence=lambda result: result["confidence"]):
+    """Lance les sources [(nom, coroutine)] en parallèle.
+
+    Retourne (résultat, source gagnante, durées par source) ; (None, None, …)
+    si aucune source ne dépasse `threshold` avant `deadline` secondes.
+    ValueError si `deadline` n'est pas positive.
+    """
+    if deadline <= 0:
+        raise ValueError(f"Échéance de résolution invalide: {deadline}")
+    # Pré-rempli : une source annulée avant d'avoir démarré a tout de même une durée
+    timings = {name: {"status": "pending", "ms": 0.0} for name, _ in sources}
+    order = [name for name, _ in sources]
+
+    async def timed(name, coro):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await coro
+            status = "hit" if result is not None and confidence(result) > threshold else "miss"
+            return result
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            print(f"Erreur source {name}: {e}")
+            return None
+        finally:
+            timings[name] = {"status": status, "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    tasks = {asyncio.create_task(timed(name, coro)): name for name, coro in sources}
+    pending = set(tasks)
+    winner, best = None, None
+    end = time.monotonic() + deadline
+    try:
+        while pending and winner is None:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            # Ordre des sources pour départager des résultats simultanés
+            for task in sorted(done, key=lambda t: order.index(tasks[t])):
+                result = task.result()
+                if result is not None and confidence(result) > threshold:
+                    winner, best = tasks[task], result
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    if winner is None:
+        # Sources coupées par l'échéance, pas par un gagnant
+        for task in pending:
+            timings[tasks[task]]["status"] = "timeout"
+    return best, winner, timings
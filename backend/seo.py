@@ -0,0 +1,136 @@
+"""Champs SEO des fiches : gabarits compilés et slugs normalisés.
+
+Un SeoTemplate est un gabarit « {brand} {name:.30} - {price}€ » compilé
+une seule fois en fonction Python (f-string). La précision d'un champ
+(`.30`) et la longueur maximale du texte rendu sont des coupures à la
+frontière de mot, jamais au milieu d'un mot ; un gabarit de repli plus
+court peut être essayé avant de couper.
+
+Les slugs passent par des tables de traduction construites au chargement
+(accents translittérés, « œ » → « oe », ponctuation → tiret, « & » → « et »)
+puis sont mémorisés par (marque, nom) : une même gamme importée en mille
+tailles et coloris n'est normalisée qu'une fois.
+"""
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from string import Formatter
+
+SLUG_CACHE_SIZE = int(os.environ.get("SLUG_CACHE_SIZE", 8192))
+
+# Caractères retirés en fin de texte coupé
+_TRAILING = " ,;:-–—/|(&+"
+_NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+_DASHES = re.compile(r"-{2,}")
+_PRECISION = re.compile(r"\.(\d+)")
+
+
+def _slug_table():
+    """Table str.translate des lettres latines accentuées et ligatures vers l'ASCII"""
+    table = {}
+    for code in range(0x80, 0x250):
+        ascii_text = unicodedata.normalize("NFKD", chr(code)).encode("ascii", "ignore").decode()
+        if ascii_text:
+            table[code] = ascii_text.lower()
+    table.update({ord(char): text for char, text in {
+        "œ": "oe", "Œ": "oe", "æ": "ae", "Æ": "ae", "ß": "ss", "ø": "o", "Ø": "o",
+        "ł": "l", "Ł": "l", "đ": "d", "Đ": "d", "ð": "d", "þ": "th", "’": "",
+    }.items()})
+    return table
+
+
+SLUG_TABLE = _slug_table()
+# Octets ASCII : a-z et 0-9 conservés, tout le reste → tiret (bytes.translate, sans dict)
+_SLUG_BYTES = bytes(code if chr(code).isdigit() or "a" <= chr(code) <= "z" else ord("-") for code in range(256))
+
+
+def truncate(text, limit):
+    """Coupe `text` à `limit` caractères au plus, sur une frontière de mot si possible"""
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    if text[limit].isspace():
+        return text[:limit].rstrip(_TRAILING)
+    head = text[:limit]
+    space = head.rfind(" ")
+    # Un seul mot très long : coupe franche plutôt qu'un texte presque vide
+    if space > limit // 2:
+        head = head[:space]
+    return head.rstrip(_TRAILING)
+
+
+def slugify(text, limit=None):
+    """Slug ASCII minuscule (a-z, 0-9, tirets), coupé entre deux mots à `limit` caractères"""
+    text = str(text).lower()
+    if not text.isascii():
+        text = text.translate(SLUG_TABLE)
+        if not text.isascii():
+            # Hors alphabet latin : rien à translittérer
+            text = _NON_ASCII.sub("-", text)
+    if "&" in text:
+        text = text.replace("&", "-et-")
+    # Apostrophes supprimées : « l'original » → « loriginal »
+    slug = text.encode().translate(_SLUG_BYTES, b"'").decode()
+    if "--" in slug:
+        slug = _DASHES.sub("-", slug)
+    slug = slug.strip("-")
+    if limit and len(slug) > limit:
+        cut = slug.rfind("-", 0, limit + 1)
+        slug = slug[:cut if cut > limit // 2 else limit].strip("-")
+    return slug
+
+
+@lru_cache(maxsize=SLUG_CACHE_SIZE)
+def product_slug(brand, name, name_limit=None):
+    """Slug « marque-nom » ; le nom est d'abord coupé à `name_limit` caractères entre deux mots"""
+    if name_limit:
+        name = truncate(name, name_limit)
+    return slugify(f"{brand} {name}")
+
+
+class SeoTemplate:
+    """Gabarit de texte SEO compilé en fonction, coupé à `limit` caractères entre deux mots.
+
+    render(**champs) rend un texte, column(**colonnes) tout un lot."""
+
+    def __init__(self, pattern, limit=None, fallback=None):
+        self.pattern = pattern
+        self.limit = limit
+        self.fallback = fallback
+        self.fields = []
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(pattern):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Champ de gabarit invalide: {field!r}")
+            if field not in self.fields:
+                self.fields.append(field)
+            precision = _PRECISION.fullmatch(spec or "")
+            if precision:
+                size = precision.group(1)
+                parts.append(f"{{{field} if len({field}) <= {size} else _truncate({field}, {size})}}")
+            else:
+                parts.append("{" + field + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+        if fallback is not None and not set(fallback.fields) <= set(self.fields):
+            raise ValueError("Le gabarit de repli ne peut utiliser que les champs du gabarit principal")
+
+        # Longueur maximale et repli compilés dans la fonction : aucun surcoût par appel
+        lines = [f"def render({', '.join(self.fields)}):", f"    text = f{''.join(parts)!r}"]
+        if limit is not None:
+            lines.append(f"    if len(text) > {limit}:")
+            if fallback is not None:
+                lines.append(f"        return _fallback({', '.join(f'{name}={name}' for name in fallback.fields)})")
+            else:
+                lines.append(f"        return _truncate(text, {limit})")
+        lines.append("    return text")
+        namespace = {"_truncate": truncate, "_fallback": fallback.render if fallback is not None else None}
+        exec(compile("\n".join(lines), f"<SeoTemplate {pattern!r}>", "exec"), namespace)
+        self.render = namespace["render"]
+
+    def column(self, **columns):
+        """Rendu de tout un lot : une liste de valeurs par champ, dans l'ordre des lignes"""
+        render = self.render
+        return [render(*values) for values in zip(*(columns[name] for name in self.fields))]
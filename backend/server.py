@@ -1,27 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
+import hashlib
 import json
+import os
 import uuid
 from datetime import datetime
 from pathlib import Path
-import csv
-import io
 
-# Simple JSON storage
+try:
+    from .batch import MAX_BATCH_SIZE, clamp_concurrency, dedupe_codes, error_message, is_ean, parse_codes_csv, run_batch
+    from .export import (COMBINATION_COLUMNS, PRODUCT_COLUMNS, catalogue_rows, item_filter, iter_csv,
+                         package_export, parse_date, product_reference, product_row, split_item)
+    from .responses import CompressionMiddleware, FastJSONResponse
+    from .sheets import generate_prestashop_sheet, import_columns, import_products, prestashop_sheets
+    from .static_page import StaticPage
+    from .storage import ProductStore
+except ImportError:
+    from batch import MAX_BATCH_SIZE, clamp_concurrency, dedupe_codes, error_message, is_ean, parse_codes_csv, run_batch
+    from export import (COMBINATION_COLUMNS, PRODUCT_COLUMNS, catalogue_rows, item_filter, iter_csv,
+                        package_export, parse_date, product_reference, product_row, split_item)
+    from responses import CompressionMiddleware, FastJSONResponse
+    from sheets import generate_prestashop_sheet, import_columns, import_products, prestashop_sheets
+    from static_page import StaticPage
+    from storage import ProductStore
+
+# Stockage append-only (products.json n'est lu qu'une fois pour la migration)
 DATA_FILE = Path(__file__).parent / "products.json"
+LOG_FILE = Path(os.environ.get("PRODUCTS_LOG", Path(__file__).parent / "products.jsonl"))
 
-def load_products():
-    if DATA_FILE.exists():
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
-
-def save_products(products):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(products, f, indent=2, ensure_ascii=False)
+store = ProductStore(LOG_FILE, legacy_path=DATA_FILE)
 
 # Base de produits réels
 REAL_PRODUCTS = {
@@ -64,7 +75,7 @@ REAL_PRODUCTS = {
     }
 }
 
-app = FastAPI(title="Générateur Fiches Produits", version="2.0.0")
+app = FastAPI(title="Générateur Fiches Produits", version="2.0.0", default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -74,20 +85,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression gzip des réponses au-delà de GZIP_MIN_SIZE octets
+app.add_middleware(CompressionMiddleware)
+
 class SearchRequest(BaseModel):
     ean: Optional[str] = None
     sku: Optional[str] = None
 
-@app.get("/", response_class=HTMLResponse)
-def get_app():
-    return HTMLResponse("""
+class BatchSearchRequest(BaseModel):
+    codes: List[str]
+    concurrency: int = 10
+
+class ImportColumnsRequest(BaseModel):
+    """Produits en colonnes : une liste par champ, toutes de même longueur"""
+    ean: List[str]
+    name: List[str]
+    brand: List[str]
+    type: List[str]
+    price: List[float]
+    sku: Optional[List[str]] = None
+    description: Optional[List[str]] = None
+    image: Optional[List[str]] = None
+    category: Optional[List[str]] = None
+    material: Optional[List[str]] = None
+    sizes: Optional[List[Optional[List[str]]]] = None
+    colors: Optional[List[Optional[List[str]]]] = None
+
+# Page construite et compressée une seule fois, au chargement du module
+APP_PAGE = StaticPage("""
 <!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>🏷️ Générateur de Fiches Produits</title>
-    <script src="https://cdn.tailwindcss.com"></script>
 </head>
 <body class="bg-gray-50">
     <div class="container mx-auto px-4 py-6 max-w-6xl">
@@ -298,70 +329,79 @@ def get_app():
     </script>
 </body>
 </html>
-    """)
+""", stylesheet="app.css")
+
+@app.get("/", response_class=HTMLResponse)
+def get_app(request: Request):
+    return APP_PAGE.response(request)
+
+def build_search_result(ean=None, sku=None):
+    """Recherche un EAN/SKU et génère le produit et sa fiche, sans sauvegarde"""
+    search_term = ean or sku
+    search_type = "EAN" if ean else "SKU"
+    
+    if not search_term:
+        raise HTTPException(status_code=400, detail="EAN ou SKU requis")
+    
+    # Validation EAN
+    if ean and (len(ean) != 13 or not ean.isdigit()):
+        raise HTTPException(status_code=400, detail="EAN invalide - 13 chiffres requis")
+    
+    # Recherche dans la base de produits réels
+    product_data = None
+    if search_term in REAL_PRODUCTS:
+        product_data = REAL_PRODUCTS[search_term].copy()
+    else:
+        # Fallback générique
+        product_data = {
+            "name": f"Produit {search_term[:8]}",
+            "brand": "Marque Inconnue",
+            "price": 49.99,
+            "description": f"Produit identifié par {search_type}: {search_term}",
+            "type": "Produit",
+            "image": "https://via.placeholder.com/300x300/e0e0e0/666666?text=Produit",
+            "category": "Produits > Divers",
+            "material": "Matériaux standards"
+        }
+    
+    # Créer le produit
+    product = {
+        "id": str(uuid.uuid4()),
+        "ean": ean or f"EAN{uuid.uuid4().hex[:10].upper()}",
+        "sku": sku or f"SKU{search_term[:8]}",
+        "name": product_data["name"],
+        "brand": product_data["brand"],
+        "type": product_data["type"],
+        "price": product_data["price"],
+        "original_price": product_data.get("original_price"),
+        "description": product_data["description"],
+        "image": product_data["image"],
+        "category": product_data["category"],
+        "material": product_data.get("material", "Standard"),
+        "search_type": search_type,
+        "search_term": search_term,
+        "created_at": datetime.now().isoformat()
+    }
+    
+    # Générer la fiche PrestaShop
+    sheet = generate_prestashop_sheet(product, product_data)
+    
+    return {"product": product, "sheet": sheet}
 
 @app.post("/api/search")
 def search_product(request: SearchRequest):
     try:
-        search_term = request.ean or request.sku
-        search_type = "EAN" if request.ean else "SKU"
-        
-        if not search_term:
-            raise HTTPException(status_code=400, detail="EAN ou SKU requis")
-        
-        # Validation EAN
-        if request.ean and (len(request.ean) != 13 or not request.ean.isdigit()):
-            raise HTTPException(status_code=400, detail="EAN invalide - 13 chiffres requis")
-        
-        # Recherche dans la base de produits réels
-        product_data = None
-        if search_term in REAL_PRODUCTS:
-            product_data = REAL_PRODUCTS[search_term].copy()
-        else:
-            # Fallback générique
-            product_data = {
-                "name": f"Produit {search_term[:8]}",
-                "brand": "Marque Inconnue",
-                "price": 49.99,
-                "description": f"Produit identifié par {search_type}: {search_term}",
-                "type": "Produit",
-                "image": "https://via.placeholder.com/300x300/e0e0e0/666666?text=Produit",
-                "category": "Produits > Divers",
-                "material": "Matériaux standards"
-            }
-        
-        # Créer le produit
-        product = {
-            "id": str(uuid.uuid4()),
-            "ean": request.ean or f"EAN{uuid.uuid4().hex[:10].upper()}",
-            "sku": request.sku or f"SKU{search_term[:8]}",
-            "name": product_data["name"],
-            "brand": product_data["brand"],
-            "type": product_data["type"],
-            "price": product_data["price"],
-            "original_price": product_data.get("original_price"),
-            "description": product_data["description"],
-            "image": product_data["image"],
-            "category": product_data["category"],
-            "material": product_data.get("material", "Standard"),
-            "search_type": search_type,
-            "search_term": search_term,
-            "created_at": datetime.now().isoformat()
-        }
-        
-        # Générer la fiche PrestaShop
-        sheet = generate_prestashop_sheet(product, product_data)
+        result = build_search_result(request.ean, request.sku)
         
         # Sauvegarder
-        products = load_products()
-        products.append({"product": product, "sheet": sheet})
-        save_products(products)
+        store.append(result)
         
+        product = result["product"]
         return {
             "success": True,
             "message": f"✅ {product['brand']} {product['name']} trouvé !",
             "product": product,
-            "sheet": sheet
+            "sheet": result["sheet"]
         }
         
     except HTTPException:
@@ -369,206 +409,204 @@ def search_product(request: SearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def generate_prestashop_sheet(product, product_data):
-    """Génère une fiche PrestaShop complète"""
+def stream_batch_search(codes, concurrency):
+    """Recherche par lots : une ligne NDJSON par code, une seule écriture en fin de lot"""
+    codes, duplicates = dedupe_codes(codes)
+    if not codes:
+        raise HTTPException(status_code=400, detail="Aucun code EAN/SKU fourni")
+    if len(codes) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Lot trop volumineux - {MAX_BATCH_SIZE} codes maximum")
     
-    # Variations selon le produit
-    variations = []
-    if product_data.get("sizes") and product_data.get("colors"):
-        for color in product_data["colors"][:2]:  # Max 2 couleurs
-            for size in product_data["sizes"][:5]:  # Max 5 tailles
-                variations.append({
-                    "size": size,
-                    "color": color,
-                    "stock": 20 if size in ["M", "L", "41", "42"] else 15,
-                    "ean": f"{product['ean'][:-2]}{len(variations):02d}"
-                })
-    else:
-        variations = [
-            {"option": "Standard", "stock": 25, "ean": product["ean"]},
-            {"option": "Premium", "stock": 15, "ean": f"{product['ean'][:-1]}9"}
-        ]
+    async def worker(code):
+        if is_ean(code):
+            return await run_in_threadpool(build_search_result, ean=code)
+        return await run_in_threadpool(build_search_result, sku=code)
     
-    # Caractéristiques
-    characteristics = {}
-    if "lacoste" in product["brand"].lower():
-        if "sneakers" in product["type"].lower():
-            characteristics = {
-                "Matière": "Cuir premium et textile",
-                "Doublure": "Textile respirant",
-                "Semelle": "Caoutchouc antidérapant",
-                "Logo": "Crocodile Lacoste brodé",
-                "Style": "Sneakers lifestyle",
-                "Entretien": "Nettoyage cuir doux"
-            }
-        else:
-            characteristics = {
-                "Matière": "100% Coton piqué",
-                "Coupe": "Classic Fit",
-                "Col": "Polo 2 boutons",
-                "Logo": "Crocodile brodé",
-                "Entretien": "Lavage 30°C"
-            }
-    else:
-        characteristics = {
-            "Matière": product.get("material", "Standard"),
-            "Qualité": "Norme européenne",
-            "Garantie": "2 ans constructeur"
-        }
+    async def stream():
+        results = []
+        failed = 0
+        try:
+            async for code, result, error in run_batch(codes, worker, clamp_concurrency(concurrency)):
+                if error is not None:
+                    failed += 1
+                    line = {"code": code, "success": False, "error": error_message(error)}
+                else:
+                    results.append(result)
+                    line = {"code": code, "success": True, **result}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # Sauvegarde groupée, y compris si le client se déconnecte en cours de lot
+            store.append_many(results)
+        yield json.dumps({
+            "done": True,
+            "total": len(codes),
+            "succeeded": len(results),
+            "failed": failed,
+            "duplicates": duplicates
+        }) + "\n"
     
-    # SEO optimisé
-    brand = product["brand"]
-    name = product["name"].split()[0] if product["name"] else "Produit"
-    seo_title = f"{brand} {name} - {product['type']}"[:60]
-    seo_description = f"Achetez {product['name']} {brand} à {product['price']}€. {product['description'][:80]}. Livraison gratuite."[:160]
-    url_slug = f"{brand.lower()}-{name.lower()}-{product['sku'].lower()}".replace(" ", "-")
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/api/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """Recherche d'une liste de codes EAN/SKU"""
+    return stream_batch_search(request.codes, request.concurrency)
+
+@app.post("/api/search/batch/csv")
+async def search_batch_csv(file: UploadFile = File(...), concurrency: int = 10):
+    """Recherche des codes EAN/SKU d'un fichier CSV (première colonne)"""
+    content = (await file.read()).decode("utf-8-sig", errors="replace")
+    return stream_batch_search(parse_codes_csv(content), concurrency)
+
+@app.post("/api/import/products")
+def import_products_columns(request: ImportColumnsRequest):
+    """Import de produits en colonnes : fiches générées par lots, une seule écriture"""
+    try:
+        cols = import_columns(request.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {
-        "id": str(uuid.uuid4()),
-        "product_id": product["id"],
-        "category": product["category"],
-        "weight": 0.8 if "sneakers" in product["type"].lower() else 0.3,
-        "variations": variations,
-        "characteristics": characteristics,
-        "seo_title": seo_title,
-        "seo_description": seo_description,
-        "url_slug": url_slug,
-        "visibility": "both",
-        "available_for_order": True,
-        "condition": "new",
-        "created_at": datetime.now().isoformat()
-    }
+    products = import_products(cols)
+    sheets = prestashop_sheets(cols)
+    store.append_many([{"product": product, "sheet": sheet} for product, sheet in zip(products, sheets)])
+    return {"success": True, "imported": len(products), "product_ids": cols["id"]}
+
+def export_response(files, format, archive_name):
+    """Envoie les fichiers CSV (octets bruts, gzip ou zip) au fil de l'eau"""
+    try:
+        chunks, media_type, filename = package_export(files, format, archive_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+def catalogue_filter(brand, category, date_from, date_to, ids=None):
+    try:
+        date_from = parse_date(date_from, "date_from")
+        date_to = parse_date(date_to, "date_to")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return item_filter(brand=brand, category=category, date_from=date_from, date_to=date_to, ids=ids)
+
+def stream_catalogue_csv(filename, columns, combinations, brand, category, date_from, date_to, format, bom):
+    """Export CSV du catalogue filtré, écrit au fil de l'eau"""
+    matches = catalogue_filter(brand, category, date_from, date_to)
+    rows = catalogue_rows(store.items(), matches, combinations=combinations)
+    return export_response([(filename, iter_csv(rows, columns, bom=bom))], format, filename.removesuffix(".csv"))
+
+@app.get("/api/export/catalogue")
+def export_catalogue_csv(brand: Optional[str] = None, category: Optional[str] = None,
+                         date_from: Optional[str] = None, date_to: Optional[str] = None,
+                         format: str = "csv", bom: bool = False):
+    """Export PrestaShop CSV de tout le catalogue (import Produits)"""
+    return stream_catalogue_csv("prestashop_catalogue.csv", PRODUCT_COLUMNS, False,
+                                brand, category, date_from, date_to, format, bom)
+
+@app.get("/api/export/catalogue/combinations")
+def export_catalogue_combinations_csv(brand: Optional[str] = None, category: Optional[str] = None,
+                                      date_from: Optional[str] = None, date_to: Optional[str] = None,
+                                      format: str = "csv", bom: bool = False):
+    """Export PrestaShop CSV des déclinaisons du catalogue (import Combinaisons)"""
+    return stream_catalogue_csv("prestashop_combinations.csv", COMBINATION_COLUMNS, True,
+                                brand, category, date_from, date_to, format, bom)
+
+@app.get("/api/export/bundle")
+def export_bundle(ids: Optional[str] = None, brand: Optional[str] = None, category: Optional[str] = None,
+                  date_from: Optional[str] = None, date_to: Optional[str] = None, bom: bool = False):
+    """Archive zip des imports Produits et Combinaisons de plusieurs produits
+    (identifiants de produits ou de fiches séparés par des virgules, sinon tout le catalogue filtré)"""
+    wanted = [value.strip() for value in ids.split(",") if value.strip()] if ids else None
+    matches = catalogue_filter(brand, category, date_from, date_to, wanted)
+    files = [
+        ("prestashop_products.csv",
+         iter_csv(catalogue_rows(store.items(), matches), PRODUCT_COLUMNS, bom=bom)),
+        ("prestashop_combinations.csv",
+         iter_csv(catalogue_rows(store.items(), matches, combinations=True), COMBINATION_COLUMNS, bom=bom)),
+    ]
+    return export_response(files, "zip", "prestashop_export")
 
 @app.get("/api/export/{product_id}")
-def export_prestashop_csv(product_id: str):
-    """Export PrestaShop CSV"""
-    products = load_products()
-    product_data = None
-    
-    # Chercher le produit dans les deux formats
-    for item in products:
-        if isinstance(item, dict):
-            if "product" in item and item["product"]["id"] == product_id:
-                # Format nouveau avec product/sheet
-                product_data = item
-                break
-            elif "id" in item and item["id"] == product_id:
-                # Format ancien - créer une fiche temporaire
-                product = item
-                sheet = {
-                    "id": str(uuid.uuid4()),
-                    "product_id": product["id"],
-                    "category": "Produits > Divers",
-                    "weight": 0.5,
-                    "variations": [{"option": "Standard", "stock": 25, "ean": product.get("ean", "")}],
-                    "characteristics": {"Matière": "Standard", "Qualité": "Norme européenne"},
-                    "seo_title": f"{product.get('brand', 'Produit')} {product.get('name', '')}"[:60],
-                    "seo_description": f"Achetez {product.get('name', '')} à {product.get('price', 0)}€",
-                    "url_slug": f"produit-{product['id'][:8]}",
-                    "visibility": "both",
-                    "available_for_order": True,
-                    "condition": "new"
-                }
-                product_data = {"product": product, "sheet": sheet}
-                break
-    
-    if not product_data:
+def export_prestashop_csv(product_id: str, format: str = "csv", bom: bool = False):
+    """Export PrestaShop CSV d'un produit"""
+    item = store.get(product_id) or store.get_by_sheet(product_id)
+    if item is None:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
     
-    product = product_data["product"]
-    sheet = product_data["sheet"]
+    # Format ancien : fiche temporaire
+    product, sheet = split_item(item)
+    filename = f"prestashop_{product_reference(product)}.csv"
+    return export_response([(filename, iter_csv([product_row(product, sheet)], PRODUCT_COLUMNS, bom=bom))],
+                           format, filename.removesuffix(".csv"))
+
+def project(entries, fields):
+    """Ne garde que les champs demandés (l'id est toujours inclus)"""
+    if not fields:
+        return entries
+    wanted = {"id"} | {field.strip() for field in fields.split(",") if field.strip()}
+    return [{k: v for k, v in entry.items() if k in wanted} for entry in entries]
+
+def listing_response(request: Request, key, view, fields, cursor, limit, **filters):
+    """Liste paginée et filtrée, avec ETag : 304 si la page n'a pas changé"""
+    etag = '"' + hashlib.sha1(f"{store.version}?{request.url.query}".encode()).hexdigest()[:20] + '"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
     
-    # Créer le CSV PrestaShop
-    csv_data = []
-    
-    # Ligne principale du produit
-    main_row = {
-        "ID": product["id"],
-        "Actif": "1",
-        "Nom": product.get("name", "Produit"),
-        "Catégories": sheet["category"],
-        "Prix HT": str(product.get("price", 0)),
-        "Prix TTC": str(round(float(product.get("price", 0)) * 1.2, 2)),
-        "Référence": product.get("sku", product.get("id")[:8]),
-        "EAN-13": product.get("ean", ""),
-        "Description courte": product.get("description", "")[:300],
-        "Description": f"<h2>{product.get('name', 'Produit')}</h2><p>{product.get('description', '')}</p>",
-        "Balise titre": sheet["seo_title"],
-        "Méta-description": sheet["seo_description"],
-        "URL simplifiée": sheet["url_slug"],
-        "Image": product.get("image", ""),
-        "Poids": str(sheet["weight"]),
-        "Quantité": "100",
-        "Visibilité": "both",
-        "Marque": product.get("brand", "")
-    }
-    
-    # Ajouter les caractéristiques
-    for i, (key, value) in enumerate(sheet["characteristics"].items()):
-        if i < 5:  # Limiter à 5 caractéristiques
-            main_row[f"Caractéristique_{i+1}"] = f"{key}: {value}"
-    
-    csv_data.append(main_row)
-    
-    # Créer le CSV en mémoire
-    output = io.StringIO()
-    if csv_data:
-        fieldnames = list(csv_data[0].keys())
-        writer = csv.DictWriter(output, fieldnames=fieldnames, delimiter=';')
-        writer.writeheader()
-        writer.writerows(csv_data)
-    
-    csv_content = output.getvalue()
-    output.close()
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit doit être positif")
+    try:
+        filters["date_from"] = parse_date(filters["date_from"], "date_from")
+        filters["date_to"] = parse_date(filters["date_to"], "date_to")
+        entries, next_cursor = store.page(view, cursor=cursor, limit=limit, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Retourner le CSV
-    return JSONResponse(
-        content=csv_content,
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=prestashop_{product.get('sku', product['id'][:8])}.csv"}
+    return FastJSONResponse(
+        {"success": True, key: project(entries, fields), "next_cursor": next_cursor},
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
     )
 
 @app.get("/api/products")
-def get_products():
-    """Retourne la liste des produits trouvés"""
-    try:
-        products = load_products()
-        product_list = []
-        for item in products:
-            if isinstance(item, dict) and "product" in item:
-                # Format nouveau avec product/sheet
-                product_list.append(item["product"])
-            elif isinstance(item, dict) and "id" in item:
-                # Format ancien - produit direct
-                product_list.append(item)
-        return {"success": True, "products": product_list}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def get_products(request: Request, ean: Optional[str] = None, sku: Optional[str] = None,
+                 brand: Optional[str] = None, type: Optional[str] = None,
+                 date_from: Optional[str] = None, date_to: Optional[str] = None,
+                 fields: Optional[str] = None, cursor: Optional[str] = None, limit: Optional[int] = None):
+    """Retourne la liste des produits trouvés (tout, sauf si limit est fourni)"""
+    return listing_response(request, "products", "products", fields, cursor, limit,
+                            ean=ean, sku=sku, brand=brand, ptype=type, date_from=date_from, date_to=date_to)
+
+@app.get("/api/products/{product_id}")
+def get_product(product_id: str):
+    """Retourne un produit et sa fiche"""
+    item = store.get(product_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Produit non trouvé")
+    if "product" in item:
+        return {"success": True, "product": item["product"], "sheet": item["sheet"]}
+    return {"success": True, "product": item, "sheet": None}
 
 @app.get("/api/sheets")
-def get_sheets():
-    """Retourne la liste des fiches créées"""
-    try:
-        products = load_products()
-        sheets = []
-        for item in products:
-            if isinstance(item, dict) and "product" in item and "sheet" in item:
-                # Format nouveau avec product/sheet
-                sheet = item["sheet"].copy()
-                product = item["product"]
-                sheet.update({
-                    "title": f"{product['brand']} {product['name']}",
-                    "ean": product["ean"],
-                    "description": product["description"]
-                })
-                sheets.append(sheet)
-        return {"success": True, "sheets": sheets}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def get_sheets(request: Request, brand: Optional[str] = None, type: Optional[str] = None,
+               date_from: Optional[str] = None, date_to: Optional[str] = None,
+               fields: Optional[str] = None, cursor: Optional[str] = None, limit: Optional[int] = None):
+    """Retourne la liste des fiches créées (tout, sauf si limit est fourni)"""
+    return listing_response(request, "sheets", "sheets", fields, cursor, limit,
+                            brand=brand, ptype=type, date_from=date_from, date_to=date_to)
+
+@app.get("/api/sheets/{sheet_id}")
+def get_sheet(sheet_id: str):
+    """Retourne une fiche et son produit"""
+    item = store.get_by_sheet(sheet_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Fiche non trouvée")
+    return {"success": True, "product": item["product"], "sheet": item["sheet"]}
 
 @app.get("/api/health")
 def health_check():
-    return {"status": "OK", "products_count": len(load_products())}
+    return {"status": "OK", "products_count": len(store)}
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,253 @@
+"""Génération des fiches PrestaShop, produit par produit ou par lots.
+
+generate_prestashop_sheet traite un produit à la fois (recherche EAN/SKU).
+Pour un import de milliers de produits, prestashop_sheets travaille sur des
+colonnes (listes de marques, noms, prix, types...) : chaque champ SEO, le
+prix TTC et la classe de poids sont calculés pour tout le lot en une passe
+par colonne, et les caractéristiques et modèles de déclinaisons ne sont
+construits qu'une fois par combinaison distincte, puis copiés. Les fiches
+produites sont identiques à celles de generate_prestashop_sheet, à l'id et
+à la date de création près.
+"""
+import os
+import uuid
+from datetime import datetime
+
+try:
+    from .export import ttc_price
+    from .seo import SeoTemplate, product_slug, slugify
+except ImportError:
+    from export import ttc_price
+    from seo import SeoTemplate, product_slug, slugify
+
+MAX_IMPORT_ROWS = int(os.environ.get("MAX_IMPORT_ROWS", 100000))
+
+MAX_COLORS = 2
+MAX_SIZES = 5
+# Tailles les plus vendues, stockées en plus grande quantité
+STOCK_SIZES = {"M", "L", "41", "42"}
+
+LACOSTE_SNEAKERS_CHARACTERISTICS = {
+    "Matière": "Cuir premium et textile",
+    "Doublure": "Textile respirant",
+    "Semelle": "Caoutchouc antidérapant",
+    "Logo": "Crocodile Lacoste brodé",
+    "Style": "Sneakers lifestyle",
+    "Entretien": "Nettoyage cuir doux"
+}
+LACOSTE_CHARACTERISTICS = {
+    "Matière": "100% Coton piqué",
+    "Coupe": "Classic Fit",
+    "Col": "Polo 2 boutons",
+    "Logo": "Crocodile brodé",
+    "Entretien": "Lavage 30°C"
+}
+
+# Valeurs par défaut des colonnes facultatives d'un import
+IMPORT_DEFAULTS = {
+    "description": "",
+    "image": "https://via.placeholder.com/300x300/e0e0e0/666666?text=Produit",
+    "category": "Produits > Divers",
+    "material": "Standard",
+}
+IMPORT_REQUIRED = ("ean", "name", "brand", "type", "price")
+
+# Champs SEO ; `word` est le premier mot du nom du produit
+SEO_TITLE = SeoTemplate("{brand} {word} - {type}", 60)
+SEO_DESCRIPTION = SeoTemplate("Achetez {name} {brand} à {price}€. {description:.80}. Livraison gratuite.", 160)
+
+
+def characteristics_for(brand, ptype, material):
+    """Caractéristiques selon la marque et le type"""
+    if "lacoste" in brand.lower():
+        if "sneakers" in ptype.lower():
+            return dict(LACOSTE_SNEAKERS_CHARACTERISTICS)
+        return dict(LACOSTE_CHARACTERISTICS)
+    return {
+        "Matière": material,
+        "Qualité": "Norme européenne",
+        "Garantie": "2 ans constructeur"
+    }
+
+
+def sheet_slug(brand, word, sku):
+    """Slug « marque-mot-sku » ; la partie marque-mot est mémorisée"""
+    head, tail = product_slug(brand, word), slugify(sku)
+    return f"{head}-{tail}" if head and tail else head or tail
+
+
+def generate_prestashop_sheet(product, product_data):
+    """Génère une fiche PrestaShop complète"""
+
+    # Variations selon le produit
+    variations = []
+    if product_data.get("sizes") and product_data.get("colors"):
+        for color in product_data["colors"][:MAX_COLORS]:
+            for size in product_data["sizes"][:MAX_SIZES]:
+                variations.append({
+                    "size": size,
+                    "color": color,
+                    "stock": 20 if size in STOCK_SIZES else 15,
+                    "ean": f"{product['ean'][:-2]}{len(variations):02d}"
+                })
+    else:
+        variations = [
+            {"option": "Standard", "stock": 25, "ean": product["ean"]},
+            {"option": "Premium", "stock": 15, "ean": f"{product['ean'][:-1]}9"}
+        ]
+
+    characteristics = characteristics_for(product["brand"], product["type"], product.get("material", "Standard"))
+
+    # SEO optimisé
+    brand = product["brand"]
+    word = product["name"].split()[0] if product["name"] else "Produit"
+    seo_title = SEO_TITLE.render(brand=brand, word=word, type=product["type"])
+    seo_description = SEO_DESCRIPTION.render(name=product["name"], brand=brand, price=product["price"],
+                                             description=product["description"])
+    url_slug = sheet_slug(brand, word, product["sku"])
+
+    return {
+        "id": str(uuid.uuid4()),
+        "product_id": product["id"],
+        "category": product["category"],
+        "weight": 0.8 if "sneakers" in product["type"].lower() else 0.3,
+        "variations": variations,
+        "characteristics": characteristics,
+        "seo_title": seo_title,
+        "seo_description": seo_description,
+        "url_slug": url_slug,
+        "visibility": "both",
+        "available_for_order": True,
+        "condition": "new",
+        "created_at": datetime.now().isoformat()
+    }
+
+
+def import_columns(columns):
+    """Colonnes complètes d'un import : mêmes longueurs, valeurs par défaut, SKU déduit de l'EAN.
+
+    ValueError si une colonne obligatoire manque ou si les longueurs diffèrent."""
+    missing = [name for name in IMPORT_REQUIRED if not columns.get(name)]
+    if missing:
+        raise ValueError(f"Colonnes obligatoires manquantes: {', '.join(missing)}")
+    count = len(columns["ean"])
+    if count > MAX_IMPORT_ROWS:
+        raise ValueError(f"Import trop volumineux - {MAX_IMPORT_ROWS} produits maximum")
+    uneven = [name for name, values in columns.items() if values is not None and len(values) != count]
+    if uneven:
+        raise ValueError(f"Colonnes de longueur différente de ean ({count}): {', '.join(uneven)}")
+
+    cols = {name: values for name, values in columns.items() if values is not None}
+    for name, default in IMPORT_DEFAULTS.items():
+        cols.setdefault(name, [default] * count)
+    cols.setdefault("sku", [f"SKU{ean[:8]}" for ean in cols["ean"]])
+    cols.setdefault("sizes", [None] * count)
+    cols.setdefault("colors", [None] * count)
+    return cols
+
+
+def import_products(cols):
+    """Produits d'un import en colonnes ; renseigne la colonne id"""
+    created_at = datetime.now().isoformat()
+    cols["id"] = [str(uuid.uuid4()) for _ in cols["ean"]]
+    return [
+        {
+            "id": product_id,
+            "ean": ean,
+            "sku": sku,
+            "name": name,
+            "brand": brand,
+            "type": ptype,
+            "price": price,
+            "original_price": None,
+            "description": description,
+            "image": image,
+            "category": category,
+            "material": material,
+            "search_type": "IMPORT",
+            "search_term": ean,
+            "created_at": created_at
+        }
+        for product_id, ean, sku, name, brand, ptype, price, description, image, category, material in zip(
+            cols["id"], cols["ean"], cols["sku"], cols["name"], cols["brand"], cols["type"], cols["price"],
+            cols["description"], cols["image"], cols["category"], cols["material"])
+    ]
+
+
+def seo_columns(cols):
+    """Titres, méta-descriptions, slugs, prix TTC et poids de tout le lot"""
+    brands, names, types, prices = cols["brand"], cols["name"], cols["type"], cols["price"]
+    first_words = [name.split(None, 1)[0] if name else "Produit" for name in names]
+    return {
+        "seo_title": SEO_TITLE.column(brand=brands, word=first_words, type=types),
+        "seo_description": SEO_DESCRIPTION.column(name=names, brand=brands, price=prices,
+                                                  description=cols["description"]),
+        "url_slug": [sheet_slug(brand, word, sku) for brand, word, sku in zip(brands, first_words, cols["sku"])],
+        "price_ttc": [ttc_price(price) for price in prices],
+        "weight": [0.8 if "sneakers" in ptype.lower() else 0.3 for ptype in types],
+    }
+
+
+def _variation_column(eans, sizes_column, colors_column):
+    """Déclinaisons de chaque produit ; le modèle (taille, couleur, stock, suffixe EAN)
+    est calculé une fois par combinaison de tailles et couleurs"""
+    templates = {}
+    column = []
+    for ean, sizes, colors in zip(eans, sizes_column, colors_column):
+        if sizes and colors:
+            key = (tuple(colors[:MAX_COLORS]), tuple(sizes[:MAX_SIZES]))
+            template = templates.get(key)
+            if template is None:
+                pairs = [(size, color) for color in key[0] for size in key[1]]
+                template = templates[key] = [(size, color, 20 if size in STOCK_SIZES else 15, f"{i:02d}")
+                                             for i, (size, color) in enumerate(pairs)]
+            prefix = ean[:-2]
+            column.append([{"size": size, "color": color, "stock": stock, "ean": prefix + suffix}
+                           for size, color, stock, suffix in template])
+        else:
+            column.append([
+                {"option": "Standard", "stock": 25, "ean": ean},
+                {"option": "Premium", "stock": 15, "ean": ean[:-1] + "9"}
+            ])
+    return column
+
+
+def _characteristics_column(brands, types, materials):
+    """Caractéristiques de chaque produit, construites une fois par (marque, type, matière)"""
+    templates = {}
+    column = []
+    for key in zip(brands, types, materials):
+        template = templates.get(key)
+        if template is None:
+            template = templates[key] = characteristics_for(*key)
+        column.append(dict(template))
+    return column
+
+
+def prestashop_sheets(cols):
+    """Fiches PrestaShop d'un lot en colonnes (id, ean, sku, name, brand, type, price,
+    description, category, material, sizes, colors), dans l'ordre des lignes"""
+    seo = seo_columns(cols)
+    variations = _variation_column(cols["ean"], cols["sizes"], cols["colors"])
+    characteristics = _characteristics_column(cols["brand"], cols["type"], cols["material"])
+    created_at = datetime.now().isoformat()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "product_id": product_id,
+            "category": category,
+            "weight": weight,
+            "variations": product_variations,
+            "characteristics": product_characteristics,
+            "seo_title": seo_title,
+            "seo_description": seo_description,
+            "url_slug": url_slug,
+            "visibility": "both",
+            "available_for_order": True,
+            "condition": "new",
+            "created_at": created_at
+        }
+        for product_id, category, weight, product_variations, product_characteristics, seo_title, seo_description, url_slug
+        in zip(cols["id"], cols["category"], seo["weight"], variations, characteristics,
+               seo["seo_title"], seo["seo_description"], seo["url_slug"])
+    ]
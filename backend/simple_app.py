@@ -1,86 +1,126 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 from typing import Optional
 import json
 import uuid
 from datetime import datetime
-import requests
+import os
 import re
-from bs4 import BeautifulSoup
+import httpx
+from pathlib import Path
+
+try:
+    from .batch import normalize_code
+    from .classifier import classify
+    from .html_results import aextract_results
+    from .lookup_cache import MISS, open_lookup_cache
+    from .resolver import ResolverStats, resolve_first
+    from .seo import SeoTemplate, product_slug
+    from .singleflight import SingleFlight
+    from .static_page import StaticPage
+except ImportError:
+    from batch import normalize_code
+    from classifier import classify
+    from html_results import aextract_results
+    from lookup_cache import MISS, open_lookup_cache
+    from resolver import ResolverStats, resolve_first
+    from seo import SeoTemplate, product_slug
+    from singleflight import SingleFlight
+    from static_page import StaticPage
 
 app = FastAPI()
 
+# Cache persistant des recherches (LRU mémoire + SQLite)
+lookup_cache = open_lookup_cache(Path(__file__).parent / "lookup_cache.sqlite3")
+
+# Une seule recherche web en vol par code, les requêtes concurrentes attendent son résultat
+lookup_flight = SingleFlight("lookup")
+
+# Sources issues d'une vraie recherche ; les autres sont des déductions de repli
+WEB_SOURCES = ("web_search", "ean_database")
+
+# Recherche multi-sources : échéance globale et seuil de confiance pour s'arrêter
+RESOLVE_DEADLINE = float(os.environ.get("RESOLVE_DEADLINE", 8.0))
+if RESOLVE_DEADLINE <= 0:
+    raise ValueError(f"RESOLVE_DEADLINE doit être positive (reçu {RESOLVE_DEADLINE})")
+SOURCE_TIMEOUT = float(os.environ.get("RESOLVE_SOURCE_TIMEOUT", 6.0))
+CONFIDENCE_THRESHOLD = 70
+resolver_stats = ResolverStats()
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+_http_client = None
+
+def get_http_client():
+    """Client HTTP partagé (pool de connexions keep-alive)"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(headers=HEADERS, timeout=SOURCE_TIMEOUT, follow_redirects=True)
+    return _http_client
+
+async def cached_product_search(ean_sku):
+    """Recherche produit avec cache et fusion des recherches concurrentes"""
+    return await lookup_flight.do(normalize_code(ean_sku), _cached_product_search, ean_sku)
+
+async def _cached_product_search(ean_sku):
+    """Recherche produit avec cache (les échecs sont mis en cache plus brièvement)"""
+    cached = lookup_cache.get("extract", ean_sku)
+    if cached is None:
+        return fallback_unknown_product(ean_sku)
+    if cached is not MISS:
+        return cached
+    
+    product_info = await real_product_search(ean_sku)
+    lookup_cache.set("extract", ean_sku, product_info if product_info["source"] in WEB_SOURCES else None)
+    return product_info
+
 async def real_product_search(ean_sku):
-    """Vraie recherche de produit sur le web"""
-    try:
-        # Recherche sur plusieurs sources
-        search_queries = [
-            f"{ean_sku} prix acheter",
-            f"{ean_sku} product specifications",
-            f'"{ean_sku}" lacoste nike adidas',
-        ]
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        for query in search_queries:
-            try:
-                # Recherche via DuckDuckGo (plus permissive)
-                search_url = f"https://html.duckduckgo.com/html/?q={query}"
-                response = requests.get(search_url, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    # Parser les résultats de recherche
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    results = soup.find_all('a', class_='result__a')
-                    
-                    for result in results[:5]:  # Top 5 résultats
-                        title = result.get_text().strip()
-                        url = result.get('href', '')
-                        
-                        # Analyser le titre pour extraire des infos
-                        product_info = extract_product_info(title, ean_sku)
-                        if product_info['confidence'] > 70:
-                            return product_info
-                
-                break  # Si on trouve quelque chose, on s'arrête
-                
-            except Exception as e:
-                print(f"Erreur recherche {query}: {e}")
-                continue
-        
-        # Si aucune recherche web ne fonctionne, essayer une base de données EAN
-        return await fallback_ean_lookup(ean_sku)
-        
-    except Exception as e:
-        print(f"Erreur recherche globale: {e}")
+    """Vraie recherche de produit sur le web
+
+    Les requêtes DuckDuckGo et la base UPCitemdb sont lancées en parallèle ;
+    le premier résultat assez fiable gagne et les recherches restantes sont annulées.
+    """
+    search_queries = [
+        f"{ean_sku} prix acheter",
+        f"{ean_sku} product specifications",
+        f'"{ean_sku}" lacoste nike adidas',
+    ]
+    sources = [(f"duckduckgo:{i}", duckduckgo_lookup(query, ean_sku)) for i, query in enumerate(search_queries)]
+    sources.append(("upcitemdb", upcitemdb_lookup(ean_sku)))
+    
+    product_info, winner, timings = await resolve_first(sources, RESOLVE_DEADLINE, CONFIDENCE_THRESHOLD)
+    resolver_stats.record(winner, timings)
+    print(f"Résolution {ean_sku}: {winner or 'aucune source'} {timings}")
+    
+    if product_info is None:
         return fallback_unknown_product(ean_sku)
+    return product_info
+
+async def duckduckgo_lookup(query, ean_sku):
+    """Recherche via DuckDuckGo (plus permissive), premier titre assez fiable"""
+    async with get_http_client().stream("GET", "https://html.duckduckgo.com/html/", params={"q": query}) as response:
+        if response.status_code != 200:
+            return None
+        # Top 5 résultats, lus au fil du flux (le reste de la page n'est pas téléchargé)
+        results = await aextract_results(response.aiter_text(), limit=5)
+    
+    for result in results:
+        # Analyser le titre pour extraire des infos
+        product_info = extract_product_info(result["title"], ean_sku)
+        if product_info['confidence'] > CONFIDENCE_THRESHOLD:
+            return product_info
+    return None
 
 def extract_product_info(title, ean_sku):
     """Extraire les infos produit depuis le titre"""
     title_lower = title.lower()
     
-    # Détecter la marque
-    brand = "Marque Inconnue"
-    brands = ['lacoste', 'nike', 'adidas', 'puma', 'new balance', 'vans', 'converse']
-    for b in brands:
-        if b in title_lower:
-            brand = b.title()
-            break
-    
-    # Détecter le type de produit
-    product_type = "Produit"
-    types = {
-        'sneakers': 'Sneakers', 'shoes': 'Chaussures', 'polo': 'Polo', 
-        'shirt': 'Chemise', 't-shirt': 'T-shirt', 'jacket': 'Veste',
-        'pants': 'Pantalon', 'shorts': 'Short'
-    }
-    for keyword, ptype in types.items():
-        if keyword in title_lower:
-            product_type = ptype
-            break
+    # Détecter la marque et le type de produit (un seul parcours du titre)
+    detected = classify(title)
+    brand = detected["brand"] or "Marque Inconnue"
+    product_type = detected["type"] or "Produit"
     
     # Extraire le prix si visible
     price_match = re.search(r'[\$€£](\d+(?:[.,]\d{2})?)', title)
@@ -105,28 +145,24 @@ def extract_product_info(title, ean_sku):
         "source": "web_search"
     }
 
-async def fallback_ean_lookup(ean_sku):
-    """Recherche EAN dans une base de données publique"""
-    try:
-        # Essayer l'API UPCitemdb (gratuite)
-        response = requests.get(f"https://api.upcitemdb.com/prod/trial/lookup?upc={ean_sku}", timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('items'):
-                item = data['items'][0]
-                return {
-                    "name": item.get('title', f'Produit {ean_sku[:8]}'),
-                    "brand": item.get('brand', 'Marque Inconnue'),
-                    "price": 59.99,  # Prix par défaut
-                    "type": "Produit",
-                    "description": item.get('description', f'Produit trouvé dans la base EAN'),
-                    "confidence": 85,
-                    "source": "ean_database"
-                }
-    except:
-        pass
-    
-    return fallback_unknown_product(ean_sku)
+async def upcitemdb_lookup(ean_sku):
+    """Recherche EAN dans une base de données publique (API UPCitemdb, gratuite)"""
+    response = await get_http_client().get("https://api.upcitemdb.com/prod/trial/lookup", params={"upc": ean_sku})
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if not data.get('items'):
+        return None
+    item = data['items'][0]
+    return {
+        "name": item.get('title', f'Produit {ean_sku[:8]}'),
+        "brand": item.get('brand', 'Marque Inconnue'),
+        "price": 59.99,  # Prix par défaut
+        "type": "Produit",
+        "description": item.get('description', f'Produit trouvé dans la base EAN'),
+        "confidence": 85,
+        "source": "ean_database"
+    }
 
 def fallback_unknown_product(ean_sku):
     """Produit de fallback quand rien n'est trouvé"""
@@ -170,8 +206,6 @@ import json
 import uuid
 import re
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
 import asyncio
 
 app = FastAPI()
@@ -180,9 +214,8 @@ class SearchRequest(BaseModel):
     ean: Optional[str] = None
     sku: Optional[str] = None
 
-@app.get("/", response_class=HTMLResponse)
-def main():
-    return """
+# Page construite et compressée une seule fois, au chargement du module
+APP_PAGE = StaticPage("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -384,7 +417,11 @@ def main():
     </script>
 </body>
 </html>
-    """
+""")
+
+@app.get("/", response_class=HTMLResponse)
+def main(request: Request):
+    return APP_PAGE.response(request)
 
 @app.post("/api/search")
 async def search_product(request: SearchRequest):
@@ -396,8 +433,8 @@ async def search_product(request: SearchRequest):
     
     print(f"🔍 VRAIE RECHERCHE: {search_type} = {search_term}")
     
-    # VRAIE RECHERCHE WEB
-    product_info = await real_product_search(search_term)
+    # VRAIE RECHERCHE WEB (ou cache)
+    product_info = await cached_product_search(search_term)
     
     print(f"✅ Trouvé: {product_info['name']} - {product_info['brand']} - Confiance: {product_info['confidence']}%")
     
@@ -425,25 +462,24 @@ async def search_product(request: SearchRequest):
         "sheet": sheet
     }
 
+# Gabarits SEO : titre 60 caractères, méta-description 160, version courte si besoin
+SEO_TITLE = SeoTemplate("{brand} {name:.30} - Prix {price}€", 60,
+                        fallback=SeoTemplate("{brand} {name:.20} - {price}€", 60))
+SEO_DESCRIPTION = SeoTemplate(
+    "Achetez {name} {brand} au meilleur prix {price}€. Livraison gratuite dès 50€. Retour 30 jours. Authentique garanti.", 160,
+    fallback=SeoTemplate("{brand} {name:.40} - {price}€. Livraison gratuite. Retour 30j. Authentique.", 160)
+)
+SEO_KEYWORDS = SeoTemplate("{brand}, {type}, {name:.20}, pas cher, authentique, livraison gratuite")
+
 def generate_real_seo_sheet(product, product_info):
     """Générer une vraie fiche SEO optimisée"""
     brand = product['brand']
     name = product['name']
     price = product['price']
     
-    # SEO Title optimisé (max 60 chars)
-    seo_title = f"{brand} {name[:30]} - Prix {price}€"
-    if len(seo_title) > 60:
-        seo_title = f"{brand} {name[:20]} - {price}€"
-    
-    # Meta Description optimisée (max 160 chars)  
-    seo_description = f"Achetez {name} {brand} au meilleur prix {price}€. Livraison gratuite dès 50€. Retour 30 jours. Authentique garanti."
-    if len(seo_description) > 160:
-        seo_description = f"{brand} {name[:40]} - {price}€. Livraison gratuite. Retour 30j. Authentique."
-    
-    # URL SEO friendly
-    url_slug = f"{brand.lower()}-{name[:25].lower()}".replace(" ", "-").replace("'", "")
-    url_slug = re.sub(r'[^a-z0-9-]', '', url_slug)
+    seo_title = SEO_TITLE.render(brand=brand, name=name, price=price)
+    seo_description = SEO_DESCRIPTION.render(brand=brand, name=name, price=price)
+    url_slug = product_slug(brand, name, 25)
     
     # Variations selon le produit
     if "sneakers" in product_info["type"].lower() or "chaussures" in product_info["type"].lower():
@@ -509,7 +545,7 @@ def generate_real_seo_sheet(product, product_info):
         "weight": weight,
         "characteristics": characteristics,
         "variations": variations,
-        "keywords": f"{brand}, {product_info['type']}, {name[:20]}, pas cher, authentique, livraison gratuite",
+        "keywords": SEO_KEYWORDS.render(brand=brand, type=product_info["type"], name=name),
         "h1_title": f"{brand} {name}",
         "meta_robots": "index, follow",
         "canonical_url": f"https://monsite.com/produit/{url_slug}",
@@ -527,6 +563,21 @@ def generate_real_seo_sheet(product, product_info):
         }
     }
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    """Statistiques du cache de recherche et des recherches fusionnées"""
+    return {**lookup_cache.stats(), "single_flight": lookup_flight.stats()}
+
+@app.get("/api/resolver/stats")
+def resolver_stats_endpoint():
+    """Source gagnante et durées par source de la recherche multi-sources"""
+    return resolver_stats.stats()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    if _http_client is not None:
+        await _http_client.aclose()
+
 @app.get("/api/export/{product_id}")
 def export_csv(product_id: str):
     csv_content = f"""ID;Nom;Prix;Référence;Description
@@ -0,0 +1,88 @@
+"""Page d'interface servie comme un fichier statique précompressé.
+
+Le HTML est encodé une seule fois, au chargement du module : versions
+brute, gzip et brotli (si le module `brotli` est installé), chacune avec
+son ETag fort. Une requête GET / se réduit alors à choisir la variante
+selon Accept-Encoding, ou à répondre 304 si le navigateur a déjà la bonne
+version. La feuille de style éventuelle est intégrée dans la page pour
+éviter un aller-retour (et la dépendance à un CDN).
+"""
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent / "static"
+UI_CACHE_MAX_AGE = int(os.environ.get("UI_CACHE_MAX_AGE", 86400))
+
+
+def accepted_encodings(header):
+    """Encodages acceptés par le client (q > 0), d'après l'en-tête Accept-Encoding"""
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticPage:
+    """HTML figé au démarrage, servi brut ou précompressé avec ETag et Cache-Control"""
+
+    def __init__(self, html, stylesheet=None, max_age=UI_CACHE_MAX_AGE):
+        if stylesheet:
+            css = (STATIC_DIR / stylesheet).read_text(encoding="utf-8")
+            html = html.replace("</head>", f"<style>{css}</style>\n</head>", 1)
+        body = html.strip().encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        # Encodages par ordre de préférence ; chaque variante a son propre ETag fort
+        self.variants = {}
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(body, quality=11)
+        self.variants["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        self.variants["identity"] = body
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.variants
+        }
+        self.cache_control = f"public, max-age={max_age}"
+
+    def select(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in self.variants:
+            if encoding == "identity" or encoding in accepted or "*" in accepted:
+                return encoding
+        return "identity"
+
+    def response(self, request: Request) -> Response:
+        encoding = self.select(request.headers.get("accept-encoding"))
+        headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding"
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        # Comparaison faible (RFC 9110) : un relais peut avoir préfixé l'ETag par W/
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if self.etags[encoding] in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], media_type="text/html", headers=headers)
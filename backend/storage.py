@@ -0,0 +1,486 @@
+"""Stockage des produits en journal JSON-lines (append-only).
+
+Chaque écriture ajoute une ligne au journal au lieu de réécrire tout le
+fichier. Un index id → offset est reconstruit au démarrage, les lignes
+obsolètes sont éliminées par compaction périodique et un verrou fichier
+sérialise les écritures entre workers. Les entrées vivantes sont gardées
+dans un ProductIndex pour que les lectures ne relisent pas le fichier.
+"""
+import base64
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou limité au processus
+    fcntl = None
+
+
+def item_key(item):
+    """Identifiant d'une entrée, format {product, sheet} ou ancien format plat"""
+    if isinstance(item, dict):
+        if isinstance(item.get("product"), dict) and item["product"].get("id"):
+            return item["product"]["id"]
+        if item.get("id"):
+            return item["id"]
+    return None
+
+
+class _Ordered:
+    """Clés triées par position dans le journal : appartenance en O(1),
+    reprise après une position (pagination par curseur) en O(log n)"""
+
+    __slots__ = ("_positions", "_keys", "_members")
+
+    def __init__(self):
+        self._positions = []  # positions croissantes
+        self._keys = []  # clé à la même place que sa position
+        self._members = {}  # clé -> position
+
+    def add(self, key, position):
+        if self._positions and position >= self._positions[-1]:
+            index = len(self._positions)  # cas courant : ajout en fin de journal
+        else:
+            index = bisect_right(self._positions, position)
+        self._positions.insert(index, position)
+        self._keys.insert(index, key)
+        self._members[key] = position
+
+    def discard(self, key):
+        position = self._members.pop(key, None)
+        if position is None:
+            return
+        index = bisect_left(self._positions, position)
+        while self._keys[index] != key:
+            index += 1  # positions égales (entrées ajoutées sans position)
+        del self._positions[index]
+        del self._keys[index]
+
+    def after(self, position):
+        """(position, clé) des entrées situées après `position` (toutes si None)"""
+        start = 0 if position is None else bisect_right(self._positions, position)
+        # Indices plutôt que tranches : une page ne copie pas la fin de la liste
+        for index in range(start, len(self._keys)):
+            yield self._positions[index], self._keys[index]
+
+    def __contains__(self, key):
+        return key in self._members
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class ProductIndex:
+    """Index en mémoire des entrées : id produit, id fiche, EAN et SKU"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._items = {}  # id produit -> entrée
+        self._order = _Ordered()  # id produit par position dans le journal (ordre des pages)
+        self._sheet_views = {}  # id produit -> fiche enrichie pour /api/sheets
+        self._by_sheet = {}  # id fiche -> id produit
+        self._by_ean = {}  # EAN -> _Ordered des id produit
+        self._by_sku = {}  # SKU -> _Ordered des id produit
+        self._by_brand = {}  # marque (minuscules) -> _Ordered des id produit
+        self._by_type = {}  # type (minuscules) -> _Ordered des id produit
+
+    @staticmethod
+    def _product(item):
+        return item["product"] if "product" in item else item
+
+    def _codes(self, product):
+        """(index, valeur) pour chaque index secondaire"""
+        return (
+            (self._by_ean, product.get("ean")),
+            (self._by_sku, product.get("sku")),
+            (self._by_brand, (product.get("brand") or "").lower()),
+            (self._by_type, (product.get("type") or "").lower()),
+        )
+
+    def add(self, key, item, position=0):
+        self.remove(key)
+        self._items[key] = item
+        self._order.add(key, position)
+        product = self._product(item)
+        # Les sous-index restent dans l'ordre du journal
+        for codes, code in self._codes(product):
+            if code:
+                bucket = codes.get(code)
+                if bucket is None:
+                    bucket = codes[code] = _Ordered()
+                bucket.add(key, position)
+        sheet = item.get("sheet")
+        if "product" in item and isinstance(sheet, dict):
+            if sheet.get("id"):
+                self._by_sheet[sheet["id"]] = key
+            view = dict(sheet)
+            view.update({
+                "title": f"{product['brand']} {product['name']}",
+                "ean": product["ean"],
+                "description": product["description"]
+            })
+            self._sheet_views[key] = view
+
+    def remove(self, key):
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        self._order.discard(key)
+        product = self._product(item)
+        for codes, code in self._codes(product):
+            keys = codes.get(code)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del codes[code]
+        sheet = item.get("sheet")
+        if isinstance(sheet, dict) and self._by_sheet.get(sheet.get("id")) == key:
+            del self._by_sheet[sheet["id"]]
+        self._sheet_views.pop(key, None)
+
+    def get(self, key):
+        return self._items.get(key)
+
+    def get_by_sheet(self, sheet_id):
+        key = self._by_sheet.get(sheet_id)
+        return self._items.get(key) if key is not None else None
+
+    def find(self, ean=None, sku=None):
+        """Entrées correspondant à un EAN et/ou un SKU"""
+        keys = None
+        for codes, code in ((self._by_ean, ean), (self._by_sku, sku)):
+            if code is None:
+                continue
+            found = codes.get(code)
+            if found is None:
+                return []
+            keys = list(found) if keys is None else [k for k in keys if k in found]
+        if keys is None:
+            return self.items()
+        return [self._items[k] for k in keys]
+
+    def page(self, view="products", ean=None, sku=None, brand=None, ptype=None,
+             date_from=None, date_to=None, after=None, limit=None):
+        """Page de produits ou de fiches filtrés, dans l'ordre du journal.
+
+        `after` est la position de la dernière entrée de la page précédente ;
+        retourne (entrées, position de la dernière entrée ou None si c'est la fin).
+        """
+        filters = [
+            (self._by_ean, ean), (self._by_sku, sku),
+            (self._by_brand, brand.lower() if brand else None),
+            (self._by_type, ptype.lower() if ptype else None),
+        ]
+        sets = [codes.get(code) for codes, code in filters if code]
+        if None in sets:
+            return [], None  # valeur de filtre sans aucune entrée
+        # Parcours du plus petit sous-index à partir du curseur, les autres servent de filtre
+        sets.sort(key=len)
+        keys = sets[0] if sets else self._order
+        others = sets[1:]
+
+        entries = []
+        last = None
+        for position, key in keys.after(after):
+            if any(key not in other for other in others):
+                continue
+            item = self._items[key]
+            if date_from or date_to:
+                # Comparaison de chaînes ISO ; date_to inclut toute la journée
+                created_at = self._product(item).get("created_at") or ""
+                if date_from and created_at < date_from:
+                    continue
+                if date_to and created_at[:len(date_to)] > date_to:
+                    continue
+            if view == "sheets":
+                if key not in self._sheet_views:
+                    continue
+                entry = self._sheet_views[key]
+            else:
+                entry = self._product(item)
+            if limit is not None and len(entries) == limit:
+                return entries, last
+            entries.append(entry)
+            last = position
+        return entries, None
+
+    def items(self):
+        return list(self._items.values())
+
+    def products(self):
+        return [self._product(item) for item in self._items.values()]
+
+    def sheets(self):
+        return list(self._sheet_views.values())
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ProductStore:
+    """Journal append-only avec index en mémoire"""
+
+    def __init__(self, log_path, legacy_path=None, compact_min_stale=500, compact_ratio=0.5):
+        self.log_path = Path(log_path)
+        self.lock_path = self.log_path.with_name(self.log_path.name + ".lock")
+        self.compact_min_stale = compact_min_stale
+        self.compact_ratio = compact_ratio
+
+        self._mutex = threading.RLock()
+        self._offsets = {}  # id -> offset de la ligne vivante
+        self._end = 0  # fin de la dernière ligne complète lue
+        self._inode = None
+        self._stale = 0  # lignes remplacées ou supprimées
+        self.index = ProductIndex()
+
+        if legacy_path is not None:
+            self._migrate(Path(legacy_path))
+        with self._locked(exclusive=False):
+            self._refresh()
+
+    # ----- verrouillage -----
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        with self._mutex:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ----- index -----
+
+    def _reset(self):
+        self._offsets = {}
+        self._end = 0
+        self._stale = 0
+        self.index.clear()
+
+    def _refresh(self):
+        """Rattrape les lignes ajoutées par d'autres workers depuis la dernière lecture"""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            self._reset()
+            self._inode = None
+            return
+
+        # Fichier remplacé (compaction) ou tronqué : reconstruction complète
+        if stat.st_ino != self._inode or stat.st_size < self._end:
+            self._reset()
+            self._inode = stat.st_ino
+        if stat.st_size == self._end:
+            return
+
+        with open(self.log_path, "rb") as f:
+            f.seek(self._end)
+            offset = self._end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # ligne incomplète (écriture interrompue)
+                self._index_line(line, offset)
+                offset += len(line)
+            self._end = offset
+
+    def _index_line(self, line, offset):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            print(f"⚠️ Ligne illisible ignorée dans {self.log_path.name} à l'offset {offset}")
+            self._stale += 1
+            return
+        key = record.get("id")
+        if self._offsets.pop(key, None) is not None:
+            self._stale += 1  # ancienne version remplacée
+            self.index.remove(key)
+        if record.get("deleted"):
+            self._stale += 1  # la ligne de suppression elle-même
+        else:
+            self._offsets[key] = offset
+            self.index.add(key, record["item"], offset)
+
+    # ----- écriture -----
+
+    def _write(self, records):
+        lines = [json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records]
+        with open(self.log_path, "ab") as f:
+            # Supprimer une éventuelle ligne incomplète laissée par un crash
+            if f.tell() > self._end:
+                f.truncate(self._end)
+                f.seek(self._end)
+            offset = f.tell()
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._inode is None:
+            self._inode = os.stat(self.log_path).st_ino
+        for line in lines:
+            self._index_line(line, offset)
+            offset += len(line)
+        self._end = offset
+
+    def append(self, item):
+        """Ajoute (ou remplace) une entrée"""
+        self.append_many([item])
+
+    def append_many(self, items):
+        """Ajoute plusieurs entrées en une seule écriture"""
+        records = []
+        for item in items:
+            records.append({"id": item_key(item) or str(uuid.uuid4()), "item": item})
+        if not records:
+            return
+        with self._locked():
+            self._refresh()
+            self._write(records)
+            self._maybe_compact()
+
+    def delete(self, key):
+        """Supprime une entrée, retourne False si elle n'existe pas"""
+        with self._locked():
+            self._refresh()
+            if key not in self._offsets:
+                return False
+            self._write([{"id": key, "deleted": True}])
+            self._maybe_compact()
+            return True
+
+    # ----- compaction -----
+
+    def _maybe_compact(self):
+        live = len(self._offsets)
+        if self._stale >= self.compact_min_stale and self._stale >= self.compact_ratio * (live + self._stale):
+            self._compact()
+
+    def compact(self):
+        """Réécrit le journal avec uniquement les entrées vivantes"""
+        with self._locked():
+            self._refresh()
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self.log_path.with_name(self.log_path.name + ".tmp")
+        with open(self.log_path, "rb") as src, open(tmp_path, "wb") as dst:
+            for key, offset in self._offsets.items():
+                src.seek(offset)
+                dst.write(src.readline())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.log_path)
+        self._inode = None
+        self._refresh()
+
+    # ----- lecture -----
+
+    # Les entrées retournées sont partagées avec l'index : ne pas les modifier
+
+    def get(self, key):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self.index.get(key)
+
+    def get_by_sheet(self, sheet_id):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self.index.get_by_sheet(sheet_id)
+
+    def find(self, ean=None, sku=None):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self.index.find(ean=ean, sku=sku)
+
+    def items(self):
+        """Entrées vivantes dans l'ordre du journal"""
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self.index.items()
+
+    def products(self):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self.index.products()
+
+    @property
+    def version(self):
+        """Identifie l'état du journal (change à chaque écriture ou compaction)"""
+        with self._locked(exclusive=False):
+            self._refresh()
+            return f"{self._inode or 0:x}-{self._end:x}"
+
+    def page(self, view="products", cursor=None, limit=None, **filters):
+        """Page de ProductIndex.page avec un curseur opaque.
+
+        Le curseur porte l'offset de la dernière entrée et l'inode du journal :
+        il devient invalide après une compaction (ValueError).
+        """
+        with self._locked(exclusive=False):
+            self._refresh()
+            after = None
+            if cursor:
+                try:
+                    inode, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+                    inode, after = int(inode, 16), int(offset, 16)
+                except ValueError:
+                    raise ValueError("Curseur invalide")
+                if inode != (self._inode or 0):
+                    raise ValueError("Curseur expiré - recommencer depuis la première page")
+            entries, last = self.index.page(view, after=after, limit=limit, **filters)
+            next_cursor = None
+            if last is not None:
+                next_cursor = base64.urlsafe_b64encode(f"{self._inode or 0:x}:{last:x}".encode()).decode()
+            return entries, next_cursor
+
+    def sheets(self):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self.index.sheets()
+
+    def __contains__(self, key):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return key in self._offsets
+
+    def __len__(self):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return len(self._offsets)
+
+    # ----- migration -----
+
+    def _migrate(self, legacy_path):
+        """Import unique de l'ancien products.json (laissé intact)"""
+        if self.log_path.exists() or not legacy_path.exists():
+            return
+        with self._locked():
+            if self.log_path.exists():
+                return
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                legacy = json.load(f)
+            records = [
+                {"id": item_key(item) or str(uuid.uuid4()), "item": item}
+                for item in legacy
+                if isinstance(item, dict)
+            ]
+            tmp_path = self.log_path.with_name(self.log_path.name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.log_path)
+            print(f"📦 Migration de {len(records)} entrées depuis {legacy_path.name}")
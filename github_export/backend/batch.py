@@ -0,0 +1,85 @@
+"""Traitement par lots de codes EAN/SKU.
+
+Les codes sont normalisés et dédoublonnés, puis traités en parallèle avec
+une limite de concurrence ; les résultats sont produits au fil de l'eau.
+"""
+import asyncio
+import csv
+import io
+import re
+
+MAX_BATCH_SIZE = 5000
+MAX_CONCURRENCY = 50
+
+HEADER_WORDS = ("ean", "sku", "code", "reference", "référence")
+
+
+def normalize_code(code):
+    """Normalise un code EAN/SKU (espaces, casse, UPC-A 12 chiffres → EAN-13)"""
+    code = re.sub(r"\s+", "", str(code)).upper()
+    if code.isdigit() and len(code) == 12:
+        code = "0" + code
+    return code
+
+
+def is_ean(code):
+    return len(code) == 13 and code.isdigit()
+
+
+def dedupe_codes(codes):
+    """Retourne les codes uniques (ordre conservé) et le nombre de doublons"""
+    unique = {}
+    total = 0
+    for code in codes:
+        code = normalize_code(code)
+        if code:
+            total += 1
+            unique[code] = None
+    return list(unique), total - len(unique)
+
+
+def parse_codes_csv(text):
+    """Extrait les codes de la première colonne non vide d'un CSV (en-tête optionnel)"""
+    first_line = text.split("\n", 1)[0]
+    delimiter = ";" if ";" in first_line else ","
+    codes = []
+    for row in csv.reader(io.StringIO(text), delimiter=delimiter):
+        cell = next((c.strip() for c in row if c.strip()), None)
+        if cell is None:
+            continue
+        if not codes and cell.lower().strip('"') in HEADER_WORDS:
+            continue  # ligne d'en-tête
+        codes.append(cell)
+    return codes
+
+
+def clamp_concurrency(concurrency):
+    return max(1, min(int(concurrency), MAX_CONCURRENCY))
+
+
+async def run_batch(codes, worker, concurrency=10):
+    """Exécute `await worker(code)` pour chaque code, au plus `concurrency` à la fois.
+
+    Produit des tuples (code, résultat, erreur) dans l'ordre de terminaison.
+    Les tâches restantes sont annulées si le consommateur s'arrête.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(code):
+        async with semaphore:
+            try:
+                return code, await worker(code), None
+            except Exception as e:
+                return code, None, e
+
+    tasks = [asyncio.create_task(run(code)) for code in codes]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def error_message(error):
+    return getattr(error, "detail", None) or str(error) or error.__class__.__name__
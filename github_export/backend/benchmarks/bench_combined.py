@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark hors ligne : produit + fiche en deux appels LLM ou en un seul.
+
+Lance N générations (backend factice, sans réseau ni cache LLM) pour chacun
+des deux chemins et compare la latence de bout en bout p50/p99, le nombre
+d'appels et les tokens consommés :
+
+- deux appels : AIService.generate_product_info puis generate_product_sheet
+  (le second prompt renvoie la description et les caractéristiques) ;
+- un appel : AIService.generate_product_with_sheet (LLM_COMBINED=on).
+
+La latence simulée d'un appel vaut --latency plus --token-latency par
+token de sortie, comme pour un modèle qui génère token par token.
+
+Usage : python benchmarks/bench_combined.py [--items 100] [--latency 0.4] [--token-latency 0.01] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100, help="générations par chemin")
+    parser.add_argument("--latency", type=float, default=0.4, help="latence fixe d'un appel LLM (s)")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="latence par token de sortie (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM_MAX_CONCURRENCY")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "benchmark")
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_CACHE"] = "off"
+
+    import server
+    from llm import FakeLLMBackend, LLMClient
+
+    extracted = {
+        "titles": ["Nike Air Max 97 Noir - Chaussures homme", "Air Max 97 'Black' - Sneakers"],
+        "descriptions": ["Découvrez la Nike Air Max 97 noire, amorti Air visible sur toute la longueur."],
+        "brands": ["Nike"],
+        "urls": ["https://www.nike.com/fr/t/air-max-97"],
+        "potential_category": "Chaussures"
+    }
+
+    async def two_calls(ean_code):
+        info = await server.AIService.generate_product_info(ean_code, {}, extracted)
+        product = server.Product(ean_code=ean_code, **info)
+        await server.AIService.generate_product_sheet(product)
+
+    async def one_call(ean_code):
+        await server.AIService.generate_product_with_sheet(ean_code, {}, extracted)
+
+    async def run(pipeline):
+        server.llm_client = LLMClient(
+            FakeLLMBackend(latency=args.latency, jitter=args.latency / 4, token_latency=args.token_latency),
+            args.concurrency
+        )
+        latencies = []
+
+        async def timed(code):
+            start = time.perf_counter()
+            await pipeline(code)
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(f"{3614270000000 + i}") for i in range(args.items)))
+        return sorted(latencies), time.perf_counter() - start, server.llm_client.stats()
+
+    print(f"{args.items} générations, latence {args.latency * 1000:.0f} ms + {args.token_latency * 1000:.0f} ms/token, "
+          f"concurrence {args.concurrency}")
+    print(f"{'Chemin':<12} {'p50 (ms)':>9} {'p99 (ms)':>9} {'total (s)':>10} {'appels':>7} {'tokens entrée':>14} {'tokens sortie':>14}")
+    for name, pipeline in (("deux appels", two_calls), ("un appel", one_call)):
+        latencies, wall, stats = asyncio.run(run(pipeline))
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{name:<12} {statistics.median(latencies) * 1000:>9.0f} {p99 * 1000:>9.0f} {wall:>10.2f} "
+              f"{stats['calls']:>7} {stats['prompt_tokens']:>14} {stats['completion_tokens']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark de GoogleSearchService.search_by_ean : avant / après.
+
+Un faux Google Custom Search local répond avec une latence fixe. On lance
+N recherches EAN concurrentes sur une même boucle asyncio et on mesure la
+latence p50/p99 de chaque recherche :
+
+- avant : ancienne implémentation (requests.get bloquant, 3 requêtes en
+  série séparées par asyncio.sleep(0.1)) ;
+- après : client httpx partagé, 3 requêtes en parallèle, limite par hôte.
+
+Usage : python benchmarks/bench_google_search.py [--searches 20] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def start_fake_google(latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = json.dumps({"items": [
+                {"title": f"Résultat {i}", "snippet": "Nike Air Max", "link": f"https://example.com/{i}"}
+                for i in range(5)
+            ]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/customsearch/v1"
+
+
+async def legacy_search_by_ean(url, ean_code):
+    """Ancienne implémentation (bloquante) de search_by_ean"""
+    queries = [
+        f"{ean_code} produit caractéristiques prix",
+        f"{ean_code} marque modèle couleur",
+        f"EAN {ean_code} specifications"
+    ]
+    all_results = []
+    for query in queries:
+        response = requests.get(url, params={'key': 'k', 'cx': 'cx', 'q': query, 'num': 5}, timeout=10)
+        response.raise_for_status()
+        all_results.extend(response.json().get('items', []))
+        await asyncio.sleep(0.1)
+    return {"items": all_results[:10]}
+
+
+async def measure(search, searches):
+    latencies = []
+
+    async def one(i):
+        start = time.perf_counter()
+        await search(f"36142703{i:05d}")
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(searches)))
+    return latencies, time.perf_counter() - start
+
+
+def report(label, latencies, wall):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<8} p50={p50 * 1000:8.1f} ms  p99={p99 * 1000:8.1f} ms  total={wall:6.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, default=20, help="recherches concurrentes")
+    parser.add_argument("--latency", type=float, default=0.05, help="latence simulée par requête (s)")
+    args = parser.parse_args()
+
+    fake, url = start_fake_google(args.latency)
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "benchmark")
+    os.environ["GOOGLE_SEARCH_API_KEY"] = "benchmark"
+    os.environ["GOOGLE_SEARCH_CX"] = "benchmark"
+    os.environ["GOOGLE_SEARCH_URL"] = url
+
+    import server
+    from http_client import close_http_client
+
+    async def run():
+        before = await measure(lambda ean: legacy_search_by_ean(url, ean), args.searches)
+        after = await measure(server.GoogleSearchService.search_by_ean, args.searches)
+        await close_http_client()
+        return before, after
+
+    print(f"{args.searches} recherches concurrentes, latence simulée {args.latency * 1000:.0f} ms/requête")
+    before, after = asyncio.run(run())
+    report("avant", *before)
+    report("après", *after)
+    fake.shutdown()
+
+
+if __name__ == "__main__":
+    main()
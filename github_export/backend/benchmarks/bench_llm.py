@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Test de charge hors ligne de la couche LLM (backend factice).
+
+Lance N pipelines AIService (produit puis fiche) en parallèle, avec une
+part de codes EAN dupliqués, et mesure le débit, la latence p50/p99, les
+appels fusionnés et le retard maximal de la boucle d'événements (preuve
+qu'elle n'est plus bloquée pendant les appels LLM).
+
+Usage : python benchmarks/bench_llm.py [--items 200] [--unique 150] [--latency 0.5] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+async def loop_lag_monitor(stop, interval=0.01):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200, help="pipelines lancés")
+    parser.add_argument("--unique", type=int, default=150, help="codes EAN distincts")
+    parser.add_argument("--latency", type=float, default=0.5, help="latence simulée d'un appel LLM (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM_MAX_CONCURRENCY")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "benchmark")
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_FAKE_LATENCY"] = str(args.latency)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+
+    import server
+
+    async def pipeline(ean_code):
+        search_results = await server.GoogleSearchService.search_by_ean(ean_code)
+        extracted = server.GoogleSearchService.extract_product_info(search_results)
+        info = await server.AIService.generate_product_info(ean_code, search_results, extracted)
+        product = server.Product(ean_code=ean_code, **info)
+        await server.AIService.generate_product_sheet(product)
+
+    async def run():
+        codes = [f"{3614270000000 + i % args.unique}" for i in range(args.items)]
+        latencies = []
+
+        async def timed(code):
+            start = time.perf_counter()
+            await pipeline(code)
+            latencies.append(time.perf_counter() - start)
+
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(loop_lag_monitor(stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(code) for code in codes))
+        wall = time.perf_counter() - start
+        stop.set()
+        return latencies, wall, await monitor
+
+    latencies, wall, lag = asyncio.run(run())
+    latencies.sort()
+    stats = server.llm_client.stats()
+    print(f"{args.items} pipelines ({args.unique} EAN distincts), latence LLM {args.latency * 1000:.0f} ms, concurrence {args.concurrency}")
+    print(f"débit      {args.items / wall:8.1f} pipelines/s  (total {wall:.2f} s)")
+    print(f"latence    p50={statistics.median(latencies) * 1000:.0f} ms  p99={latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:.0f} ms")
+    print(f"appels LLM {stats['calls']} exécutés, {stats['coalesced']} fusionnés, tokens {stats['prompt_tokens']} + {stats['completion_tokens']}")
+    print(f"boucle     retard max {lag * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Benchmark de la sérialisation JSON et de la compression d'une liste de fiches.
+
+Construit --items fiches (variantes, caractéristiques, description HTML,
+export_data) et compare, pour une route `response_model=List[ProductSheet]`
+servie par TestClient :
+
+- JSONResponse : classe par défaut de FastAPI avant FastJSONResponse ;
+- json / orjson : FastJSONResponse avec chacun des sérialiseurs installés.
+
+Pour chacune : temps de rendu seul (objets déjà encodés → octets), temps de
+la requête complète (validation, encodage, rendu, ASGI), puis octets
+transmis sans compression et avec CompressionMiddleware.
+
+Usage : python benchmarks/bench_serialization.py [--items 1000] [--runs 20]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def build_sheets(server, count):
+    sizes = ["38", "39", "40", "41", "42", "43", "44", "45"]
+    sheets = []
+    for i in range(count):
+        reference = f"DMS-{i:05d}"
+        description = (f"<h2>Nike Air Max 97 {i}</h2><p>Amorti Air visible sur toute la longueur, "
+                       f"tige en mesh et cuir synthétique, semelle en caoutchouc.</p>"
+                       f"<ul><li>Coloris : Noir/Blanc</li><li>Référence : {reference}</li></ul>")
+        sheets.append(server.ProductSheet(
+            product_id=f"product-{i}",
+            title=f"Nike Air Max 97 Noir {i}",
+            reference=reference,
+            color_code="BLK",
+            price_ttc=179.99,
+            description=description,
+            characteristics={"Marque": "Nike", "Modèle": "Air Max 97", "Couleur": "Noir/Blanc",
+                             "Matière": "Mesh et cuir synthétique", "Semelle": "Caoutchouc"},
+            variants=[{"size": size, "color": "Noir", "reference": f"{reference}-{size}", "ean": f"36142700{i:05d}"}
+                      for size in sizes],
+            weight_info={"baskets": 1.0},
+            seo_title=f"Nike Air Max 97 Noir {i} | DM'Sports",
+            seo_description="Nike Air Max 97 noire, amorti Air visible, livraison rapide.",
+            export_data={"prestashop_format": {"name": f"Nike Air Max 97 Noir {i}", "reference": reference,
+                                               "price": 179.99, "description": description,
+                                               "meta_title": f"Nike Air Max 97 Noir {i}"}}
+        ))
+    return sheets
+
+
+def median_time(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000, help="fiches dans la liste")
+    parser.add_argument("--runs", type=int, default=20, help="répétitions par mesure (médiane)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("DB_NAME", "benchmark")
+    os.environ["LLM_CACHE"] = "off"
+
+    from typing import List
+    from fastapi import FastAPI
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+
+    import responses
+    import server
+    from responses import SERIALIZERS, CompressionMiddleware, FastJSONResponse
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    sheets = build_sheets(server, args.items)
+    encoded = jsonable_encoder(sheets)
+
+    def make_app(response_class, compress):
+        app = FastAPI(default_response_class=response_class)
+
+        @app.get("/sheets", response_model=List[server.ProductSheet])
+        def list_sheets():
+            return sheets
+
+        if compress:
+            app.add_middleware(CompressionMiddleware)
+        return TestClient(app)
+
+    candidates = [("JSONResponse", JSONResponse, None)]
+    candidates += [(name, FastJSONResponse, name) for name in SERIALIZERS]
+
+    print(f"{args.items} fiches, médiane sur {args.runs} exécutions, gzip niveau {responses.GZIP_LEVEL}")
+    print(f"{'Classe':<14} {'rendu (ms)':>11} {'requête (ms)':>13} {'brut (Ko)':>10} {'gzip (Ko)':>10} {'requête gzip (ms)':>18}")
+    for name, response_class, serializer in candidates:
+        if serializer:
+            responses.JSON_SERIALIZER = serializer
+        render = median_time(lambda: response_class(encoded), args.runs)
+        plain, gzipped = make_app(response_class, False), make_app(response_class, True)
+        request = median_time(lambda: plain.get("/sheets", headers={"Accept-Encoding": "identity"}), args.runs)
+        request_gzip = median_time(lambda: gzipped.get("/sheets", headers={"Accept-Encoding": "gzip"}), args.runs)
+        raw = plain.get("/sheets", headers={"Accept-Encoding": "identity"})
+        wire = gzipped.get("/sheets", headers={"Accept-Encoding": "gzip"})
+        assert raw.json() == encoded and wire.headers.get("content-encoding") == "gzip"
+        print(f"{name:<14} {render * 1000:>11.1f} {request * 1000:>13.1f} {len(raw.content) / 1024:>10.0f} "
+              f"{int(wire.headers['content-length']) / 1024:>10.0f} {request_gzip * 1000:>18.1f}")
+    if "orjson" not in SERIALIZERS:
+        print("\norjson non installé : seul le sérialiseur json est comparé (pip install orjson)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Vérifie que chaque requête chaude est servie par un index.
+
+Crée les index de l'application dans une base MongoDB locale, insère un
+petit jeu de données puis lance explain() sur les requêtes de HOT_QUERIES.
+Code de sortie 1 si une requête passe par un COLLSCAN ou un tri en mémoire.
+
+Usage : python benchmarks/check_query_plans.py [--mongo-url mongodb://localhost:27017] [--db query_plan_check] [--keep]
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from indexes import check_query_plans, ensure_indexes  # noqa: E402
+
+
+async def seed(db, count=200):
+    """Jeu de données minimal pour que le planificateur ait des choix à faire"""
+    now = datetime.utcnow()
+    categories = ["Chaussures", "Vêtements", "Accessoires", "Maroquinerie"]
+    statuses = ["draft", "published", "exported"]
+    job_statuses = ["queued", "running", "done", "failed"]
+    products, sheets, searches, jobs = [], [], [], []
+    for i in range(count):
+        product_id = "test-product-1" if i == 0 else str(uuid.uuid4())
+        ean = f"{1234567890123 + i:013d}"
+        created_at = now - timedelta(minutes=i)
+        products.append({"id": product_id, "ean_code": ean, "category": categories[i % 4], "created_at": created_at})
+        sheets.append({
+            "id": "test-sheet-1" if i == 0 else str(uuid.uuid4()),
+            "product_id": product_id,
+            "status": statuses[i % 3],
+            "created_at": created_at
+        })
+        searches.append({"id": str(uuid.uuid4()), "ean_code": ean, "created_at": created_at})
+        jobs.append({
+            "id": "test-job-1" if i == 0 else str(uuid.uuid4()),
+            "status": job_statuses[i % 4],
+            "created_at": created_at
+        })
+    await db.products.insert_many(products)
+    await db.product_sheets.insert_many(sheets)
+    await db.product_searches.insert_many(searches)
+    await db.jobs.insert_many(jobs)
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.mongo_url, serverSelectionTimeoutMS=3000)
+    db = client[args.db]
+    try:
+        await client.drop_database(args.db)
+        created = await ensure_indexes(db)
+        await seed(db)
+        report = await check_query_plans(db)
+    finally:
+        if not args.keep:
+            await client.drop_database(args.db)
+        client.close()
+
+    print(f"Index créés : {', '.join(created)}\n")
+    print(f"{'Endpoint':<26} {'Collection':<17} {'Index':<22} Résultat")
+    failures = 0
+    for row in report:
+        ok = not row["collscan"] and not row["in_memory_sort"]
+        failures += not ok
+        verdict = "OK" if ok else ("COLLSCAN" if row["collscan"] else "TRI EN MÉMOIRE")
+        print(f"{row['endpoint']:<26} {row['collection']:<17} {','.join(row['indexes']) or '-':<22} {verdict}")
+    print(f"\n{len(report) - failures}/{len(report)} requêtes servies par un index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="query_plan_check")
+    parser.add_argument("--keep", action="store_true", help="ne pas supprimer la base de test")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,80 @@
+"""Client HTTP asynchrone partagé.
+
+Un seul httpx.AsyncClient (pool de connexions, keep-alive) pour toute
+l'application, avec une limitation de débit par hôte pour respecter les
+quotas des API externes sans bloquer la boucle d'événements.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', '10'))
+HTTP_MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', '50'))
+HTTP_MAX_KEEPALIVE = int(os.environ.get('HTTP_MAX_KEEPALIVE', '20'))
+
+# Limites par hôte : requêtes simultanées et intervalle minimal entre deux départs
+HOST_MAX_CONCURRENT = int(os.environ.get('HOST_MAX_CONCURRENT', '10'))
+HOST_MIN_INTERVAL = float(os.environ.get('HOST_MIN_INTERVAL', '0.01'))
+
+
+class HostRateLimiter:
+    """Limite la concurrence et espace les requêtes pour chaque hôte"""
+
+    def __init__(self, max_concurrent: int = HOST_MAX_CONCURRENT, min_interval: float = HOST_MIN_INTERVAL):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._semaphores = {}
+        self._locks = {}
+        self._next_slot = {}
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_concurrent))
+        async with semaphore:
+            lock = self._locks.setdefault(host, asyncio.Lock())
+            async with lock:
+                wait = self._next_slot.get(host, 0.0) - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_slot[host] = time.monotonic() + self.min_interval
+            yield
+
+
+rate_limiter = HostRateLimiter()
+
+_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Client partagé, créé à la première utilisation"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE
+            ),
+            follow_redirects=True
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def get_json(url: str, params: dict = None, timeout: float = None) -> dict:
+    """GET limité par hôte, lève httpx.HTTPError en cas d'échec"""
+    async with rate_limiter.limit(url):
+        response = await get_http_client().get(url, params=params, timeout=timeout or HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,100 @@
+"""Index MongoDB des collections de l'application.
+
+Les index sont créés au démarrage (create_indexes est idempotent) plutôt
+que laissés à init-mongo.js, qui ne tourne qu'à la création du volume.
+Les noms par défaut (champ_1) évitent les doublons avec ceux du script.
+HOT_QUERIES décrit les requêtes des endpoints chauds ; check_query_plans()
+vérifie via explain() que chacune est servie par un index (pas de COLLSCAN).
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from pagination import KEYSET_SORT
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "products": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("ean_code", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "product_sheets": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("product_id", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "product_searches": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("ean_code", ASCENDING)]),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+}
+
+# (endpoint, collection, filtre, tri) des requêtes chaudes
+HOT_QUERIES = [
+    ("GET /products", "products", {}, KEYSET_SORT),
+    ("GET /products?category=", "products", {"category": "Chaussures"}, KEYSET_SORT),
+    ("GET /products/{id}", "products", {"id": "test-product-1"}, None),
+    ("DELETE /products/{id}", "product_sheets", {"product_id": "test-product-1"}, None),
+    ("GET /sheets", "product_sheets", {}, KEYSET_SORT),
+    ("GET /sheets?status=", "product_sheets", {"status": "draft"}, KEYSET_SORT),
+    ("GET /sheets/{id}/export", "product_sheets", {"id": "test-sheet-1"}, None),
+    ("POST /search/ean", "product_searches", {"ean_code": "1234567890123"}, None),
+    ("GET /jobs/{id}", "jobs", {"id": "test-job-1"}, None),
+    ("reprise des tâches", "jobs",
+     {"$or": [{"status": "queued"}, {"status": "running", "lease_until": {"$lt": datetime(2000, 1, 1)}}]},
+     [("created_at", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db) -> List[str]:
+    """Crée les index manquants ; un conflit avec un index existant est signalé sans bloquer"""
+    created = []
+    for collection, models in INDEXES.items():
+        for model in models:
+            try:
+                created += await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                logger.warning(f"Index {collection}.{model.document['name']} non créé: {e}")
+    return created
+
+
+def _plan_stages(plan):
+    """Stages d'un plan d'exécution (parcours récursif des inputStage)"""
+    yield plan
+    for key in ("inputStage", "innerStage", "outerStage"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def check_query_plans(db, limit: int = 50) -> List[Dict]:
+    """explain() de chaque requête chaude : index utilisé et présence d'un COLLSCAN"""
+    report = []
+    for endpoint, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query).limit(limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        # MongoDB 7+ (moteur SBE) imbrique le plan sous "queryPlan"
+        stages = list(_plan_stages(winning_plan.get("queryPlan", winning_plan)))
+        report.append({
+            "endpoint": endpoint,
+            "collection": collection,
+            "indexes": [stage["indexName"] for stage in stages if "indexName" in stage],
+            "collscan": any(stage.get("stage") == "COLLSCAN" for stage in stages),
+            "in_memory_sort": any(stage.get("stage") == "SORT" for stage in stages),
+        })
+    return report
@@ -0,0 +1,240 @@
+"""File de tâches en processus, persistée dans MongoDB.
+
+submit() enregistre la tâche (collection `jobs`) et rend la main aussitôt ;
+`concurrency` workers asyncio l'exécutent ensuite en publiant l'avancement
+étape par étape dans le document. Pas de Redis : tout tient dans le
+processus de l'API et sa base MongoDB.
+
+Plusieurs processus (uvicorn --workers) partagent la collection : une tâche
+est réservée par une mise à jour atomique (find_one_and_update) qui pose
+son propriétaire et un bail (`lease_until`), prolongé tant que la tâche
+tourne. Une tâche « running » dont le bail a expiré (processus arrêté
+brutalement) est reprise par n'importe quel processus.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", 60))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+PENDING, SKIPPED = "pending", "skipped"
+
+
+class JobContext:
+    """Accès de l'exécutant à sa tâche : étapes et avancement"""
+
+    def __init__(self, queue: "JobQueue", job: Dict):
+        self.queue = queue
+        self.job = job
+
+    @property
+    def payload(self) -> Dict:
+        return self.job["payload"]
+
+    def stage_done(self, stage: str) -> bool:
+        """Étape déjà terminée lors d'une exécution précédente (reprise)"""
+        return self.job["stages"].get(stage) == DONE
+
+    async def stage(self, stage: str, status: str = RUNNING, **fields):
+        """Publie l'état d'une étape ; `fields` est enregistré dans la même écriture"""
+        self.job["stages"][stage] = status
+        self.job.update(fields)
+        stages = self.job["stages"]
+        finished = sum(1 for value in stages.values() if value in (DONE, SKIPPED))
+        self.job["progress"] = round(100 * finished / len(stages))
+        await self.queue._update(self.job["id"], {
+            f"stages.{stage}": status,
+            "progress": self.job["progress"],
+            **fields
+        }, owner=self.job["owner"])
+
+
+class JobQueue:
+    """Tâches persistées, exécutées par un pool de workers asyncio"""
+
+    def __init__(self, collection, handler: Callable[[JobContext], Awaitable[Any]],
+                 stages: List[str], concurrency: int = JOB_WORKERS, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 lease_seconds: float = JOB_LEASE_SECONDS):
+        self.collection = collection
+        self.handler = handler
+        self.stages = stages
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.lease = timedelta(seconds=lease_seconds)
+        # Propriétaire des baux : un par processus (et par file)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued = set()  # ids en file locale, pour ne pas les empiler deux fois
+        self._workers: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.resumed = 0
+
+    async def start(self):
+        """Lance les workers, remet en file les tâches non terminées et surveille les baux expirés"""
+        self._queue = asyncio.Queue()
+        resumed = await self._requeue()
+        if resumed:
+            logger.info(f"Tâches reprises après redémarrage: {resumed}")
+        self._workers = [asyncio.ensure_future(self._worker(i)) for i in range(self.concurrency)]
+        self._workers.append(asyncio.ensure_future(self._watch_leases()))
+
+    async def stop(self):
+        """Arrête les workers ; les tâches en cours sont rendues à la file pour un autre processus"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._queued:
+            self._queued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _requeue(self) -> int:
+        """Met en file locale les tâches en attente et celles dont le bail a expiré.
+
+        Tous les processus voient les mêmes tâches : seule la réservation atomique
+        de _claim décide lequel les exécute."""
+        pending = self.collection.find({"$or": [
+            {"status": QUEUED},
+            {"status": RUNNING, "lease_until": {"$lt": datetime.utcnow()}},
+        ]}).sort("created_at", 1)
+        count = 0
+        async for job in pending:
+            self._enqueue(job["id"])
+            count += 1
+        return count
+
+    async def _watch_leases(self):
+        """Reprend périodiquement les tâches abandonnées par un processus arrêté"""
+        while True:
+            await asyncio.sleep(self.lease.total_seconds())
+            try:
+                self.resumed += await self._requeue()
+            except Exception as e:
+                logger.warning(f"Reprise des tâches expirées impossible: {e}")
+
+    async def submit(self, payload: Dict, stages: Optional[Dict[str, str]] = None) -> Dict:
+        """Enregistre une tâche et la met en file ; retourne le document créé"""
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": QUEUED,
+            "payload": payload,
+            "stages": {stage: PENDING for stage in self.stages},
+            "progress": 0,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        job["stages"].update(stages or {})
+        await self.collection.insert_one(dict(job))
+        if self._queue is not None:
+            self._enqueue(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.collection.find_one({"id": job_id}, projection={"_id": 0})
+
+    async def _update(self, job_id: str, fields: Dict, owner: Optional[str] = None) -> bool:
+        """Écrit des champs ; avec `owner`, seulement si la tâche est encore réservée par lui"""
+        fields["updated_at"] = datetime.utcnow()
+        query = {"id": job_id} if owner is None else {"id": job_id, "owner": owner, "status": RUNNING}
+        result = await self.collection.update_one(query, {"$set": fields})
+        return result.matched_count > 0
+
+    async def _claim(self, job_id: str) -> Optional[Dict]:
+        """Réserve la tâche de façon atomique : en attente, ou en cours avec un bail expiré"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"id": job_id, "$or": [
+                {"status": QUEUED},
+                {"status": RUNNING, "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": RUNNING, "owner": self.owner, "lease_until": now + self.lease,
+                      "started_at": now, "updated_at": now},
+             "$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _heartbeat(self, job_id: str):
+        """Prolonge le bail tant que la tâche tourne"""
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            try:
+                renewed = await self._update(job_id, {"lease_until": datetime.utcnow() + self.lease},
+                                             owner=self.owner)
+            except Exception as e:
+                logger.warning(f"Bail de la tâche {job_id} non prolongé: {e}")
+                continue
+            if not renewed:
+                logger.warning(f"Tâche {job_id}: bail perdu, reprise par un autre processus")
+                return
+
+    async def _worker(self, number: int):
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Worker {number}: tâche {job_id} non exécutée: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await self._claim(job_id)
+        if job is None:
+            return  # terminée, ou réservée par un autre processus
+        if job["attempts"] > self.max_attempts:
+            self.failed += 1
+            await self._update(job_id, {"status": FAILED, "error": "Nombre maximal de tentatives atteint",
+                                        "finished_at": datetime.utcnow()}, owner=self.owner)
+            return
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+        try:
+            result = await self.handler(JobContext(self, job))
+        except asyncio.CancelledError:
+            # Arrêt : la tâche est rendue à la file sans compter cette tentative
+            await self.collection.update_one(
+                {"id": job_id, "owner": self.owner, "status": RUNNING},
+                {"$set": {"status": QUEUED, "lease_until": None, "updated_at": datetime.utcnow()},
+                 "$inc": {"attempts": -1}}
+            )
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Tâche {job_id} en échec: {e}")
+            await self._update(job_id, {"status": FAILED, "error": str(e), "finished_at": datetime.utcnow()},
+                               owner=self.owner)
+            return
+        finally:
+            heartbeat.cancel()
+        self.completed += 1
+        await self._update(job_id, {"status": DONE, "result": result, "progress": 100,
+                                    "finished_at": datetime.utcnow()}, owner=self.owner)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.concurrency if self._workers else 0,
+            "owner": self.owner,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "resumed": self.resumed
+        }
@@ -0,0 +1,269 @@
+"""Couche d'accès asynchrone au LLM.
+
+Les appels passent par AsyncOpenAI (plus de blocage de la boucle
+d'événements), sous un sémaphore qui borne le nombre d'appels simultanés.
+Les requêtes identiques en vol sont fusionnées en un seul appel et chaque
+appel est mesuré (tokens, latence). Un backend factice permet des tests de
+charge hors ligne (LLM_BACKEND=fake). Les réponses JSON sont extraites,
+réparées et validées par llm_output.py, puis peuvent être servies par un
+cache disque (llm_cache.py) ; le backend replay ne sert que ce cache, pour
+rejouer tout le pipeline hors ligne sans appel payant.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import deque
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+from llm_cache import MISS, ResponseCache
+from llm_output import OutputError, OutputStats, conform, conform_sections, extract_json
+from singleflight import SingleFlight
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+class OpenAIBackend:
+    """Backend OpenAI réel (client asynchrone)"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=api_key)
+
+    async def complete(self, model: str, prompt: str, temperature: float, max_tokens: int, kind: str) -> Tuple[str, Dict]:
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        usage = response.usage
+        return response.choices[0].message.content, {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+            "completion_tokens": getattr(usage, "completion_tokens", 0)
+        }
+
+
+class FakeLLMBackend:
+    """Backend local : latence simulée et réponses JSON valides, sans réseau"""
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.8, jitter: float = 0.3, token_latency: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        # Temps de génération par token de sortie (0 : latence fixe par appel)
+        self.token_latency = token_latency
+
+    async def complete(self, model: str, prompt: str, temperature: float, max_tokens: int, kind: str) -> Tuple[str, Dict]:
+        seed = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        if kind == "combined":
+            product = self._payload("product", seed)
+            sheet = self._payload("sheet", seed)
+            del sheet["characteristics"], sheet["export_data"]
+            payload = {"product": product, "sheet": sheet}
+        else:
+            payload = self._payload(kind, seed)
+        content = json.dumps(payload, ensure_ascii=False)
+        completion_tokens = len(content) // 4
+        delay = self.latency + random.uniform(-self.jitter, self.jitter) + completion_tokens * self.token_latency
+        await asyncio.sleep(max(0.0, delay))
+        return content, {"prompt_tokens": len(prompt) // 4, "completion_tokens": completion_tokens}
+
+    @staticmethod
+    def _payload(kind: str, seed: int) -> Dict:
+        if kind == "sheet":
+            payload = {
+                "title": f"Produit {seed % 10000}",
+                "reference": f"REF-{seed % 100000000:08d}",
+                "color_code": "NOI",
+                "price_ttc": 99.99,
+                "description": "<h3>Produit</h3><p>Description générée hors ligne.</p>",
+                "characteristics": {"marque": "Nike", "couleur": "Noir"},
+                "seo_title": f"Produit {seed % 10000} | DM'Sports",
+                "seo_description": "Description SEO générée hors ligne.",
+                "export_data": {"prestashop_format": {"name": f"Produit {seed % 10000}"}}
+            }
+        else:
+            payload = {
+                "title": f"Chaussures Nike Modèle {seed % 10000} - Noir",
+                "brand": "Nike",
+                "model": f"Modèle {seed % 10000}",
+                "color": "Noir",
+                "category": "Chaussures",
+                "price": 99.99,
+                "description": "Description générée hors ligne pour les tests de charge.",
+                "characteristics": {"marque": "Nike", "couleur": "Noir"},
+                "sizes": ["40", "41", "42", "43"],
+                "weight_by_type": {"baskets": 1.0}
+            }
+        return payload
+
+
+class LLMCacheMiss(Exception):
+    """Réponse absente du cache en mode replay"""
+
+
+class ReplayBackend:
+    """Backend hors ligne : seules les réponses déjà en cache sont servies"""
+
+    name = "replay"
+
+    async def complete(self, model: str, prompt: str, temperature: float, max_tokens: int, kind: str) -> Tuple[str, Dict]:
+        raise LLMCacheMiss(f"Réponse {kind} absente du cache LLM (mode replay)")
+
+
+class LLMClient:
+    """Appels LLM bornés, fusionnés et mesurés"""
+
+    def __init__(self, backend, max_concurrency: int = 4, recent_calls: int = 100,
+                 cache: Optional[ResponseCache] = None):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.output = OutputStats()
+        self._semaphore = None
+        self._flight = SingleFlight("llm")
+        self._recent = deque(maxlen=recent_calls)
+        self._totals = {
+            "calls": 0,
+            "errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_seconds": 0.0
+        }
+
+    @staticmethod
+    def request_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        raw = json.dumps([model, prompt, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def complete(
+        self,
+        prompt: str,
+        *,
+        kind: str,
+        temperature: float,
+        max_tokens: int,
+        model: str = DEFAULT_MODEL,
+        key: Optional[str] = None
+    ) -> str:
+        """Retourne le texte de la réponse ; `key` identifie les requêtes à fusionner"""
+        key = key or self.request_key(model, prompt, temperature, max_tokens)
+        return await self._flight.do(key, self._call, prompt, kind, temperature, max_tokens, model)
+
+    async def complete_json(
+        self,
+        prompt: str,
+        *,
+        kind: str,
+        temperature: float,
+        max_tokens: int,
+        model: str = DEFAULT_MODEL,
+        key: Optional[str] = None,
+        schema: Union[Type[BaseModel], Dict[str, Type[BaseModel]], None] = None,
+        fixed: Optional[Dict] = None
+    ) -> Any:
+        """Retourne la réponse décodée en JSON, servie par le cache si le même prompt a déjà été payé.
+
+        Avec `schema`, la réponse est conformée au modèle (voir llm_output.conform) ;
+        `fixed` porte les champs que l'appelant renseigne lui-même. Un dictionnaire
+        section → modèle (et section → champs fixés) valide une réponse composée."""
+        request_key = self.request_key(model, prompt, temperature, max_tokens)
+        return await self._flight.do(key or request_key, self._cached_call,
+                                     request_key, prompt, kind, temperature, max_tokens, model, schema, fixed)
+
+    async def _cached_call(self, request_key: str, prompt: str, kind: str, temperature: float,
+                           max_tokens: int, model: str,
+                           schema: Union[Type[BaseModel], Dict[str, Type[BaseModel]], None],
+                           fixed: Optional[Dict]) -> Any:
+        if self.cache is not None:
+            cached = self.cache.get(request_key)
+            if cached is not MISS:
+                return cached
+        content = await self._call(prompt, kind, temperature, max_tokens, model)
+        try:
+            data, repairs = extract_json(content)
+            if isinstance(schema, dict):
+                data, schema_repairs = conform_sections(data, schema, fixed)
+                repairs += schema_repairs
+            elif schema is not None:
+                data, schema_repairs = conform(data, schema, fixed)
+                repairs += schema_repairs
+        except OutputError:
+            self.output.failed += 1
+            raise
+        self.output.record(repairs)
+        if self.cache is not None:
+            self.cache.set(request_key, kind, data)
+        return data
+
+    async def _call(self, prompt: str, kind: str, temperature: float, max_tokens: int, model: str) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                content, usage = await self.backend.complete(model, prompt, temperature, max_tokens, kind)
+            except Exception:
+                self._totals["errors"] += 1
+                raise
+            latency = time.perf_counter() - start
+
+        self._totals["calls"] += 1
+        self._totals["prompt_tokens"] += usage.get("prompt_tokens") or 0
+        self._totals["completion_tokens"] += usage.get("completion_tokens") or 0
+        self._totals["latency_seconds"] += latency
+        self._recent.append({
+            "kind": kind,
+            "model": model,
+            "latency_ms": round(latency * 1000, 1),
+            "prompt_tokens": usage.get("prompt_tokens") or 0,
+            "completion_tokens": usage.get("completion_tokens") or 0
+        })
+        return content
+
+    def stats(self) -> Dict:
+        calls = self._totals["calls"]
+        latencies = sorted(call["latency_ms"] for call in self._recent)
+        return {
+            "backend": self.backend.name,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._flight.in_flight,
+            "calls": calls,
+            "coalesced": self._flight.coalesced,
+            "errors": self._totals["errors"],
+            "prompt_tokens": self._totals["prompt_tokens"],
+            "completion_tokens": self._totals["completion_tokens"],
+            "avg_latency_ms": round(self._totals["latency_seconds"] * 1000 / calls, 1) if calls else 0.0,
+            "p50_latency_ms": latencies[len(latencies) // 2] if latencies else 0.0,
+            "p99_latency_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0,
+            "recent_calls": list(self._recent)[-10:],
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "output": self.output.stats()
+        }
+
+
+def create_llm_client(
+    backend: str,
+    api_key: Optional[str],
+    max_concurrency: int = 4,
+    fake_latency: float = 0.8,
+    cache: Optional[ResponseCache] = None
+) -> Optional[LLMClient]:
+    """Client selon LLM_BACKEND ; None si OpenAI n'est pas configuré (mode simulation).
+
+    Le backend factice ne passe pas par le cache : ses réponses ne coûtent rien
+    et les tests de charge doivent mesurer de vrais appels."""
+    if backend == "fake":
+        return LLMClient(FakeLLMBackend(latency=fake_latency, jitter=fake_latency / 3), max_concurrency)
+    if backend == "replay":
+        return LLMClient(ReplayBackend(), max_concurrency, cache=cache or ResponseCache())
+    if api_key and api_key != 'your_openai_key_here':
+        return LLMClient(OpenAIBackend(api_key), max_concurrency, cache=cache)
+    return None
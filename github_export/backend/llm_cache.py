@@ -0,0 +1,108 @@
+"""Cache disque des réponses LLM.
+
+La clé est l'empreinte SHA-256 du modèle, du prompt et des paramètres
+(LLMClient.request_key) : un même prompt n'est payé qu'une fois, quel que
+soit l'EAN ou le produit qui l'a produit. La valeur stockée est la réponse
+déjà décodée en JSON. Les entrées vivent dans une base SQLite dont la
+taille est bornée (LLM_CACHE_MAX_MB) : au-delà, les entrées les moins
+récemment servies sont évincées.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", str(Path(__file__).parent / "llm_cache.sqlite3"))
+LLM_CACHE_MAX_BYTES = int(float(os.environ.get("LLM_CACHE_MAX_MB", 200)) * 1024 * 1024)
+
+MISS = object()  # absent du cache
+
+
+class ResponseCache:
+    """Réponses JSON indexées par empreinte de requête, éviction LRU à taille bornée"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        # Utilisé depuis la boucle d'événements, les threads de travail et l'arrêt
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses "
+            "(key TEXT PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used)")
+        self.bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return MISS
+            self.hits += 1
+            self._db.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key: str, kind: str, value: Any):
+        raw = json.dumps(value, ensure_ascii=False)
+        size = len(raw.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, kind, value, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, raw, size, now, now)
+            )
+            self.bytes += size - (previous[0] if previous else 0)
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Supprime les entrées les moins récemment servies jusqu'à 90 % de la taille maximale
+        (appelé verrou tenu)"""
+        target = self.max_bytes * 0.9
+        rows = self._db.execute("SELECT key, size FROM llm_responses ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.bytes <= target:
+                break
+            evicted.append((key,))
+            self.bytes -= size
+        self._db.executemany("DELETE FROM llm_responses WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+        logger.info(f"Cache LLM: {len(evicted)} réponses évincées")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "entries": len(self),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,243 @@
+"""Extraction et validation des réponses JSON du LLM.
+
+Chemin rapide : la réponse est du JSON valide et json.loads suffit. Sinon,
+le premier objet équilibré est extrait du texte (bloc ```json, phrase
+d'introduction, commentaire final) et les défauts courants sont réparés
+sans nouvel appel : virgules finales, retours à la ligne bruts dans les
+chaînes, littéraux Python, réponse tronquée par max_tokens. L'objet est
+ensuite conformé au modèle Pydantic attendu (Product, ProductSheet) : les
+champs gérés par l'application sont écartés et, si la validation échoue,
+les types courants (prix « 179,99 € », tailles en chaîne...) sont
+convertis avant une seconde validation.
+"""
+import ast
+import json
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Type, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+# Champs toujours fixés par l'application, jamais par le LLM
+MANAGED_FIELDS = {"id", "created_at", "updated_at"}
+
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_NUMBER = re.compile(r"-?\d+(?:[.,]\d+)?")
+
+
+class OutputError(ValueError):
+    """Réponse inexploitable même après réparation"""
+
+
+def _balanced_object(text: str, start: int) -> str:
+    """Du premier « { » à l'accolade qui le ferme (ou jusqu'à la fin si la réponse est tronquée)"""
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _repair(text: str, repairs: List[str]) -> str:
+    """Réécrit un objet JSON presque valide en un seul parcours"""
+    out = []
+    stack = []
+    in_string = escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char in "\n\r\t":
+                repairs.append("control_chars")
+                char = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}[char]
+            out.append(char)
+        elif char == '"':
+            in_string = True
+            out.append(char)
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            # Virgule finale avant la fermeture
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                repairs.append("trailing_comma")
+            if stack:
+                stack.pop()
+            out.append(char)
+        else:
+            word = re.match(r"[A-Za-z]+", text[i:])
+            if word and word.group() in _PYTHON_LITERALS:
+                repairs.append("python_literal")
+                out.append(_PYTHON_LITERALS[word.group()])
+                i += len(word.group())
+                continue
+            out.append(char)
+        i += 1
+
+    if in_string or stack:
+        # Réponse coupée (max_tokens) : on ferme la chaîne et les structures ouvertes
+        repairs.append("truncated")
+        if in_string:
+            if escaped:
+                out.pop()
+            out.append('"')
+        fixed = "".join(out).rstrip()
+        # Clé orpheline (« "cle": » ou « "cle" ») ou virgule pendante en fin de texte
+        fixed = re.sub(r'(?<=[{,])\s*"[^"\\]*"\s*:?\s*$', "", fixed)
+        fixed = fixed.rstrip().rstrip(",")
+        return fixed + "".join(reversed(stack))
+    return "".join(out)
+
+
+def extract_json(content: str) -> Tuple[Dict, List[str]]:
+    """Retourne l'objet JSON de la réponse et la liste des réparations appliquées"""
+    text = content.strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    else:
+        if isinstance(data, dict):
+            return data, []
+        raise OutputError("La réponse n'est pas un objet JSON")
+
+    start = text.find("{")
+    if start < 0:
+        raise OutputError("Aucun objet JSON dans la réponse")
+    candidate = _balanced_object(text, start)
+    repairs = ["surrounding_text"] if candidate != text else []
+    try:
+        return json.loads(candidate), repairs
+    except json.JSONDecodeError:
+        pass
+
+    fixed = _repair(candidate, repairs)
+    try:
+        data = json.loads(fixed)
+    except json.JSONDecodeError as e:
+        # Dernier recours : dictionnaire Python (guillemets simples)
+        try:
+            data = ast.literal_eval(candidate)
+        except (ValueError, SyntaxError):
+            raise OutputError(f"JSON irréparable: {e}") from e
+        repairs = [repair for repair in repairs if repair == "surrounding_text"] + ["python_dict"]
+    if not isinstance(data, dict):
+        raise OutputError("La réponse n'est pas un objet JSON")
+    return data, sorted(set(repairs))
+
+
+def _coerce(value: Any, annotation: Any) -> Any:
+    """Conversions courantes vers le type annoté ; la validation Pydantic tranche ensuite"""
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is not None and type(None) in args:
+        # Optional[X]
+        if value in (None, ""):
+            return None
+        inner = [arg for arg in args if arg is not type(None)]
+        return _coerce(value, inner[0]) if len(inner) == 1 else value
+    if annotation is float and isinstance(value, str):
+        number = _NUMBER.search(value.replace("\u00a0", "").replace(" ", ""))
+        return float(number.group().replace(",", ".")) if number else value
+    if annotation is str and isinstance(value, (int, float)):
+        return str(value)
+    if annotation is str and isinstance(value, list):
+        return ", ".join(map(str, value))
+    if annotation is str and isinstance(value, dict):
+        return "; ".join(f"{key}: {item}" for key, item in value.items())
+    if origin in (list, List) and args:
+        if isinstance(value, str):
+            value = [part.strip() for part in value.split(",") if part.strip()]
+        if isinstance(value, list):
+            return [_coerce(item, args[0]) for item in value]
+    if origin in (dict, Dict) and len(args) == 2 and isinstance(value, dict):
+        return {str(key): _coerce(item, args[1]) for key, item in value.items()}
+    return value
+
+
+def conform(data: Dict, schema: Type[BaseModel], fixed: Optional[Dict] = None) -> Tuple[Dict, List[str]]:
+    """Valide `data` contre `schema` ; `fixed` porte les champs que l'application renseigne elle-même"""
+    fixed = fixed or {}
+    fields = schema.model_fields
+    repairs = []
+    ignored = MANAGED_FIELDS | set(fixed)
+    kept = {key: value for key, value in data.items() if key in fields and key not in ignored}
+    if ignored & set(data):
+        # Ces clés auraient fait échouer la construction du modèle (argument en double)
+        repairs.append("managed_fields")
+    try:
+        validated = schema(**fixed, **kept)
+    except ValidationError:
+        coerced = {key: _coerce(value, fields[key].annotation) for key, value in kept.items()}
+        try:
+            validated = schema(**fixed, **coerced)
+        except ValidationError as e:
+            raise OutputError(f"Réponse non conforme à {schema.__name__}: {e.error_count()} erreur(s)") from e
+        repairs.append("types")
+    return validated.model_dump(include=set(kept)), repairs
+
+
+def conform_sections(data: Dict, schemas: Dict[str, Type[BaseModel]],
+                     fixed: Optional[Dict[str, Dict]] = None) -> Tuple[Dict, List[str]]:
+    """conform() de chaque section d'une réponse composée ({"product": ..., "sheet": ...})"""
+    fixed = fixed or {}
+    result, repairs = {}, []
+    for name, schema in schemas.items():
+        section = data.get(name)
+        if not isinstance(section, dict):
+            raise OutputError(f"Section {name} absente de la réponse")
+        result[name], section_repairs = conform(section, schema, fixed.get(name))
+        repairs += section_repairs
+    return result, repairs
+
+
+class OutputStats:
+    """Réponses servies par le chemin rapide, réparées (appels économisés) ou inexploitables"""
+
+    def __init__(self):
+        self.fast_path = 0
+        self.repaired = 0
+        self.failed = 0
+        self.repairs = Counter()
+
+    def record(self, repairs: List[str]):
+        if repairs:
+            self.repaired += 1
+            self.repairs.update(repairs)
+        else:
+            self.fast_path += 1
+
+    def stats(self) -> Dict:
+        total = self.fast_path + self.repaired + self.failed
+        return {
+            "responses": total,
+            "fast_path": self.fast_path,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            # Part des réponses qui auraient imposé une nouvelle génération sans réparation
+            "retry_rate_saved": round(self.repaired / total, 3) if total else 0.0,
+            "repairs": dict(self.repairs)
+        }
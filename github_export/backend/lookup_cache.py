@@ -0,0 +1,136 @@
+"""Cache du pipeline EAN (recherche → extraction → génération IA).
+
+Deux niveaux : un LRU en mémoire devant la collection MongoDB
+`lookup_cache`, pour qu'un EAN résolu la veille ne relance ni la recherche
+Google ni l'appel OpenAI. Chaque espace (résultats bruts, infos extraites,
+sortie IA) a son propre TTL et les échecs sont mis en cache plus
+brièvement (cache négatif). MongoDB purge les entrées expirées via un index
+TTL sur `expires_at`.
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from batch import normalize_code
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTLS = {
+    "search": float(os.environ.get("CACHE_TTL_SEARCH", 24 * 3600)),
+    "extract": float(os.environ.get("CACHE_TTL_EXTRACT", 7 * 24 * 3600)),
+    "ai": float(os.environ.get("CACHE_TTL_AI", 30 * 24 * 3600)),
+}
+NEGATIVE_TTL = float(os.environ.get("CACHE_TTL_NEGATIVE", 3600))
+MEMORY_ENTRIES = int(os.environ.get("CACHE_MEMORY_ENTRIES", 2048))
+
+MISS = object()  # absent du cache
+_NEGATIVE = {"__miss__": True}
+
+
+class LRUCache:
+    """LRU en mémoire avec expiration par entrée"""
+
+    def __init__(self, max_entries: int = MEMORY_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clé -> (expire_at, valeur)
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISS
+        if entry[0] <= time.time():
+            del self._entries[key]
+            return MISS
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: Any, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LookupCache:
+    """Cache à deux niveaux par espace (search / extract / ai) et EAN normalisé"""
+
+    def __init__(self, collection, ttls: Optional[Dict[str, float]] = None,
+                 negative_ttl: float = NEGATIVE_TTL, memory_entries: int = MEMORY_ENTRIES):
+        self.collection = collection
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.negative_ttl = negative_ttl
+        self.memory = LRUCache(memory_entries)
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def _count(self, namespace: str, event: str):
+        counters = self._stats.setdefault(
+            namespace, {"memory_hits": 0, "store_hits": 0, "negative_hits": 0, "misses": 0}
+        )
+        counters[event] += 1
+
+    @staticmethod
+    def key(namespace: str, code: str) -> str:
+        return f"{namespace}:{normalize_code(code)}"
+
+    async def get(self, namespace: str, code: str) -> Any:
+        """Retourne MISS, None (échec connu) ou la valeur en cache"""
+        key = self.key(namespace, code)
+        value = self.memory.get(key)
+        if value is MISS:
+            doc = None
+            try:
+                doc = await self.collection.find_one({"_id": key})
+            except Exception as e:
+                logger.warning(f"Cache MongoDB indisponible (lecture {key}): {e}")
+            if doc is None or doc["expires_at"] <= datetime.utcnow():
+                self._count(namespace, "misses")
+                return MISS
+            value = doc["value"]
+            remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+            self.memory.set(key, value, time.time() + remaining)
+            self._count(namespace, "store_hits")
+        else:
+            self._count(namespace, "memory_hits")
+        if value == _NEGATIVE:
+            self._count(namespace, "negative_hits")
+            return None
+        return value
+
+    async def set(self, namespace: str, code: str, value: Any):
+        """Met en cache une valeur ; None enregistre un échec (TTL négatif)"""
+        key = self.key(namespace, code)
+        if value is None:
+            value, ttl = _NEGATIVE, self.negative_ttl
+        else:
+            ttl = self.ttls[namespace]
+        self.memory.set(key, value, time.time() + ttl)
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "value": value, "expires_at": datetime.utcnow() + timedelta(seconds=ttl)},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"Cache MongoDB indisponible (écriture {key}): {e}")
+
+    def stats(self) -> Dict:
+        namespaces = {}
+        for namespace, counters in self._stats.items():
+            lookups = counters["memory_hits"] + counters["store_hits"] + counters["misses"]
+            hits = counters["memory_hits"] + counters["store_hits"]
+            namespaces[namespace] = dict(counters, hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+        return {
+            "memory_entries": len(self.memory),
+            "ttls": self.ttls,
+            "negative_ttl": self.negative_ttl,
+            "namespaces": namespaces
+        }
@@ -0,0 +1,58 @@
+"""Pagination par curseur (keyset) des listes triées par date de création.
+
+Le curseur opaque encode (created_at, id) du dernier document renvoyé ; la
+page suivante reprend juste après via l'index (created_at, id) au lieu de
+sauter `offset` documents, donc chaque page coûte le même prix. `id`
+départage les documents créés à la même milliseconde.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import DESCENDING
+
+KEYSET_SORT = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    payload = json.dumps([doc["created_at"].isoformat(), doc["id"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """(created_at, id) d'un curseur ; ValueError s'il est invalide"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(doc_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Curseur de pagination invalide")
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Ajoute au filtre la condition « après le curseur » dans l'ordre KEYSET_SORT"""
+    if not cursor:
+        return query
+    created_at, doc_id = decode_cursor(cursor)
+    after = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": doc_id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+async def fetch_page(collection, query: Dict[str, Any], limit: int, offset: int = 0,
+                     cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Page de documents et curseur de la page suivante (None en fin de liste).
+
+    Avec un curseur, `offset` est ignoré ; sans curseur il reste appliqué
+    (skip) pour la compatibilité avec les anciens clients.
+    """
+    find = collection.find(keyset_query(query, cursor)).sort(KEYSET_SORT)
+    if offset and not cursor:
+        find = find.skip(offset)
+    docs = await find.limit(limit).to_list(length=limit)
+    next_cursor = encode_cursor(docs[-1]) if docs and len(docs) == limit else None
+    return docs, next_cursor
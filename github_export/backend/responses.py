@@ -0,0 +1,86 @@
+"""Sérialisation et compression des réponses JSON de l'API.
+
+FastJSONResponse est la classe de réponse par défaut des applications :
+le rendu passe par le sérialiseur choisi dans JSON_SERIALIZER (orjson s'il
+est installé, sinon le module json avec les options de Starlette). D'autres
+sérialiseurs peuvent être ajoutés avec register_serializer.
+
+CompressionMiddleware compresse en gzip les réponses dont le corps dépasse
+GZIP_MIN_SIZE octets, sauf les flux de progression NDJSON (zlib retiendrait
+les lignes jusqu'à remplir son tampon et le client ne verrait plus
+l'avancement en direct) et les fichiers déjà compressés (exports gzip, zip).
+"""
+import json
+import os
+from typing import Any, Callable, Dict
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+GZIP_MIN_SIZE = int(os.environ.get("GZIP_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+# Réponses envoyées morceau par morceau au fil du traitement, jamais compressées
+STREAMED_MEDIA_TYPES = ("application/x-ndjson", "text/event-stream")
+# Contenus déjà compressés : les recompresser coûte du CPU sans rien gagner
+COMPRESSED_MEDIA_TYPES = ("application/gzip", "application/zip")
+
+
+def _dumps_json(content: Any) -> bytes:
+    # Mêmes options que starlette.responses.JSONResponse
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def _dumps_orjson(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+SERIALIZERS: Dict[str, Callable[[Any], bytes]] = {"json": _dumps_json}
+if orjson is not None:
+    SERIALIZERS["orjson"] = _dumps_orjson
+
+JSON_SERIALIZER = os.environ.get("JSON_SERIALIZER", "orjson" if orjson is not None else "json")
+if JSON_SERIALIZER not in SERIALIZERS:
+    raise ValueError(f"JSON_SERIALIZER inconnu ou non installé: {JSON_SERIALIZER} "
+                     f"(disponibles: {', '.join(SERIALIZERS)})")
+
+
+def register_serializer(name: str, dumps: Callable[[Any], bytes]):
+    """Ajoute un sérialiseur (objet → octets UTF-8) sélectionnable par JSON_SERIALIZER"""
+    SERIALIZERS[name] = dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendue par le sérialiseur configuré"""
+
+    def render(self, content: Any) -> bytes:
+        return SERIALIZERS[JSON_SERIALIZER](content)
+
+
+class _Responder(GZipResponder):
+    async def send_with_gzip(self, message):
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith(STREAMED_MEDIA_TYPES + COMPRESSED_MEDIA_TYPES):
+                # Même traitement qu'une réponse déjà encodée : transmise telle quelle
+                self.content_encoding_set = True
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware qui laisse passer sans les compresser les flux de progression et les archives"""
+
+    def __init__(self, app, minimum_size: int = GZIP_MIN_SIZE, compresslevel: int = GZIP_LEVEL):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("accept-encoding", ""):
+            await _Responder(self.app, self.minimum_size, compresslevel=self.compresslevel)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -1,4 +1,6 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Response, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -6,15 +8,30 @@ import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Awaitable, Callable, List, Optional, Dict, Any
 import uuid
 from datetime import datetime
+from collections import Counter
 import json
-import requests
-from openai import OpenAI
+import httpx
 import asyncio
 import re
 
+from batch import MAX_BATCH_SIZE, clamp_concurrency, dedupe_codes, error_message, normalize_code, parse_codes_csv, run_batch
+from classifier import KeywordClassifier, classify
+from http_client import close_http_client, get_json
+from indexes import ensure_indexes
+from jobs import DONE, RUNNING, SKIPPED, JobContext, JobQueue
+from llm import create_llm_client
+from llm_cache import ResponseCache
+from llm_output import OutputError
+from lookup_cache import MISS, LookupCache
+from pagination import fetch_page
+from responses import CompressionMiddleware, FastJSONResponse
+from singleflight import SingleFlight
+from stats import CatalogueStats
+from write_buffer import WriteBuffer
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -23,21 +40,35 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Insertions groupées entre requêtes concurrentes, acquittées avant chaque réponse
+write_buffer = WriteBuffer(db)
+
+# Compteurs du catalogue maintenus à chaque écriture (GET /api/stats)
+catalogue_stats = CatalogueStats(db)
+stats_task = None
+
 # API Keys
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', 'your_openai_key_here')
 GOOGLE_SEARCH_API_KEY = os.environ.get('GOOGLE_SEARCH_API_KEY', 'your_google_search_key_here')
 GOOGLE_SEARCH_CX = os.environ.get('GOOGLE_SEARCH_CX', 'your_google_cx_here')
+GOOGLE_SEARCH_URL = os.environ.get('GOOGLE_SEARCH_URL', 'https://www.googleapis.com/customsearch/v1')
 
-# Configure OpenAI client
-openai_client = None
-if OPENAI_API_KEY and OPENAI_API_KEY != 'your_openai_key_here':
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Client LLM asynchrone (openai, fake pour les tests de charge, replay pour rejouer le cache hors ligne)
+LLM_BACKEND = os.environ.get('LLM_BACKEND', 'openai')
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '4'))
+LLM_FAKE_LATENCY = float(os.environ.get('LLM_FAKE_LATENCY', '0.8'))
+LLM_CACHE = os.environ.get('LLM_CACHE', 'on') == 'on'
+# Produit et fiche générés en un seul appel LLM au lieu de deux
+LLM_COMBINED = os.environ.get('LLM_COMBINED', 'off') == 'on'
+llm_cache = ResponseCache() if LLM_CACHE or LLM_BACKEND == 'replay' else None
+llm_client = create_llm_client(LLM_BACKEND, OPENAI_API_KEY, LLM_MAX_CONCURRENCY, LLM_FAKE_LATENCY, llm_cache)
 
 # Create the main app
 app = FastAPI(
     title="🏷️ Générateur de Fiches Produits DM'Sports", 
     description="Outil intelligent de création automatique de fiches produits avec IA + recherche EAN",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Create API router
@@ -121,6 +152,11 @@ class EANGenerateRequest(BaseModel):
     ean_code: str
     generate_sheet: bool = True
 
+class EANBatchGenerateRequest(BaseModel):
+    ean_codes: List[str]
+    generate_sheet: bool = True
+    concurrency: int = 10
+
 # ===== SERVICES =====
 
 class GoogleSearchService:
@@ -162,33 +198,25 @@ class GoogleSearchService:
             }
         
         try:
-            # Requêtes multiples pour plus d'infos
+            # Requêtes multiples pour plus d'infos, lancées en parallèle
             queries = [
                 f"{ean_code} produit caractéristiques prix",
                 f"{ean_code} marque modèle couleur",
                 f"EAN {ean_code} specifications"
             ]
             
-            all_results = []
-            
-            for query in queries:
-                url = "https://www.googleapis.com/customsearch/v1"
+            async def run_query(query: str) -> List[Dict]:
                 params = {
                     'key': GOOGLE_SEARCH_API_KEY,
                     'cx': GOOGLE_SEARCH_CX,
                     'q': query,
                     'num': 5
                 }
-                
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'items' in data:
-                    all_results.extend(data['items'])
-                
-                # Petit délai entre requêtes
-                await asyncio.sleep(0.1)
+                data = await get_json(GOOGLE_SEARCH_URL, params=params)
+                return data.get('items', [])
+            
+            batches = await asyncio.gather(*(run_query(query) for query in queries))
+            all_results = [item for items in batches for item in items]
             
             return {
                 "items": all_results[:10],  # Top 10 résultats
@@ -197,7 +225,7 @@ class GoogleSearchService:
                 }
             }
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Erreur Google Search API: {e}")
             raise HTTPException(status_code=500, detail=f"Erreur recherche Google: {str(e)}")
         except Exception as e:
@@ -242,22 +270,46 @@ class GoogleSearchService:
                         extracted["prices"].append(product['price'])
         
         # Détecter la catégorie
-        all_text = " ".join(extracted["titles"] + extracted["descriptions"]).lower()
-        if any(word in all_text for word in ['basket', 'chaussure', 'sneaker', 'air max', 'nike', 'adidas']):
-            extracted["potential_category"] = "Chaussures"
-        elif any(word in all_text for word in ['t-shirt', 'polo', 'sweat', 'hoodie', 'vêtement']):
-            extracted["potential_category"] = "Vêtements"
-        elif any(word in all_text for word in ['sac', 'portefeuille', 'maroquinerie']):
-            extracted["potential_category"] = "Maroquinerie"
+        all_text = " ".join(extracted["titles"] + extracted["descriptions"])
+        extracted["potential_category"] = classify(all_text)["category"] or ""
         
         return extracted
 
+# Marques reconnues par la simulation sans LLM, par ordre de priorité
+SIMULATED_BRANDS = KeywordClassifier.from_file(brands=["Adidas", "Lacoste", "Hugo Boss"])
+
 class AIService:
+    @staticmethod
+    def search_context(ean_code: str, extracted_info: Dict) -> str:
+        """Bloc de contexte commun aux prompts : résultats Google du code EAN"""
+        context_titles = "\n".join(extracted_info.get("titles", [])[:5])
+        context_descriptions = "\n".join(extracted_info.get("descriptions", [])[:3])
+        # Ordre stable : le prompt (et donc la clé du cache LLM) ne varie pas d'un processus à l'autre
+        context_brands = ", ".join(dict.fromkeys(extracted_info.get("brands", [])))
+        context_urls = "\n".join(extracted_info.get("urls", [])[:3])
+        
+        return f"""CODE EAN À ANALYSER: {ean_code}
+
+INFORMATIONS TROUVÉES SUR GOOGLE:
+
+Titres des résultats:
+{context_titles}
+
+Descriptions:
+{context_descriptions}
+
+Marques détectées: {context_brands}
+
+URLs sources:
+{context_urls}
+
+CATÉGORIE POTENTIELLE: {extracted_info.get('potential_category', 'Non déterminée')}"""
+    
     @staticmethod
     async def generate_product_info(ean_code: str, search_results: Dict, extracted_info: Dict) -> Dict:
         """Génère les informations produit via OpenAI"""
         
-        if not openai_client:
+        if not llm_client:
             # Mode simulation avec données intelligentes
             category = extracted_info.get("potential_category", "Chaussures")
             
@@ -265,13 +317,7 @@ class AIService:
             titles = extracted_info.get("titles", [])
             descriptions = extracted_info.get("descriptions", [])
             
-            brand = "Nike"  # Par défaut
-            if any("adidas" in str(t).lower() for t in titles):
-                brand = "Adidas"
-            elif any("lacoste" in str(t).lower() for t in titles):
-                brand = "Lacoste"
-            elif any("hugo" in str(t).lower() for t in titles):
-                brand = "Hugo Boss"
+            brand = SIMULATED_BRANDS.classify(" ".join(map(str, titles)))["brand"] or "Nike"  # Nike par défaut
             
             # Prix simulé
             prices = extracted_info.get("prices", [])
@@ -309,31 +355,10 @@ class AIService:
             }
         
         try:
-            # Préparer le contexte
-            context_titles = "\n".join(extracted_info.get("titles", [])[:5])
-            context_descriptions = "\n".join(extracted_info.get("descriptions", [])[:3])
-            context_brands = ", ".join(set(extracted_info.get("brands", [])))
-            context_urls = "\n".join(extracted_info.get("urls", [])[:3])
-            
             prompt = f"""
 Tu es un expert en e-commerce spécialisé dans la création de fiches produits pour une boutique de sport style DM'Sports.
 
-CODE EAN À ANALYSER: {ean_code}
-
-INFORMATIONS TROUVÉES SUR GOOGLE:
-
-Titres des résultats:
-{context_titles}
-
-Descriptions:
-{context_descriptions}
-
-Marques détectées: {context_brands}
-
-URLs sources:
-{context_urls}
-
-CATÉGORIE POTENTIELLE: {extracted_info.get('potential_category', 'Non déterminée')}
+{AIService.search_context(ean_code, extracted_info)}
 
 MISSION:
 Génère un produit e-commerce complet au format JSON stricte avec ces champs OBLIGATOIRES:
@@ -375,24 +400,18 @@ RÈGLES IMPORTANTES:
 RÉPONDS UNIQUEMENT EN JSON VALIDE, SANS AUTRE TEXTE.
 """
 
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            # Requêtes fusionnées par EAN : un seul appel pour un même code en vol
+            return await llm_client.complete_json(
+                prompt,
+                kind="product",
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=1000,
+                key=f"product:{ean_code}",
+                schema=Product,
+                fixed={"ean_code": ean_code, "google_source": None}
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            # Nettoyer le JSON si nécessaire
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
-            
-            return json.loads(content)
-            
-        except json.JSONDecodeError as e:
+        except OutputError as e:
             logger.error(f"Erreur parsing JSON OpenAI: {e}")
             raise HTTPException(status_code=500, detail="Erreur format réponse IA")
         except Exception as e:
@@ -403,7 +422,7 @@ RÉPONDS UNIQUEMENT EN JSON VALIDE, SANS AUTRE TEXTE.
     async def generate_product_sheet(product: Product) -> Dict:
         """Génère une fiche produit PrestaShop optimisée"""
         
-        if not openai_client:
+        if not llm_client:
             # Mode simulation
             return {
                 "title": product.title,
@@ -460,7 +479,7 @@ PRODUIT:
 - Catégorie: {product.category}
 - Prix: {product.price}€
 - Description: {product.description}
-- Caractéristiques: {product.characteristics}
+- Caractéristiques: {json.dumps(product.characteristics, ensure_ascii=False)}
 - Tailles: {product.sizes}
 
 Génère au format JSON:
@@ -471,7 +490,7 @@ Génère au format JSON:
   "color_code": "code_couleur_court",
   "price_ttc": prix_numérique,
   "description": "description_html_prestashop_formatée",
-  "characteristics": {product.characteristics},
+  "characteristics": {json.dumps(product.characteristics, ensure_ascii=False)},
   "seo_title": "titre_seo_optimisé_max_70_caractères",
   "seo_description": "meta_description_max_155_caractères",
   "export_data": {{
@@ -498,25 +517,185 @@ RÈGLES:
 JSON UNIQUEMENT:
 """
 
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
+            return await llm_client.complete_json(
+                prompt,
+                kind="sheet",
                 temperature=0.6,
-                max_tokens=1200
+                max_tokens=1200,
+                schema=ProductSheet,
+                fixed={"product_id": product.id, "weight_info": product.weight_by_type}
             )
             
-            content = response.choices[0].message.content.strip()
-            
-            if content.startswith("```json"):
-                content = content[7:-3]
-            elif content.startswith("```"):
-                content = content[3:-3]
-                
-            return json.loads(content)
-            
         except Exception as e:
             logger.error(f"Erreur génération fiche: {e}")
             raise HTTPException(status_code=500, detail=f"Erreur génération fiche: {str(e)}")
+    
+    @staticmethod
+    async def generate_product_with_sheet(ean_code: str, search_results: Dict, extracted_info: Dict) -> Dict:
+        """Produit et fiche PrestaShop en un seul appel LLM : {"product": ..., "sheet": ...}
+        
+        Le modèle ne rédige que les champs propres à la fiche ; les caractéristiques
+        et export_data sont repris du produit au lieu d'être générés une seconde fois."""
+        
+        if not llm_client:
+            product_info = await AIService.generate_product_info(ean_code, search_results, extracted_info)
+            sheet_info = await AIService.generate_product_sheet(Product(ean_code=ean_code, **product_info))
+            return {"product": product_info, "sheet": sheet_info}
+        
+        try:
+            prompt = f"""
+Tu es un expert en e-commerce et PrestaShop pour la boutique de sport DM'Sports.
+
+{AIService.search_context(ean_code, extracted_info)}
+
+MISSION:
+Génère en une seule réponse le produit e-commerce ET sa fiche PrestaShop, au format JSON strict:
+
+{{
+  "product": {{
+    "title": "Titre produit structuré: [Catégorie] [Marque] [Modèle] - [Couleur]",
+    "brand": "Marque principale du produit",
+    "model": "Nom/modèle précis du produit",
+    "color": "Couleur principale",
+    "category": "Catégorie principale (Chaussures/Vêtements/Accessoires/Maroquinerie)",
+    "price": prix_numérique_sans_devise,
+    "description": "Description vendeuse de 250-400 mots, optimisée pour la vente en ligne, mettant en avant les bénéfices client",
+    "characteristics": {{
+      "marque": "nom_marque",
+      "couleur": "couleur_principale",
+      "matière": "matériaux_utilisés",
+      "saison": "saison_appropriée",
+      "style": "style_vestimentaire",
+      "origine": "pays_origine_ou_import"
+    }},
+    "sizes": ["liste", "des", "tailles", "disponibles"],
+    "weight_by_type": {{
+      "baskets": 1.0,
+      "ensemble": 0.75,
+      "sweat": 0.5,
+      "t-shirt": 0.25,
+      "maroquinerie": 0.3
+    }}
+  }},
+  "sheet": {{
+    "title": "titre_optimisé_prestashop",
+    "reference": "REF-code_unique",
+    "color_code": "code_couleur_court",
+    "price_ttc": prix_numérique,
+    "description": "description_html_prestashop_formatée",
+    "seo_title": "titre_seo_optimisé_max_70_caractères",
+    "seo_description": "meta_description_max_155_caractères"
+  }}
+}}
+
+RÈGLES IMPORTANTES:
+- Utilise UNIQUEMENT les informations des résultats Google
+- Si une info manque, déduis intelligemment du contexte
+- Prix réaliste pour le marché français
+- Description produit vendeuse et engageante
+- Tailles adaptées au type de produit
+- Description de fiche en HTML avec balises <h3>, <p>, <ul>, <li>
+- SEO optimisé pour Google
+- Style DM'Sports: moderne, sport, streetwear
+
+RÉPONDS UNIQUEMENT EN JSON VALIDE, SANS AUTRE TEXTE.
+"""
+
+            result = await llm_client.complete_json(
+                prompt,
+                kind="combined",
+                temperature=0.7,
+                max_tokens=1800,
+                key=f"combined:{ean_code}",
+                schema={"product": Product, "sheet": ProductSheet},
+                fixed={
+                    "product": {"ean_code": ean_code, "google_source": None},
+                    "sheet": {"product_id": "", "weight_info": {}, "characteristics": {}}
+                }
+            )
+            
+        except OutputError as e:
+            logger.error(f"Erreur parsing JSON OpenAI: {e}")
+            raise HTTPException(status_code=500, detail="Erreur format réponse IA")
+        except Exception as e:
+            logger.error(f"Erreur OpenAI API: {e}")
+            raise HTTPException(status_code=500, detail=f"Erreur génération IA: {str(e)}")
+        
+        product_info, sheet_info = result["product"], result["sheet"]
+        return {
+            "product": product_info,
+            "sheet": {
+                **sheet_info,
+                "characteristics": product_info.get("characteristics", {}),
+                "export_data": {
+                    "prestashop_format": {
+                        "name": sheet_info["title"],
+                        "reference": sheet_info["reference"],
+                        "price": sheet_info["price_ttc"],
+                        "description": product_info["description"],
+                        "meta_title": sheet_info["seo_title"],
+                        "meta_description": sheet_info["seo_description"],
+                        "categories": [product_info["category"]],
+                        "brand": product_info["brand"],
+                        "ean13": ean_code
+                    }
+                }
+            }
+        }
+
+# ===== CACHE DU PIPELINE =====
+
+lookup_cache = LookupCache(db.lookup_cache)
+# Seules les générations d'un vrai LLM sont partagées via MongoDB : la simulation
+# et le backend factice écriraient des fiches fictives lues ensuite en production
+AI_CACHEABLE = llm_client is not None and LLM_BACKEND != 'fake'
+
+# Un seul appel externe en vol par EAN, les requêtes concurrentes attendent son résultat
+search_flight = SingleFlight("search")
+ai_flight = SingleFlight("ai")
+
+async def cached_search(ean_code: str) -> Dict:
+    """Recherche Google avec cache et fusion des recherches concurrentes"""
+    return await search_flight.do(normalize_code(ean_code), _cached_search, ean_code)
+
+async def _cached_search(ean_code: str) -> Dict:
+    """Recherche Google avec cache (les recherches sans résultat sont mises en cache négatif)"""
+    cached = await lookup_cache.get("search", ean_code)
+    if cached is None:
+        return {"items": [], "searchInformation": {"totalResults": "0"}}
+    if cached is not MISS:
+        return cached
+    search_results = await GoogleSearchService.search_by_ean(ean_code)
+    await lookup_cache.set("search", ean_code, search_results if search_results.get("items") else None)
+    return search_results
+
+async def cached_extract(ean_code: str, search_results: Dict) -> Dict:
+    """Extraction des infos produit avec cache"""
+    if not search_results.get("items"):
+        # Rien à extraire : la recherche vide est déjà en cache négatif, on ne
+        # fige pas ce résultat pour la durée du TTL d'extraction
+        return GoogleSearchService.extract_product_info(search_results)
+    cached = await lookup_cache.get("extract", ean_code)
+    if cached is not MISS and cached is not None:
+        return cached
+    extracted_info = GoogleSearchService.extract_product_info(search_results)
+    await lookup_cache.set("extract", ean_code, extracted_info)
+    return extracted_info
+
+async def cached_product_info(ean_code: str, search_results: Dict, extracted_info: Dict) -> Dict:
+    """Génération IA du produit avec cache et fusion des générations concurrentes"""
+    return await ai_flight.do(normalize_code(ean_code), _cached_product_info, ean_code, search_results, extracted_info)
+
+async def _cached_product_info(ean_code: str, search_results: Dict, extracted_info: Dict) -> Dict:
+    """Génération IA du produit avec cache"""
+    if not AI_CACHEABLE or not search_results.get("items"):
+        return await AIService.generate_product_info(ean_code, search_results, extracted_info)
+    cached = await lookup_cache.get("ai", ean_code)
+    if cached is not MISS and cached is not None:
+        return cached
+    product_info = await AIService.generate_product_info(ean_code, search_results, extracted_info)
+    await lookup_cache.set("ai", ean_code, product_info)
+    return product_info
 
 # ===== API ENDPOINTS =====
 
@@ -527,7 +706,7 @@ async def root():
         "message": "🏷️ API Générateur de Fiches Produits DM'Sports", 
         "version": "2.0.0",
         "features": ["EAN Search", "AI Generation", "PrestaShop Export"],
-        "openai_configured": openai_client is not None,
+        "openai_configured": llm_client is not None,
         "google_configured": GOOGLE_SEARCH_API_KEY != 'your_google_search_key_here'
     }
 
@@ -538,10 +717,10 @@ async def search_by_ean(search_request: ProductSearchCreate):
         logger.info(f"Recherche EAN: {search_request.ean_code}")
         
         # Recherche Google
-        search_results = await GoogleSearchService.search_by_ean(search_request.ean_code)
+        search_results = await cached_search(search_request.ean_code)
         
         # Extraction des infos
-        extracted_info = GoogleSearchService.extract_product_info(search_results)
+        extracted_info = await cached_extract(search_request.ean_code, search_results)
         
         # Sauvegarder la recherche
         search_obj = ProductSearch(
@@ -551,7 +730,8 @@ async def search_by_ean(search_request: ProductSearchCreate):
             extracted_info=extracted_info
         )
         
-        await db.product_searches.insert_one(search_obj.dict())
+        await write_buffer.insert("product_searches", search_obj.dict())
+        await catalogue_stats.record(searches=1)
         logger.info(f"Recherche EAN sauvegardée: {search_obj.id}")
         
         return search_obj
@@ -560,71 +740,225 @@ async def search_by_ean(search_request: ProductSearchCreate):
         logger.error(f"Erreur recherche EAN: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _no_stage(stage: str, status: str):
+    pass
+
+async def run_generation_pipeline(ean_code: str, generate_sheet: bool = True,
+                                  on_stage: Callable[[str, str], Awaitable[Any]] = _no_stage) -> Dict:
+    """Recherche → génération IA → fiche, sans écriture en base"""
+    # Étape 1: Recherche Google
+    await on_stage("search", RUNNING)
+    search_results = await cached_search(ean_code)
+    extracted_info = await cached_extract(ean_code, search_results)
+    await on_stage("search", DONE)
+    
+    # Étape 2: Génération IA du produit (et de la fiche en un seul appel si LLM_COMBINED)
+    await on_stage("product", RUNNING)
+    combined = None
+    if generate_sheet and LLM_COMBINED:
+        combined = await AIService.generate_product_with_sheet(ean_code, search_results, extracted_info)
+        product_info = combined["product"]
+    else:
+        product_info = await cached_product_info(
+            ean_code, 
+            search_results, 
+            extracted_info
+        )
+    
+    # Étape 3: Créer le produit
+    product = Product(
+        ean_code=ean_code,
+        google_source=f"Google Search - {len(search_results.get('items', []))} résultats",
+        **product_info
+    )
+    await on_stage("product", DONE)
+    
+    # Étape 4: Générer la fiche si demandée
+    product_sheet = None
+    if generate_sheet:
+        await on_stage("sheet", RUNNING)
+        sheet_info = combined["sheet"] if combined else await AIService.generate_product_sheet(product)
+        product_sheet = ProductSheet(
+            product_id=product.id,
+            weight_info=product.weight_by_type,
+            **sheet_info
+        )
+        await on_stage("sheet", DONE)
+    
+    return {
+        "product": product,
+        "product_sheet": product_sheet,
+        "search_summary": {
+            "results_count": len(search_results.get('items', [])),
+            "brands_found": extracted_info.get("brands", []),
+            "category_detected": extracted_info.get("potential_category", "")
+        }
+    }
+
 @api_router.post("/generate/product")
 async def generate_product_from_ean(request: EANGenerateRequest):
     """Pipeline complet: EAN → Recherche → Génération IA → Fiche"""
     try:
         logger.info(f"Pipeline complet pour EAN: {request.ean_code}")
         
-        # Étape 1: Recherche Google
-        search_results = await GoogleSearchService.search_by_ean(request.ean_code)
-        extracted_info = GoogleSearchService.extract_product_info(search_results)
-        
-        # Étape 2: Génération IA du produit
-        product_info = await AIService.generate_product_info(
-            request.ean_code, 
-            search_results, 
-            extracted_info
-        )
-        
-        # Étape 3: Créer le produit
-        product = Product(
-            ean_code=request.ean_code,
-            google_source=f"Google Search - {len(search_results.get('items', []))} résultats",
-            **product_info
-        )
-        
-        await db.products.insert_one(product.dict())
-        logger.info(f"Produit créé: {product.id}")
-        
-        # Étape 4: Générer la fiche si demandée
-        product_sheet = None
-        if request.generate_sheet:
-            sheet_info = await AIService.generate_product_sheet(product)
-            product_sheet = ProductSheet(
-                product_id=product.id,
-                weight_info=product.weight_by_type,
-                **sheet_info
-            )
-            await db.product_sheets.insert_one(product_sheet.dict())
-            logger.info(f"Fiche créée: {product_sheet.id}")
+        result = await run_generation_pipeline(request.ean_code, request.generate_sheet)
+        await save_generation_result(result)
         
-        return {
-            "success": True,
-            "product": product,
-            "product_sheet": product_sheet,
-            "search_summary": {
-                "results_count": len(search_results.get('items', [])),
-                "brands_found": extracted_info.get("brands", []),
-                "category_detected": extracted_info.get("potential_category", "")
-            }
-        }
+        return {"success": True, **result}
         
     except Exception as e:
         logger.error(f"Erreur pipeline EAN: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def save_generation_result(result: Dict):
+    """Enregistre le produit et la fiche d'un pipeline, puis met à jour les statistiques"""
+    product = result["product"]
+    product_sheet = result["product_sheet"]
+    writes = [write_buffer.insert("products", product.dict())]
+    if product_sheet:
+        writes.append(write_buffer.insert("product_sheets", product_sheet.dict()))
+    await asyncio.gather(*writes)
+    logger.info(f"Produit créé: {product.id}")
+    if product_sheet:
+        logger.info(f"Fiche créée: {product_sheet.id}")
+    
+    await catalogue_stats.record(products=1, sheets=1 if product_sheet else 0,
+                                 categories={product.category: 1})
+
+async def run_generation_job(ctx: JobContext) -> Dict:
+    """Exécutant de la file : pipeline complet avec avancement par étape.
+    
+    À la reprise d'une tâche interrompue, les étapes déjà faites sont servies par
+    le cache du pipeline ; si l'enregistrement avait abouti, son résultat est rendu
+    tel quel pour ne pas créer le produit deux fois."""
+    if ctx.stage_done("save"):
+        return ctx.job["result"]
+    result = await run_generation_pipeline(ctx.payload["ean_code"], ctx.payload["generate_sheet"], ctx.stage)
+    await ctx.stage("save", RUNNING)
+    await save_generation_result(result)
+    result = jsonable_encoder(result)
+    await ctx.stage("save", DONE, result=result)
+    return result
+
+GENERATION_STAGES = ["search", "product", "sheet", "save"]
+job_queue = JobQueue(db.jobs, run_generation_job, GENERATION_STAGES)
+
+@api_router.post("/jobs/generate", status_code=202)
+async def submit_generation_job(request: EANGenerateRequest):
+    """Pipeline complet en tâche de fond : rend l'identifiant de tâche immédiatement"""
+    ean_code = request.ean_code.strip()
+    if not ean_code:
+        raise HTTPException(status_code=400, detail="Aucun code EAN fourni")
+    job = await job_queue.submit(
+        {"ean_code": ean_code, "generate_sheet": request.generate_sheet},
+        stages=None if request.generate_sheet else {"sheet": SKIPPED}
+    )
+    logger.info(f"Tâche {job['id']} en file pour EAN: {ean_code}")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}"
+    }
+
+@api_router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    """État d'une tâche : statut, avancement par étape et résultat une fois terminée"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    return job
+
+def stream_batch_generation(ean_codes: List[str], generate_sheet: bool, concurrency: int):
+    """Pipeline par lots : une ligne NDJSON par EAN, écriture groupée en fin de lot"""
+    codes, duplicates = dedupe_codes(ean_codes)
+    if not codes:
+        raise HTTPException(status_code=400, detail="Aucun code EAN fourni")
+    if len(codes) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Lot trop volumineux - {MAX_BATCH_SIZE} codes maximum")
+    
+    async def worker(code):
+        return await run_generation_pipeline(code, generate_sheet)
+    
+    async def stream():
+        products, sheets = [], []
+        failed = 0
+        write_errors = {}
+        try:
+            async for code, result, error in run_batch(codes, worker, clamp_concurrency(concurrency)):
+                if error is not None:
+                    failed += 1
+                    logger.error(f"Erreur pipeline EAN {code}: {error}")
+                    line = {"ean_code": code, "success": False, "error": error_message(error)}
+                else:
+                    products.append(result["product"].dict())
+                    if result["product_sheet"]:
+                        sheets.append(result["product_sheet"].dict())
+                    line = {"ean_code": code, "success": True, **jsonable_encoder(result)}
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        finally:
+            # Écriture groupée, y compris si le client se déconnecte en cours de lot
+            results = await asyncio.gather(
+                write_buffer.insert_many("products", products),
+                write_buffer.insert_many("product_sheets", sheets),
+                return_exceptions=True
+            )
+            for collection, outcome in zip(("products", "product_sheets"), results):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Erreur écriture du lot ({collection}): {outcome}")
+                    write_errors[collection] = error_message(outcome)
+            # Une collection en erreur n'est pas comptée : si une partie de ses documents
+            # a tout de même été écrite, la réconciliation périodique rattrapera l'écart
+            saved_products = [] if "products" in write_errors else products
+            await catalogue_stats.record(
+                products=len(saved_products),
+                sheets=0 if "product_sheets" in write_errors else len(sheets),
+                categories=Counter(product["category"] for product in saved_products)
+            )
+            logger.info(f"Lot terminé: {len(products)} produits, {len(sheets)} fiches, {failed} échecs")
+        yield json.dumps({
+            "done": True,
+            "total": len(codes),
+            "succeeded": len(products),
+            "failed": failed,
+            "duplicates": duplicates,
+            "write_errors": write_errors
+        }, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@api_router.post("/generate/batch")
+async def generate_products_batch(request: EANBatchGenerateRequest):
+    """Pipeline complet pour une liste de codes EAN (résultats en NDJSON)"""
+    logger.info(f"Pipeline par lots: {len(request.ean_codes)} codes")
+    return stream_batch_generation(request.ean_codes, request.generate_sheet, request.concurrency)
+
+@api_router.post("/generate/batch/csv")
+async def generate_products_batch_csv(
+    file: UploadFile = File(...),
+    generate_sheet: bool = True,
+    concurrency: int = 10
+):
+    """Pipeline complet pour les codes EAN d'un fichier CSV (première colonne)"""
+    content = (await file.read()).decode("utf-8-sig", errors="replace")
+    codes = parse_codes_csv(content)
+    logger.info(f"Pipeline par lots (CSV {file.filename}): {len(codes)} codes")
+    return stream_batch_generation(codes, generate_sheet, concurrency)
+
 @api_router.get("/products", response_model=List[Product])
-async def get_products(limit: int = 50, offset: int = 0, category: Optional[str] = None):
-    """Liste des produits avec filtres"""
+async def get_products(response: Response, limit: int = 50, offset: int = 0,
+                       category: Optional[str] = None, cursor: Optional[str] = None):
+    """Liste des produits avec filtres (curseur de la page suivante dans X-Next-Cursor)"""
     try:
         query = {}
         if category:
             query["category"] = category
             
-        cursor = db.products.find(query).sort("created_at", -1).skip(offset).limit(limit)
-        products = await cursor.to_list(length=limit)
+        products, next_cursor = await fetch_page(db.products, query, max(1, limit), offset, cursor)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return [Product(**product) for product in products]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -640,16 +974,20 @@ async def get_product(product_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/sheets", response_model=List[ProductSheet])
-async def get_product_sheets(limit: int = 50, offset: int = 0, status: Optional[str] = None):
-    """Liste des fiches produits"""
+async def get_product_sheets(response: Response, limit: int = 50, offset: int = 0,
+                             status: Optional[str] = None, cursor: Optional[str] = None):
+    """Liste des fiches produits (curseur de la page suivante dans X-Next-Cursor)"""
     try:
         query = {}
         if status:
             query["status"] = status
             
-        cursor = db.product_sheets.find(query).sort("created_at", -1).skip(offset).limit(limit)
-        sheets = await cursor.to_list(length=limit)
+        sheets, next_cursor = await fetch_page(db.product_sheets, query, max(1, limit), offset, cursor)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return [ProductSheet(**sheet) for sheet in sheets]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -683,7 +1021,8 @@ async def create_product_sheet(sheet_request: ProductSheetCreate):
             **sheet_info
         )
         
-        await db.product_sheets.insert_one(product_sheet.dict())
+        await write_buffer.insert("product_sheets", product_sheet.dict())
+        await catalogue_stats.record(sheets=1)
         return product_sheet
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -716,11 +1055,13 @@ async def export_product_sheet(sheet_id: str, format: str = "prestashop"):
 async def delete_product(product_id: str):
     """Supprime un produit et ses fiches"""
     try:
-        result = await db.products.delete_one({"id": product_id})
-        if result.deleted_count == 0:
+        deleted = await db.products.find_one_and_delete({"id": product_id}, projection={"category": 1})
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Produit non trouvé")
         
-        await db.product_sheets.delete_many({"product_id": product_id})
+        result = await db.product_sheets.delete_many({"product_id": product_id})
+        await catalogue_stats.record(products=-1, sheets=-result.deleted_count,
+                                     categories={deleted.get("category"): -1})
         
         return {"message": "Produit supprimé avec succès"}
     except Exception as e:
@@ -728,30 +1069,53 @@ async def delete_product(product_id: str):
 
 @api_router.get("/stats")
 async def get_stats():
-    """Statistiques de l'application"""
+    """Statistiques de l'application (compteurs incrémentaux, lecture d'un seul document)"""
     try:
-        total_products = await db.products.count_documents({})
-        total_sheets = await db.product_sheets.count_documents({})
-        total_searches = await db.product_searches.count_documents({})
-        
-        # Stats par catégorie
-        categories = await db.products.aggregate([
-            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
-        ]).to_list(length=None)
-        
+        stats = await catalogue_stats.get()
         return {
-            "total_products": total_products,
-            "total_sheets": total_sheets,
-            "total_searches": total_searches,
-            "categories": {cat["_id"]: cat["count"] for cat in categories},
+            **stats,
             "api_status": {
-                "openai_configured": openai_client is not None,
+                "openai_configured": llm_client is not None,
                 "google_configured": GOOGLE_SEARCH_API_KEY != 'your_google_search_key_here'
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/stats/refresh")
+async def refresh_stats():
+    """Recalcul complet des statistiques (comptages et agrégation par catégorie)"""
+    try:
+        return await catalogue_stats.refresh()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/metrics/llm")
+async def get_llm_metrics():
+    """Métriques des appels LLM (tokens, latence, appels fusionnés)"""
+    if not llm_client:
+        return {"backend": "simulation", "calls": 0}
+    return llm_client.stats()
+
+@api_router.get("/metrics/cache")
+async def get_cache_metrics():
+    """Statistiques du cache du pipeline et des appels fusionnés"""
+    return {
+        **lookup_cache.stats(),
+        "ai_cache_persisted": AI_CACHEABLE,
+        "single_flight": {flight.name: flight.stats() for flight in (search_flight, ai_flight)}
+    }
+
+@api_router.get("/metrics/writes")
+async def get_write_metrics():
+    """Statistiques des écritures groupées (documents, lots, taille moyenne)"""
+    return write_buffer.stats()
+
+@api_router.get("/metrics/jobs")
+async def get_job_metrics():
+    """Statistiques de la file de tâches (workers, tâches en file, terminées, en échec)"""
+    return job_queue.stats()
+
 # Include router
 app.include_router(api_router)
 
@@ -762,8 +1126,12 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Compression gzip des réponses au-delà de GZIP_MIN_SIZE octets
+app.add_middleware(CompressionMiddleware)
+
 # Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -774,9 +1142,34 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Démarrage API Générateur de Fiches Produits")
-    logger.info(f"OpenAI configuré: {openai_client is not None}")
+    logger.info(f"OpenAI configuré: {llm_client is not None} (backend: {LLM_BACKEND})")
     logger.info(f"Google Search configuré: {GOOGLE_SEARCH_API_KEY != 'your_google_search_key_here'}")
+    try:
+        await lookup_cache.ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Index TTL du cache non créé: {e}")
+    try:
+        created = await ensure_indexes(db)
+        logger.info(f"Index MongoDB vérifiés: {len(created)}")
+    except Exception as e:
+        logger.warning(f"Index MongoDB non créés: {e}")
+    global stats_task
+    stats_task = asyncio.create_task(catalogue_stats.reconcile_forever())
+    try:
+        await job_queue.start()
+        logger.info(f"File de tâches démarrée: {job_queue.concurrency} workers")
+    except Exception as e:
+        logger.warning(f"File de tâches non démarrée: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if stats_task is not None:
+        stats_task.cancel()
+    # Les tâches interrompues sont rendues à la file (reprises ici ou par un autre processus)
+    await job_queue.stop()
+    # Écritures en attente vidées avant de fermer la connexion
+    await write_buffer.close()
+    await close_http_client()
+    if llm_cache is not None:
+        llm_cache.close()
     client.close()
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Fusion des appels concurrents pour une même clé (single-flight).
+
+Le premier appelant pour une clé exécute le travail ; les suivants
+attendent le même résultat au lieu de relancer les mêmes requêtes
+externes. Les compteurs exécutés / fusionnés sont exposés par stats().
+"""
+import asyncio
+
+
+class SingleFlight:
+    """Un seul appel en vol par clé"""
+
+    def __init__(self, name):
+        self.name = name
+        self.executed = 0
+        self.coalesced = 0
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Exécute `await fn(*args, **kwargs)` ou attend l'appel déjà en cours pour `key`"""
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            # Tâche séparée : l'annulation du premier appelant ne pénalise pas les autres
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # exception récupérée même si plus personne n'attend
+
+    @property
+    def in_flight(self):
+        return len(self._calls)
+
+    def stats(self):
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight,
+            "coalesced_ratio": round(self.coalesced / total, 3) if total else 0.0
+        }
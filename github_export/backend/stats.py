@@ -0,0 +1,112 @@
+"""Statistiques du catalogue maintenues de façon incrémentale.
+
+Les compteurs vivent dans un document de la collection `app_stats`, mis à
+jour par $inc à chaque insertion / suppression : GET /api/stats ne lit
+qu'un document au lieu de trois count_documents et d'une agrégation. Le
+recalcul complet reste disponible (refresh) et tourne périodiquement pour
+corriger les écarts (écritures hors application, courses entre un $inc et
+un recalcul).
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATS_ID = "catalogue"
+RECONCILE_INTERVAL = float(os.environ.get("STATS_RECONCILE_INTERVAL", 3600))
+
+# Les noms de catégorie deviennent des clés de sous-document : « . » et « $ » y sont interdits
+_ESCAPES = {".": "．", "$": "＄"}
+
+
+def _escape(category) -> str:
+    key = str(category)
+    for char, escaped in _ESCAPES.items():
+        key = key.replace(char, escaped)
+    return key
+
+
+def _unescape(key: str) -> str:
+    for char, escaped in _ESCAPES.items():
+        key = key.replace(escaped, char)
+    return key
+
+
+class CatalogueStats:
+    """Compteurs produits / fiches / recherches et répartition par catégorie"""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.app_stats
+
+    async def get(self) -> Dict:
+        """Statistiques courantes ; recalcul complet si le document n'existe pas encore"""
+        doc = await self.collection.find_one({"_id": STATS_ID})
+        if doc is None:
+            return await self.refresh()
+        return self._format(doc)
+
+    async def record(self, products: int = 0, sheets: int = 0, searches: int = 0,
+                     categories: Optional[Dict[str, int]] = None):
+        """Applique des deltas (négatifs pour une suppression) ; une erreur est seulement loggée"""
+        inc = {
+            field: delta
+            for field, delta in (("total_products", products), ("total_sheets", sheets), ("total_searches", searches))
+            if delta
+        }
+        for category, delta in (categories or {}).items():
+            if delta:
+                inc[f"categories.{_escape(category)}"] = delta
+        if not inc:
+            return
+        try:
+            # Pas d'upsert : sans document, le prochain get() fera un recalcul complet
+            await self.collection.update_one(
+                {"_id": STATS_ID},
+                {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            logger.warning(f"Statistiques non mises à jour ({inc}): {e}")
+
+    async def refresh(self) -> Dict:
+        """Recalcul complet (count_documents + agrégation) et remplacement du document"""
+        categories = await self.db.products.aggregate([
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        now = datetime.utcnow()
+        doc = {
+            "_id": STATS_ID,
+            "total_products": await self.db.products.count_documents({}),
+            "total_sheets": await self.db.product_sheets.count_documents({}),
+            "total_searches": await self.db.product_searches.count_documents({}),
+            "categories": {_escape(cat["_id"]): cat["count"] for cat in categories},
+            "updated_at": now,
+            "refreshed_at": now
+        }
+        await self.collection.replace_one({"_id": STATS_ID}, doc, upsert=True)
+        logger.info(f"Statistiques recalculées: {doc['total_products']} produits")
+        return self._format(doc)
+
+    async def reconcile_forever(self, interval: float = RECONCILE_INTERVAL):
+        """Tâche de fond : recalcul complet toutes les `interval` secondes"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Réconciliation des statistiques échouée: {e}")
+
+    @staticmethod
+    def _format(doc: Dict) -> Dict:
+        return {
+            "total_products": doc.get("total_products", 0),
+            "total_sheets": doc.get("total_sheets", 0),
+            "total_searches": doc.get("total_searches", 0),
+            # Catégories vidées par des suppressions retirées de la réponse
+            "categories": {_unescape(key): count for key, count in doc.get("categories", {}).items() if count > 0},
+            "updated_at": doc.get("updated_at"),
+            "refreshed_at": doc.get("refreshed_at")
+        }
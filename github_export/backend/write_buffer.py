@@ -0,0 +1,138 @@
+"""Tampon d'écriture MongoDB (group commit).
+
+Les insertions des requêtes concurrentes sont regroupées par collection en
+insert_many, déclenchés quand le tampon atteint `max_batch` documents ou
+après `max_delay` secondes. Chaque appelant attend l'acquittement MongoDB
+de son lot : une réponse HTTP n'est jamais renvoyée avant que ses données
+soient écrites. close() vide le tampon à l'arrêt de l'application.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = int(os.environ.get("WRITE_BATCH_SIZE", 500))
+WRITE_MAX_DELAY = float(os.environ.get("WRITE_MAX_DELAY", 0.01))
+
+
+class WriteBuffer:
+    """Insertions groupées par collection, acquittées appelant par appelant"""
+
+    def __init__(self, db, max_batch: int = WRITE_BATCH_SIZE, max_delay: float = WRITE_MAX_DELAY):
+        self.db = db
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: Dict[str, List[Tuple[List[Dict], asyncio.Future]]] = {}
+        self._size = 0
+        self._closed = False
+        # Créés dans la boucle d'événements au premier appel (Python 3.9)
+        self._has_pending = None
+        self._full = None
+        self._task = None
+        self._flush_lock = None
+        self.flushes = 0
+        self.documents = 0
+        self.largest_batch = 0
+
+    def _start(self):
+        if self._task is None:
+            self._has_pending = asyncio.Event()
+            self._full = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def insert(self, collection: str, doc: Dict):
+        await self.insert_many(collection, [doc])
+
+    async def insert_many(self, collection: str, docs: List[Dict]):
+        """Ajoute des documents au tampon et attend qu'ils soient écrits"""
+        if not docs:
+            return
+        if self._closed:
+            await self.db[collection].insert_many(docs, ordered=False)
+            return
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(collection, []).append((docs, future))
+        self._size += len(docs)
+        self._has_pending.set()
+        if self._size >= self.max_batch:
+            self._full.set()
+        await future
+
+    async def _run(self):
+        while True:
+            await self._has_pending.wait()
+            # Fenêtre de regroupement, écourtée quand le tampon est plein
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Erreur écriture groupée: {e}")
+
+    async def flush(self):
+        """Écrit tout le contenu du tampon"""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            pending, self._pending, self._size = self._pending, {}, 0
+            self._has_pending.clear()
+            self._full.clear()
+            for collection, entries in pending.items():
+                await self._write(collection, entries)
+
+    async def _write(self, collection: str, entries: List[Tuple[List[Dict], asyncio.Future]]):
+        docs = [doc for batch, _ in entries for doc in batch]
+        failed = {}  # index du document -> erreur
+        for start in range(0, len(docs), self.max_batch):
+            chunk = docs[start:start + self.max_batch]
+            try:
+                await self.db[collection].insert_many(chunk, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    failed[start + error["index"]] = BulkWriteError({"writeErrors": [error]})
+            except Exception as e:
+                failed.update((start + i, e) for i in range(len(chunk)))
+            self.flushes += 1
+            self.largest_batch = max(self.largest_batch, len(chunk))
+        self.documents += len(docs) - len(failed)
+
+        # Chaque appelant reçoit la première erreur de ses propres documents
+        position = 0
+        for batch, future in entries:
+            errors = [failed[i] for i in range(position, position + len(batch)) if i in failed]
+            position += len(batch)
+            if future.done():
+                continue  # appelant annulé (client déconnecté) : les données sont tout de même écrites
+            if errors:
+                future.set_exception(errors[0])
+            else:
+                future.set_result(None)
+
+    async def close(self):
+        """Vide le tampon puis écrit directement (arrêt de l'application)"""
+        self._closed = True
+        # Vidage sous le verrou : attend un éventuel flush en cours au lieu de l'interrompre
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "documents": self.documents,
+            "flushes": self.flushes,
+            "largest_batch": self.largest_batch,
+            "avg_batch": round(self.documents / self.flushes, 1) if self.flushes else 0.0,
+            "pending": self._size
+        }
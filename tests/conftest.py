@@ -0,0 +1,75 @@
+"""Les modules de github_export/backend s'importent entre eux par leur nom
+(« from pagination import ... ») : leur dossier est ajouté au chemin. Ceux de
+backend/ s'importent en paquet (backend.storage), sans conflit de noms.
+
+Les tests MongoDB utilisent mongomock (requirements de github_export/backend)
+derrière une enveloppe asynchrone qui imite motor.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "github_export" / "backend"))
+
+
+class AsyncCursor:
+    """Curseur mongomock présenté comme un curseur motor"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count):
+        self._cursor = self._cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self._cursor)[:length]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._cursor:
+            await asyncio.sleep(0)
+            yield doc
+
+
+class AsyncCollection:
+    """Collection mongomock aux méthodes awaitables, comme motor ; chaque appel rend la main
+    à la boucle pour laisser s'entrelacer les coroutines concurrentes"""
+
+    def __init__(self, collection):
+        self.sync = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self.sync.find(*args, **kwargs))
+
+    def aggregate(self, *args, **kwargs):
+        return AsyncCursor(self.sync.aggregate(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self.sync, name)
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(0)
+            return method(*args, **kwargs)
+
+        return call
+
+
+@pytest.fixture
+def mongo_collection():
+    """Fabrique de collections MongoDB en mémoire (mongomock)"""
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().db
+    return lambda name: AsyncCollection(db[name])
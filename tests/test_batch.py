@@ -0,0 +1,84 @@
+"""Lots de codes EAN/SKU : normalisation, dédoublonnage, CSV, exécution bornée."""
+import asyncio
+
+from backend.batch import clamp_concurrency, dedupe_codes, normalize_code, parse_codes_csv, run_batch
+
+
+def test_normalize_code():
+    assert normalize_code(" 3614 2700 12345 ") == "3614270012345"
+    assert normalize_code("sku-ab 12") == "SKU-AB12"
+    # UPC-A (12 chiffres) → EAN-13
+    assert normalize_code("614270012345") == "0614270012345"
+
+
+def test_dedupe_keeps_first_occurrence_order():
+    codes, duplicates = dedupe_codes(["3614270012345", "sku1", " 3614 270012345", "", "SKU1", "614270012345",
+                                      "0614270012345"])
+    assert codes == ["3614270012345", "SKU1", "0614270012345"]
+    assert duplicates == 3
+
+
+def test_parse_csv_skips_header_and_blank_cells():
+    text = "EAN;Nom\n3614270012345;Polo\n;\n ;  614270012345\n"
+    assert parse_codes_csv(text) == ["3614270012345", "614270012345"]
+
+
+def test_parse_csv_comma_without_header():
+    assert parse_codes_csv('"ean"\n"3614270012345",x\nSKU-1,\n') == ["3614270012345", "SKU-1"]
+    # Un code en première ligne n'est pas pris pour un en-tête
+    assert parse_codes_csv("SKU-1\nSKU-2") == ["SKU-1", "SKU-2"]
+
+
+def test_clamp_concurrency():
+    assert clamp_concurrency(0) == 1
+    assert clamp_concurrency("8") == 8
+    assert clamp_concurrency(10_000) == 50
+
+
+def test_run_batch_bounds_concurrency_and_reports_errors():
+    running = 0
+    peak = 0
+
+    async def worker(code):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        if code == "BAD":
+            raise ValueError("code inconnu")
+        return code.lower()
+
+    async def collect():
+        return [result async for result in run_batch(["A", "BAD", "C", "D", "E"], worker, concurrency=2)]
+
+    results = {code: (value, error) for code, value, error in asyncio.run(collect())}
+    assert peak == 2
+    assert results["A"] == ("a", None)
+    assert results["BAD"][0] is None and str(results["BAD"][1]) == "code inconnu"
+    assert len(results) == 5
+
+
+def test_run_batch_cancels_pending_work_when_consumer_stops():
+    started = []
+
+    async def worker(code):
+        started.append(code)
+        await asyncio.sleep(0.01 if code == "A" else 10)
+        return code
+
+    async def first_only():
+        batch = run_batch(["A", "B", "C"], worker, concurrency=3)
+        async for result in batch:
+            await batch.aclose()
+            return result
+
+    async def main():
+        result = await asyncio.wait_for(first_only(), 2)
+        await asyncio.sleep(0)
+        leftover = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        return result, leftover
+
+    result, leftover = asyncio.run(main())
+    assert result[0] == "A"
+    assert leftover == []
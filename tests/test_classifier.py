@@ -0,0 +1,26 @@
+"""Détection de la marque, du type et de la catégorie."""
+import pytest
+
+from backend.classifier import KeywordClassifier, classify
+
+
+def test_classify_in_one_pass():
+    assert classify("Polo Lacoste Classic Fit piqué") == {"brand": "Lacoste", "type": "Polo", "category": "Vêtements"}
+    assert classify("") == {"brand": None, "type": None, "category": None}
+
+
+def test_type_priority_matches_baseline():
+    # Sneakers avant t-shirt, comme les tests `in` d'origine
+    assert classify("Nike Air Max sneakers - free t-shirt offer")["type"] == "Sneakers"
+    assert classify("Shoes and polo pack")["type"] == "Chaussures"
+    # « t-shirt » contient « shirt » : le libellé le plus précis l'emporte
+    assert classify("Lacoste t-shirt col rond")["type"] == "T-shirt"
+    assert classify("Oxford shirt")["type"] == "Chemise"
+
+
+def test_restricted_vocabulary():
+    classifier = KeywordClassifier.from_file(brands=["Lacoste", "Nike", "Adidas"], types=["Sneakers", "Chaussures"])
+    assert classifier.classify("Hugo Boss polo") == {"brand": None, "type": None, "category": "Vêtements"}
+    assert classifier.classify("adidas x nike shoes")["brand"] == "Nike"
+    with pytest.raises(ValueError):
+        KeywordClassifier.from_file(brands=["Inconnue"])
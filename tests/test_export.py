@@ -0,0 +1,81 @@
+"""Livraison des exports CSV : BOM, gzip, archive zip."""
+import csv
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from backend.export import UTF8_BOM, gzip_chunks, iter_csv, package_export, zip_chunks
+
+COLUMNS = ["Nom", "Prix"]
+ROWS = [{"Nom": f"Polo piqué {i}", "Prix": f"{95 + i}.00"} for i in range(1200)]
+
+
+def read_csv(data):
+    return list(csv.DictReader(io.StringIO(data.decode("utf-8-sig")), delimiter=";"))
+
+
+def test_iter_csv_chunks_and_bom():
+    chunks = list(iter_csv(ROWS, COLUMNS, chunk_rows=500))
+    assert len(chunks) == 3
+    assert not chunks[0].startswith(UTF8_BOM)
+    assert read_csv(b"".join(chunks)) == ROWS
+    with_bom = b"".join(iter_csv(ROWS, COLUMNS, bom=True))
+    assert with_bom.startswith(UTF8_BOM + "Nom;Prix".encode())
+    assert read_csv(with_bom) == ROWS
+
+
+def test_gzip_stream_round_trips():
+    chunks = [b"a" * 1000, b"", "é".encode() * 500]
+    assert gzip.decompress(b"".join(gzip_chunks(iter(chunks)))) == b"".join(chunks)
+
+
+def test_zip_stream_is_a_valid_archive():
+    files = [("produits.csv", iter_csv(ROWS, COLUMNS, bom=True)), ("declinaisons.csv", iter([b"a;b\n", b"1;2\n"]))]
+    data = b"".join(zip_chunks(files))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["produits.csv", "declinaisons.csv"]
+        assert read_csv(archive.read("produits.csv")) == ROWS
+        assert archive.read("declinaisons.csv") == b"a;b\n1;2\n"
+
+
+def test_zip_is_produced_incrementally():
+    produced = []
+
+    def rows():
+        for i in range(5):
+            produced.append(i)
+            yield b"x" * 100000
+
+    stream = zip_chunks([("gros.csv", rows())])
+    next(stream)
+    # Le premier bloc sort avant que tout le fichier soit lu
+    assert len(produced) < 5
+
+
+@pytest.mark.parametrize("fmt, media_type, filename", [
+    ("csv", "text/csv; charset=utf-8", "export.csv"),
+    ("gzip", "application/gzip", "export.csv.gz"),
+])
+def test_package_single_file(fmt, media_type, filename):
+    chunks, actual_type, actual_name = package_export([("export.csv", iter_csv(ROWS, COLUMNS))], fmt)
+    data = b"".join(chunks)
+    assert (actual_type, actual_name) == (media_type, filename)
+    assert read_csv(gzip.decompress(data) if fmt == "gzip" else data) == ROWS
+
+
+def test_package_zip_bundle():
+    files = [("a.csv", iter([b"1\n"])), ("b.csv", iter([b"2\n"]))]
+    chunks, media_type, filename = package_export(files, "zip", archive_name="catalogue")
+    assert (media_type, filename) == ("application/zip", "catalogue.zip")
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.read("b.csv") == b"2\n"
+
+
+def test_package_rejects_bad_requests():
+    with pytest.raises(ValueError):
+        package_export([("a.csv", iter([]))], "xlsx")
+    with pytest.raises(ValueError):
+        package_export([("a.csv", iter([])), ("b.csv", iter([]))], "gzip")
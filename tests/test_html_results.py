@@ -0,0 +1,94 @@
+"""Extraction en flux des résultats DuckDuckGo, sur les pages enregistrées des benchmarks."""
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from backend.html_results import aextract_results, extract_results
+
+FIXTURES = Path(__file__).resolve().parent.parent / "backend" / "benchmarks" / "fixtures"
+
+
+def page(name):
+    return (FIXTURES / f"duckduckgo_{name}.html").read_text(encoding="utf-8")
+
+
+def chunked(text, size, consumed=None):
+    """Page découpée en morceaux ; `consumed` compte les morceaux lus"""
+    for start in range(0, len(text), size):
+        if consumed is not None:
+            consumed.append(start)
+        yield text[start:start + size]
+
+
+async def achunked(text, size, consumed=None):
+    for chunk in chunked(text, size, consumed):
+        await asyncio.sleep(0)
+        yield chunk
+
+
+def test_titles_links_and_snippets():
+    results = extract_results([page("nike_sneakers")])
+    assert len(results) == 5
+    first = results[0]
+    assert first["title"] == "Nike Air Force 1 '07 Men's Shoes - DH2987-100"
+    # Entités décodées dans l'URL
+    assert first["url"].startswith("//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.nike.com%2F")
+    assert "&amp;" not in first["url"] and "&rut=" in first["url"]
+    assert first["snippet"].endswith("€119.99.")
+    # Balises internes (<b>) et sauts de ligne aplatis
+    assert results[1]["snippet"] == ("Buy and sell StockX Verified Nike shoes on StockX including the "
+                                     "Nike Air Force 1 Low '07 White. SKU DH2987-100. Retail price $110.")
+    assert results[3]["title"] == "DH2987-100 Nike Air Force 1 - Sneaker Database"
+    assert all(result["title"] and result["url"] and result["snippet"] for result in results)
+
+
+@pytest.mark.parametrize("limit", [1, 3, 10])
+def test_limit_cuts_results(limit):
+    results = extract_results([page("lacoste_polo")], limit=limit)
+    assert len(results) == limit
+    assert results == extract_results([page("lacoste_polo")], limit=100)[:limit]
+    assert results[0]["title"] == "Lacoste Polo L.12.12 Classic Fit en petit piqué - 3608077027028"
+
+
+def test_whole_page_when_limit_exceeds_results():
+    assert len(extract_results([page("nike_sneakers")], limit=100)) == 26
+    assert len(extract_results([page("lacoste_polo")], limit=100)) == 30
+
+
+def test_page_without_results():
+    assert extract_results([page("no_results")]) == []
+
+
+@pytest.mark.parametrize("size", [1, 7, 512, 16384])
+def test_chunk_boundaries_do_not_change_results(size):
+    text = page("lacoste_polo")
+    assert extract_results(chunked(text, size)) == extract_results([text])
+
+
+def test_stops_reading_after_limit():
+    text = page("nike_sneakers")
+    consumed = []
+    results = extract_results(chunked(text, 1024, consumed), limit=3)
+    assert len(results) == 3
+    assert len(consumed) < len(text) // 1024 / 2
+
+    consumed_all = []
+    extract_results(chunked(text, 1024, consumed_all), limit=100)
+    assert len(consumed_all) == -(-len(text) // 1024)
+
+
+def test_async_variant_matches_and_stops_early():
+    text = page("lacoste_polo")
+    consumed = []
+    results = asyncio.run(aextract_results(achunked(text, 1024, consumed), limit=2))
+    assert results == extract_results([text], limit=2)
+    assert len(consumed) < len(text) // 1024 / 2
+    assert asyncio.run(aextract_results(achunked(page("no_results"), 256))) == []
+
+
+def test_title_cut_by_end_of_stream_is_dropped():
+    text = page("nike_sneakers")
+    cut = text.index('class="result__a"', text.index('class="result__a"') + 1)
+    results = extract_results([text[:cut + 40]])
+    assert [result["title"] for result in results] == ["Nike Air Force 1 '07 Men's Shoes - DH2987-100"]
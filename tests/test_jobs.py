@@ -0,0 +1,72 @@
+"""File de tâches persistée : réservation atomique et bail entre plusieurs processus."""
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+from jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def job(job_id, status=QUEUED, attempts=0, **fields):
+    now = datetime.utcnow()
+    return dict({"id": job_id, "status": status, "payload": {}, "stages": {"search": "pending"}, "progress": 0,
+                 "attempts": attempts, "result": None, "error": None, "created_at": now, "updated_at": now},
+                **fields)
+
+
+def test_each_job_runs_once_across_processes(mongo_collection):
+    jobs = mongo_collection("jobs")
+    runs = Counter()
+
+    async def handler(context):
+        runs[context.job["id"]] += 1
+        await context.stage("search", DONE)
+        # Plus long que le bail : le battement de cœur doit le prolonger
+        await asyncio.sleep(context.payload.get("sleep", 0.01))
+        return {"ok": True}
+
+    now = datetime.utcnow()
+    jobs.sync.insert_many([
+        job("en-attente"),
+        job("long", payload={"sleep": 0.5}),
+        job("abandonnee", RUNNING, attempts=1, owner="mort", lease_until=now - timedelta(seconds=5)),
+        job("ailleurs", RUNNING, attempts=1, owner="vivant", lease_until=now + timedelta(minutes=5)),
+    ])
+
+    async def main():
+        # Quatre processus uvicorn qui redémarrent en même temps
+        queues = [JobQueue(jobs, handler, ["search"], concurrency=3, lease_seconds=0.15) for _ in range(4)]
+        for queue in queues:
+            await queue.start()
+        await asyncio.sleep(0.9)
+        for queue in queues:
+            await queue.stop()
+
+    asyncio.run(main())
+    assert runs == {"en-attente": 1, "long": 1, "abandonnee": 1}
+    docs = {doc["id"]: doc for doc in jobs.sync.find()}
+    assert docs["long"]["status"] == DONE and docs["long"]["progress"] == 100
+    assert docs["abandonnee"]["attempts"] == 2
+    assert docs["ailleurs"]["status"] == RUNNING and docs["ailleurs"]["owner"] == "vivant"
+
+
+def test_attempt_limit_and_graceful_stop(mongo_collection):
+    jobs = mongo_collection("jobs")
+    jobs.sync.insert_one(job("epuisee", RUNNING, attempts=3, lease_until=datetime.utcnow() - timedelta(seconds=1)))
+
+    async def handler(context):
+        await asyncio.sleep(10)
+
+    async def main():
+        queue = JobQueue(jobs, handler, ["search"], concurrency=1, max_attempts=3)
+        await queue.start()
+        await queue.submit({"ean": "3614270000001"})
+        await asyncio.sleep(0.1)
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(main())
+    exhausted = jobs.sync.find_one({"id": "epuisee"})
+    assert exhausted["status"] == FAILED and queue.failed == 1
+    # Arrêt pendant l'exécution : tâche rendue à la file, tentative non comptée
+    stopped = jobs.sync.find_one({"payload.ean": "3614270000001"})
+    assert stopped["status"] == QUEUED and stopped["attempts"] == 0 and stopped["lease_until"] is None
@@ -0,0 +1,95 @@
+"""Listes paginées de backend/server.py : ETag / 304, filtres, curseur et projection."""
+import importlib
+
+import pytest
+
+from backend.storage import ProductStore
+
+
+def entry(i, brand="Nike", ptype="Sneakers"):
+    return {
+        "product": {"id": f"p{i}", "ean": f"36142700{i:05d}", "sku": f"SKU{i}", "name": f"Produit {i}",
+                    "brand": brand, "type": ptype, "description": f"Description {i}",
+                    "price": 50.0 + i, "created_at": f"2024-01-{i % 28 + 1:02d}"},
+        "sheet": {"id": f"s{i}", "status": "draft"},
+    }
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Application sur un journal temporaire (l'import migre products.json vers PRODUCTS_LOG)"""
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setenv("PRODUCTS_LOG", str(tmp_path / "boot.jsonl"))
+    server = importlib.import_module("backend.server")
+    store = ProductStore(tmp_path / "products.jsonl")
+    monkeypatch.setattr(server, "store", store)
+    store.append_many([entry(i, brand="Lacoste" if i % 3 == 0 else "Nike") for i in range(1, 13)])
+    return TestClient(server.app), store
+
+
+def test_if_none_match_returns_304_until_the_store_changes(app):
+    client, store = app
+    first = client.get("/api/products?brand=nike&limit=3")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    cached = client.get("/api/products?brand=nike&limit=3", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+    # Liste de validateurs et ETag faible acceptés
+    assert client.get("/api/products?brand=nike&limit=3",
+                      headers={"If-None-Match": f'"autre", W/{etag}'}).status_code == 304
+    # Autre requête : autre ETag
+    assert client.get("/api/products?brand=nike&limit=4", headers={"If-None-Match": etag}).status_code == 200
+
+    store.append(entry(99))
+    changed = client.get("/api/products?brand=nike&limit=3", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_filtered_pages_follow_the_cursor(app):
+    client, _ = app
+    seen, cursor = [], None
+    while True:
+        url = "/api/products?brand=Nike&limit=3" + (f"&cursor={cursor}" if cursor else "")
+        body = client.get(url).json()
+        assert body["success"] is True
+        assert len(body["products"]) <= 3
+        seen += [product["id"] for product in body["products"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"p{i}" for i in range(1, 13) if i % 3]
+
+    sheets = client.get("/api/sheets?brand=lacoste").json()
+    assert [sheet["id"] for sheet in sheets["sheets"]] == ["s3", "s6", "s9", "s12"]
+    assert sheets["sheets"][0]["title"] == "Lacoste Produit 3"
+    assert sheets["next_cursor"] is None
+
+
+def test_fields_projection_keeps_id(app):
+    client, _ = app
+    body = client.get("/api/products?limit=2&fields=name, price").json()
+    assert body["products"] == [
+        {"id": "p1", "name": "Produit 1", "price": 51.0},
+        {"id": "p2", "name": "Produit 2", "price": 52.0},
+    ]
+    sheets = client.get("/api/sheets?limit=1&fields=ean").json()
+    assert sheets["sheets"] == [{"id": "s1", "ean": "3614270000001"}]
+
+
+@pytest.mark.parametrize("query, detail", [
+    ("limit=0", "limit doit être positif"),
+    ("cursor=pas-un-curseur", "Curseur invalide"),
+    ("date_from=hier", "date_from"),
+])
+def test_invalid_listing_parameters_return_400(app, query, detail):
+    client, _ = app
+    response = client.get(f"/api/products?{query}")
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
@@ -0,0 +1,132 @@
+"""Client LLM sur le backend factice : concurrence bornée, fusion et compteurs."""
+import asyncio
+import json
+
+import pytest
+
+from llm import FakeLLMBackend, LLMClient, LLMCacheMiss, ReplayBackend, create_llm_client
+from llm_cache import ResponseCache
+
+
+class CountingBackend(FakeLLMBackend):
+    """Backend factice qui relève le nombre d'appels et le pic d'appels simultanés"""
+
+    def __init__(self, latency=0.01):
+        super().__init__(latency=latency, jitter=0.0)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def complete(self, model, prompt, temperature, max_tokens, kind):
+        self.calls.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().complete(model, prompt, temperature, max_tokens, kind)
+        finally:
+            self.active -= 1
+
+
+class FailingBackend(CountingBackend):
+    async def complete(self, model, prompt, temperature, max_tokens, kind):
+        self.calls.append(prompt)
+        raise ConnectionError("API injoignable")
+
+
+def complete(client, prompt, kind="product"):
+    return client.complete(prompt, kind=kind, temperature=0.2, max_tokens=500)
+
+
+def test_concurrency_is_bounded():
+    async def scenario():
+        backend = CountingBackend()
+        client = LLMClient(backend, max_concurrency=3)
+        results = await asyncio.gather(*(complete(client, f"EAN {i}") for i in range(10)))
+        assert len(set(results)) == 10
+        assert len(backend.calls) == 10
+        assert backend.peak == 3
+        assert client.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_identical_concurrent_requests_share_one_call():
+    async def scenario():
+        backend = CountingBackend()
+        client = LLMClient(backend, max_concurrency=4)
+        results = await asyncio.gather(*(complete(client, "EAN 3608077027028") for _ in range(8)))
+        assert len(set(results)) == 1
+        assert backend.calls == ["EAN 3608077027028"]
+        stats = client.stats()
+        assert (stats["calls"], stats["coalesced"]) == (1, 7)
+        # Une fois terminé, le même prompt repart vers le backend (pas de cache ici)
+        await complete(client, "EAN 3608077027028")
+        assert len(backend.calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_counters_add_up():
+    async def scenario():
+        backend = CountingBackend()
+        client = LLMClient(backend, max_concurrency=2)
+        contents = await asyncio.gather(complete(client, "a" * 400), complete(client, "b" * 80, kind="sheet"))
+        stats = client.stats()
+        assert stats["backend"] == "fake"
+        assert stats["calls"] == 2 and stats["errors"] == 0
+        assert stats["prompt_tokens"] == 100 + 20
+        assert stats["completion_tokens"] == sum(len(content) // 4 for content in contents)
+        assert [call["kind"] for call in stats["recent_calls"]] == ["product", "sheet"]
+        assert stats["avg_latency_ms"] >= 10.0
+        assert stats["p50_latency_ms"] >= 10.0
+
+    asyncio.run(scenario())
+
+
+def test_errors_are_counted_and_reach_every_waiter():
+    async def scenario():
+        backend = FailingBackend()
+        client = LLMClient(backend)
+        results = await asyncio.gather(*(complete(client, "EAN 1") for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert len(backend.calls) == 1
+        stats = client.stats()
+        assert (stats["calls"], stats["errors"], stats["coalesced"]) == (0, 1, 2)
+
+    asyncio.run(scenario())
+
+
+def test_complete_json_is_served_from_cache(tmp_path):
+    async def scenario():
+        backend = CountingBackend()
+        client = LLMClient(backend, cache=ResponseCache(tmp_path / "llm.sqlite3"))
+        first = await client.complete_json("EAN 42", kind="product", temperature=0.2, max_tokens=500)
+        again = await client.complete_json("EAN 42", kind="product", temperature=0.2, max_tokens=500)
+        assert first == again and first["brand"] == "Nike"
+        assert len(backend.calls) == 1
+        stats = client.stats()
+        assert stats["calls"] == 1 and stats["cache"]["entries"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_fake_combined_payload_is_valid_json():
+    async def scenario():
+        content, usage = await FakeLLMBackend(latency=0, jitter=0).complete("m", "EAN 7", 0.2, 800, "combined")
+        payload = json.loads(content)
+        assert set(payload) == {"product", "sheet"}
+        assert "export_data" not in payload["sheet"]
+        assert usage["completion_tokens"] == len(content) // 4
+
+    asyncio.run(scenario())
+
+
+def test_create_llm_client_backends(tmp_path):
+    assert create_llm_client("openai", "your_openai_key_here") is None
+    assert create_llm_client("fake", None).backend.name == "fake"
+    # Le backend factice ne passe pas par le cache
+    assert create_llm_client("fake", None, cache=ResponseCache(tmp_path / "a.sqlite3")).cache is None
+    replay = create_llm_client("replay", None, cache=ResponseCache(tmp_path / "b.sqlite3"))
+    assert isinstance(replay.backend, ReplayBackend)
+    with pytest.raises(LLMCacheMiss):
+        asyncio.run(complete(replay, "EAN 9"))
@@ -0,0 +1,42 @@
+"""Cache disque des réponses LLM."""
+import threading
+
+from llm_cache import MISS, ResponseCache
+
+
+def test_cache_hits_and_evicts(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite3", max_bytes=300)
+    assert cache.get("a") is MISS
+    cache.set("a", "product", {"name": "Polo piqué"})
+    assert cache.get("a") == {"name": "Polo piqué"}
+    for i in range(20):
+        cache.set(f"k{i}", "sheet", {"text": "x" * 30})
+    stats = cache.stats()
+    assert stats["bytes"] <= 300 and stats["evictions"] > 0
+    assert cache.get("k19") == {"text": "x" * 30}
+    cache.close()
+
+
+def test_cache_is_usable_from_other_threads(tmp_path):
+    cache = ResponseCache(tmp_path / "llm.sqlite3")
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(50):
+                cache.set(f"{n}-{i}", "product", {"i": i})
+                assert cache.get(f"{n}-{i}") == {"i": i}
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(cache) == 200
+    # Fermeture depuis un autre thread, comme le hook d'arrêt
+    closer = threading.Thread(target=cache.close)
+    closer.start()
+    closer.join()
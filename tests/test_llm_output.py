@@ -0,0 +1,100 @@
+"""Réponses JSON du LLM : extraction, réparations et conformité au modèle."""
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytest
+from pydantic import BaseModel, Field
+
+from llm_output import OutputError, OutputStats, conform, conform_sections, extract_json
+
+
+class Product(BaseModel):
+    id: str = "généré"
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    name: str
+    brand: str
+    price: float
+    sizes: List[str] = []
+    original_price: Optional[float] = None
+    characteristics: Dict[str, str] = {}
+
+
+class Sheet(BaseModel):
+    product_id: str
+    title: str
+
+
+def test_valid_json_takes_the_fast_path():
+    assert extract_json('{"name": "Polo", "price": 95}') == ({"name": "Polo", "price": 95}, [])
+
+
+def test_fenced_block_with_surrounding_text():
+    content = 'Voici la fiche :\n```json\n{"name": "Polo {L}", "sizes": ["S"]}\n```\nBonne journée !'
+    assert extract_json(content) == ({"name": "Polo {L}", "sizes": ["S"]}, ["surrounding_text"])
+
+
+@pytest.mark.parametrize("content, expected, repairs", [
+    ('{"name": "Polo", "sizes": ["S", "M",],}', {"name": "Polo", "sizes": ["S", "M"]}, ["trailing_comma"]),
+    ('{"description": "ligne 1\nligne 2"}', {"description": "ligne 1\nligne 2"}, ["control_chars"]),
+    ('{"stock": True, "promo": None}', {"stock": True, "promo": None}, ["python_literal"]),
+    ("{'name': 'Polo', 'price': 95}", {"name": "Polo", "price": 95}, ["python_dict"]),
+])
+def test_common_defects_are_repaired(content, expected, repairs):
+    assert extract_json(content) == (expected, repairs)
+
+
+def test_truncated_response_is_closed():
+    data, repairs = extract_json('{"name": "Polo", "sizes": ["S", "M"], "description": "Coton pi')
+    assert data == {"name": "Polo", "sizes": ["S", "M"], "description": "Coton pi"}
+    assert repairs == ["truncated"]
+    # Clé orpheline en fin de réponse coupée : écartée
+    data, _ = extract_json('{"name": "Polo", "price": ')
+    assert data == {"name": "Polo"}
+
+
+@pytest.mark.parametrize("content", ["Désolé, je ne peux pas.", "[1, 2]", '{"name": Polo}', '{"a": 1, "b" 2}'])
+def test_unusable_responses_raise(content):
+    with pytest.raises(OutputError):
+        extract_json(content)
+
+
+def test_conform_drops_managed_and_unknown_fields():
+    data = {"id": "du-llm", "created_at": "hier", "name": "Polo", "brand": "Lacoste", "price": 95.0, "note": "x"}
+    result, repairs = conform(data, Product)
+    assert result == {"name": "Polo", "brand": "Lacoste", "price": 95.0}
+    assert repairs == ["managed_fields"]
+
+
+def test_conform_coerces_common_types():
+    data = {"name": "Polo", "brand": 1933, "price": "179,99 €", "sizes": "S, M ,L", "original_price": "",
+            "characteristics": {"Poids": 0.3}}
+    result, repairs = conform(data, Product)
+    assert result == {"name": "Polo", "brand": "1933", "price": 179.99, "sizes": ["S", "M", "L"],
+                      "original_price": None, "characteristics": {"Poids": "0.3"}}
+    assert repairs == ["types"]
+
+
+def test_conform_uses_application_fields():
+    result, repairs = conform({"product_id": "du-llm", "title": "Polo"}, Sheet, fixed={"product_id": "p1"})
+    assert result == {"title": "Polo"}
+    assert repairs == ["managed_fields"]
+    with pytest.raises(OutputError):
+        conform({"name": "Polo", "brand": "Lacoste", "price": "sur demande"}, Product)
+
+
+def test_conform_sections():
+    data = {"product": {"name": "Polo", "brand": "Lacoste", "price": "95 €"}, "sheet": {"title": "Polo"}}
+    result, repairs = conform_sections(data, {"product": Product, "sheet": Sheet}, {"sheet": {"product_id": "p1"}})
+    assert result == {"product": {"name": "Polo", "brand": "Lacoste", "price": 95.0}, "sheet": {"title": "Polo"}}
+    assert repairs == ["types"]
+    with pytest.raises(OutputError):
+        conform_sections({"product": data["product"]}, {"product": Product, "sheet": Sheet})
+
+
+def test_output_stats():
+    stats = OutputStats()
+    stats.record([])
+    stats.record(["trailing_comma", "surrounding_text"])
+    stats.failed += 1
+    assert stats.stats() == {"responses": 3, "fast_path": 1, "repaired": 1, "failed": 1, "retry_rate_saved": 0.333,
+                             "repairs": {"trailing_comma": 1, "surrounding_text": 1}}
@@ -0,0 +1,153 @@
+"""Caches EAN à deux niveaux : SQLite (backend) et MongoDB (github_export)."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import lookup_cache as mongo_cache
+from backend import lookup_cache as sqlite_cache
+
+
+class Clock:
+    """Remplace le module time des caches pour faire avancer l'horloge"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sqlite_cache, "time", clock)
+    monkeypatch.setattr(mongo_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    return sqlite_cache.SQLiteStore(tmp_path / "lookup.sqlite3")
+
+
+def test_sqlite_cache_expires_after_ttl(clock, sqlite_store):
+    cache = sqlite_cache.LookupCache(sqlite_store, ttls={"search": 60})
+    cache.set("search", "3 61 0000 00000 1", {"items": [1]})
+    # Même clé une fois le code normalisé
+    assert cache.get("search", "3610000000001") == {"items": [1]}
+    clock.now += 59
+    assert cache.get("search", "3610000000001") == {"items": [1]}
+    clock.now += 2
+    assert cache.get("search", "3610000000001") is sqlite_cache.MISS
+
+
+def test_sqlite_cache_negative_hits_use_shorter_ttl(clock, sqlite_store):
+    cache = sqlite_cache.LookupCache(sqlite_store, ttls={"extract": 3600}, negative_ttl=60)
+    cache.set("extract", "123", None)
+    assert cache.get("extract", "123") is None
+    clock.now += 61
+    assert cache.get("extract", "123") is sqlite_cache.MISS
+    assert cache.stats()["namespaces"]["extract"]["negative_hits"] == 1
+
+
+def test_sqlite_cache_promotes_store_hits_to_memory(clock, sqlite_store):
+    sqlite_cache.LookupCache(sqlite_store, ttls={"ai": 600}).set("ai", "123", {"name": "Polo"})
+    # Nouveau processus : mémoire vide, la base sur disque est conservée
+    cache = sqlite_cache.LookupCache(sqlite_store, ttls={"ai": 600})
+    assert len(cache.memory) == 0
+    assert cache.get("ai", "123") == {"name": "Polo"}
+    assert len(cache.memory) == 1
+    assert cache.get("ai", "123") == {"name": "Polo"}
+    # L'entrée promue garde l'échéance du disque, pas un TTL complet
+    clock.now += 601
+    assert cache.get("ai", "123") is sqlite_cache.MISS
+    counters = cache.stats()["namespaces"]["ai"]
+    assert (counters["store_hits"], counters["memory_hits"], counters["misses"]) == (1, 1, 1)
+
+
+def test_sqlite_cache_stats_hit_rate(clock, sqlite_store):
+    cache = sqlite_cache.LookupCache(sqlite_store)
+    assert cache.get("search", "1") is sqlite_cache.MISS
+    cache.set("search", "1", {"items": []})
+    cache.set("search", "2", None)
+    cache.get("search", "1")
+    cache.get("search", "2")
+    cache.get("search", "1")
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert stats["namespaces"]["search"] == {
+        "memory_hits": 3, "store_hits": 0, "negative_hits": 1, "misses": 1, "hit_rate": 0.75
+    }
+
+
+def test_sqlite_store_purges_expired_rows(clock, sqlite_store):
+    cache = sqlite_cache.LookupCache(sqlite_store, ttls={"search": 60})
+    cache.set("search", "1", {"items": [1]})
+    cache.set("search", "2", None)
+    clock.now += 3601
+    assert sqlite_store.purge_expired() == 2
+
+
+def test_mongo_cache_expires_after_ttl(clock, mongo_collection):
+    async def scenario():
+        collection = mongo_collection("lookup_cache")
+        cache = mongo_cache.LookupCache(collection, ttls={"search": 60})
+        await cache.set("search", "3610000000001", {"items": [1]})
+        assert await cache.get("search", "3610000000001") == {"items": [1]}
+        clock.now += 61
+        # Mémoire expirée ; le document est à son tour échu côté MongoDB
+        collection.sync.update_one({}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+        assert await cache.get("search", "3610000000001") is mongo_cache.MISS
+
+    asyncio.run(scenario())
+
+
+def test_mongo_cache_negative_hits_use_shorter_ttl(clock, mongo_collection):
+    async def scenario():
+        collection = mongo_collection("lookup_cache")
+        cache = mongo_cache.LookupCache(collection, ttls={"extract": 3600}, negative_ttl=60)
+        await cache.set("extract", "123", None)
+        assert await cache.get("extract", "123") is None
+        doc = collection.sync.find_one({"_id": "extract:123"})
+        assert doc["value"] == {"__miss__": True}
+        assert doc["expires_at"] - datetime.utcnow() < timedelta(seconds=61)
+        clock.now += 61
+        assert cache.memory.get("extract:123") is mongo_cache.MISS
+        assert cache.stats()["namespaces"]["extract"]["negative_hits"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_mongo_cache_promotes_store_hits_to_memory(clock, mongo_collection):
+    async def scenario():
+        collection = mongo_collection("lookup_cache")
+        await mongo_cache.LookupCache(collection, ttls={"ai": 600}).set("ai", "123", {"name": "Polo"})
+        cache = mongo_cache.LookupCache(collection, ttls={"ai": 600})
+        assert await cache.get("ai", "123") == {"name": "Polo"}
+        assert len(cache.memory) == 1
+        collection.sync.delete_many({})
+        # Servi par la mémoire sans relire MongoDB
+        assert await cache.get("ai", "123") == {"name": "Polo"}
+        counters = cache.stats()["namespaces"]["ai"]
+        assert (counters["store_hits"], counters["memory_hits"], counters["hit_rate"]) == (1, 1, 1.0)
+
+    asyncio.run(scenario())
+
+
+def test_mongo_cache_survives_store_errors(clock):
+    class DownCollection:
+        async def find_one(self, *args, **kwargs):
+            raise ConnectionError("MongoDB injoignable")
+
+        async def replace_one(self, *args, **kwargs):
+            raise ConnectionError("MongoDB injoignable")
+
+    async def scenario():
+        cache = mongo_cache.LookupCache(DownCollection())
+        assert await cache.get("search", "1") is mongo_cache.MISS
+        await cache.set("search", "1", {"items": [1]})
+        assert await cache.get("search", "1") == {"items": [1]}
+        assert cache.stats()["namespaces"]["search"]["hit_rate"] == 0.5
+
+    asyncio.run(scenario())
@@ -0,0 +1,85 @@
+"""Pagination par curseur (keyset) des listes MongoDB."""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from pagination import decode_cursor, encode_cursor, fetch_page, keyset_query
+
+T0 = datetime(2024, 3, 1, 12, 0, 0, 123000)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"created_at": T0, "id": "p-42"})
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (T0, "p-42")
+
+
+@pytest.mark.parametrize("cursor", ["", "pas un curseur", "e30", encode_cursor({"created_at": T0, "id": 1})[:-3]])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_keyset_query_combines_with_filter():
+    cursor = encode_cursor({"created_at": T0, "id": "b"})
+    after = {"$or": [{"created_at": {"$lt": T0}}, {"created_at": T0, "id": {"$lt": "b"}}]}
+    assert keyset_query({}, None) == {}
+    assert keyset_query({}, cursor) == after
+    assert keyset_query({"status": "draft"}, cursor) == {"$and": [{"status": "draft"}, after]}
+
+
+def seed(collection, count):
+    # Trois documents par horodatage : `id` départage les égalités
+    docs = [{"id": f"p{i:03d}", "created_at": T0 + timedelta(milliseconds=i // 3), "status": "draft" if i % 2 else "ok"}
+            for i in range(count)]
+    collection.sync.insert_many(docs)
+    return sorted(docs, key=lambda doc: (doc["created_at"], doc["id"]), reverse=True)
+
+
+def walk(collection, query, limit):
+    async def run():
+        ids, cursor = [], None
+        while True:
+            docs, cursor = await fetch_page(collection, query, limit, cursor=cursor)
+            ids += [doc["id"] for doc in docs]
+            if cursor is None:
+                return ids
+    return asyncio.run(run())
+
+
+def test_pages_follow_sort_order_without_gaps_or_repeats(mongo_collection):
+    products = mongo_collection("products")
+    expected = seed(products, 31)
+    assert walk(products, {}, 4) == [doc["id"] for doc in expected]
+    assert walk(products, {"status": "draft"}, 5) == [doc["id"] for doc in expected if doc["status"] == "draft"]
+
+
+def test_insert_during_walk_does_not_shift_pages(mongo_collection):
+    products = mongo_collection("products")
+    expected = seed(products, 10)
+
+    async def run():
+        first, cursor = await fetch_page(products, {}, 4)
+        # Un document plus récent arrive entre deux pages : il n'est ni relu ni décalé
+        products.sync.insert_one({"id": "nouveau", "created_at": T0 + timedelta(days=1)})
+        second, _ = await fetch_page(products, {}, 4, cursor=cursor)
+        return first + second
+
+    assert [doc["id"] for doc in asyncio.run(run())] == [doc["id"] for doc in expected[:8]]
+
+
+def test_offset_only_applies_without_cursor(mongo_collection):
+    products = mongo_collection("products")
+    expected = seed(products, 10)
+
+    async def run():
+        skipped, cursor = await fetch_page(products, {}, 3, offset=2)
+        resumed, _ = await fetch_page(products, {}, 3, offset=2, cursor=cursor)
+        _, end = await fetch_page(products, {}, 20)
+        return skipped, resumed, end
+
+    skipped, resumed, end = asyncio.run(run())
+    assert [doc["id"] for doc in skipped] == [doc["id"] for doc in expected[2:5]]
+    assert [doc["id"] for doc in resumed] == [doc["id"] for doc in expected[5:8]]
+    assert end is None
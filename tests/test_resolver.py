@@ -0,0 +1,73 @@
+"""Résolution multi-sources : premier résultat fiable, échéance, erreurs."""
+import asyncio
+
+import pytest
+
+from backend.resolver import ResolverStats, resolve_first
+
+
+def source(result, delay=0.0, error=None, log=None, name=None):
+    async def run():
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if log is not None:
+                log.append(name)
+            raise
+        if error is not None:
+            raise error
+        return result
+    return run()
+
+
+def resolve(sources, deadline=1.0, threshold=70):
+    return asyncio.run(resolve_first(sources, deadline, threshold))
+
+
+def test_first_confident_source_wins_and_stragglers_are_cancelled():
+    cancelled = []
+    best, winner, timings = resolve([
+        ("lente", source({"confidence": 95}, delay=5, log=cancelled, name="lente")),
+        ("rapide", source({"confidence": 90}, delay=0.01)),
+        ("faible", source({"confidence": 10})),
+    ])
+    assert (best, winner) == ({"confidence": 90}, "rapide")
+    assert cancelled == ["lente"]
+    assert timings["lente"]["status"] == "cancelled"
+    assert timings["faible"]["status"] == "miss"
+    assert timings["rapide"]["status"] == "hit"
+
+
+def test_simultaneous_results_follow_source_order():
+    _, winner, _ = resolve([("a", source({"confidence": 80})), ("b", source({"confidence": 99}))])
+    assert winner == "a"
+
+
+def test_source_error_falls_through_to_next_source():
+    best, winner, timings = resolve([
+        ("cassée", source(None, error=RuntimeError("HTTP 500"))),
+        ("secours", source({"confidence": 75}, delay=0.01)),
+    ])
+    assert winner == "secours" and best == {"confidence": 75}
+    assert timings["cassée"]["status"] == "error"
+
+
+def test_deadline_returns_none_with_timeout_timings():
+    best, winner, timings = resolve([
+        ("lente", source({"confidence": 95}, delay=5)),
+        ("vide", source(None)),
+    ], deadline=0.05)
+    assert (best, winner) == (None, None)
+    assert timings["lente"]["status"] == "timeout"
+    assert timings["vide"]["status"] == "miss"
+    stats = ResolverStats()
+    stats.record(winner, timings)
+    assert stats.stats()["unresolved"] == 1
+
+
+@pytest.mark.parametrize("deadline", [0, -1])
+def test_non_positive_deadline_is_rejected(deadline):
+    coro = source({"confidence": 95})
+    with pytest.raises(ValueError):
+        resolve([("a", coro)], deadline=deadline)
+    coro.close()
@@ -0,0 +1,94 @@
+"""Sérialisation JSON rapide et compression sélective des réponses."""
+import gzip
+import io
+import json
+import zipfile
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from backend import responses
+from backend.responses import CompressionMiddleware, FastJSONResponse
+
+PAYLOAD = {
+    "success": True,
+    "products": [{"id": f"p{i}", "name": f"Polo piqué {i}", "price": 95.5 + i, "sizes": ["S", "M"], "stock": None}
+                 for i in range(50)],
+    "next_cursor": None,
+}
+
+
+@pytest.fixture
+def client():
+    pytest.importorskip("httpx")
+    from starlette.testclient import TestClient
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("catalogue.csv", "id;nom\n" * 500)
+
+    async def lines():
+        for i in range(200):
+            yield json.dumps({"ean_code": str(i), "success": True}) + "\n"
+
+    routes = [
+        Route("/json", lambda request: FastJSONResponse(PAYLOAD)),
+        Route("/small", lambda request: FastJSONResponse({"status": "OK"})),
+        Route("/ndjson", lambda request: StreamingResponse(lines(), media_type="application/x-ndjson")),
+        Route("/gzip", lambda request: Response(gzip.compress(b"id;nom\n" * 500), media_type="application/gzip")),
+        Route("/zip", lambda request: Response(archive.getvalue(), media_type="application/zip")),
+    ]
+    app = Starlette(routes=routes)
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def test_json_is_compressed(client):
+    response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == PAYLOAD
+
+
+def test_small_or_unrequested_responses_are_not_compressed(client):
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/json", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_ndjson_stream_passes_through(client):
+    response = client.get("/ndjson", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 200 and json.loads(lines[-1])["ean_code"] == "199"
+
+
+@pytest.mark.parametrize("path, media_type", [("/gzip", "application/gzip"), ("/zip", "application/zip")])
+def test_compressed_files_pass_through_untouched(client, path, media_type):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-type"] == media_type
+    if media_type == "application/gzip":
+        assert gzip.decompress(response.content) == b"id;nom\n" * 500
+    else:
+        with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
+            assert zf.read("catalogue.csv") == b"id;nom\n" * 500
+
+
+@pytest.mark.parametrize("serializer", list(responses.SERIALIZERS))
+def test_fast_json_matches_json_response(monkeypatch, serializer):
+    monkeypatch.setattr(responses, "JSON_SERIALIZER", serializer)
+    content = dict(PAYLOAD, title="Chaussures « été »", ratio=0.1, count=3, nested={"a": [1, 2.5, "é"]})
+    fast = FastJSONResponse(content)
+    reference = JSONResponse(content)
+    assert fast.body == reference.body
+    assert fast.headers["content-type"] == reference.headers["content-type"]
+    assert fast.headers["content-length"] == reference.headers["content-length"]
+
+
+def test_unknown_serializer_can_be_registered(monkeypatch):
+    monkeypatch.setattr(responses, "SERIALIZERS", dict(responses.SERIALIZERS))
+    responses.register_serializer("upper", lambda content: json.dumps(content).upper().encode())
+    monkeypatch.setattr(responses, "JSON_SERIALIZER", "upper")
+    assert FastJSONResponse({"a": "b"}).body == b'{"A": "B"}'
@@ -0,0 +1,107 @@
+"""Fiches PrestaShop : lots en colonnes identiques au calcul unitaire, champs SEO."""
+import pytest
+
+from backend.seo import SeoTemplate, product_slug, slugify, truncate
+from backend.sheets import (generate_prestashop_sheet, import_columns, import_products, prestashop_sheets,
+                            seo_columns)
+
+VOLATILE = ("id", "created_at")
+
+
+def catalogue(count):
+    brands = ["Lacoste", "Nike", "Le Coq Sportif", "Hugo Boss", "Dr. Martens"]
+    types = ["Sneakers", "Polo", "T-shirt", "Sneakers Running"]
+    names = ["Polo Classic Fit Piqué", "Air Max 97", "Œuvre Édition Crème", "", "Sweat-shirt à capuche zippé"]
+    return {
+        "ean": [f"{3614270000000 + i}" for i in range(count)],
+        "name": [f"{names[i % 5]} {i}".strip() if i % 7 else names[i % 5] for i in range(count)],
+        "brand": [brands[i % 5] for i in range(count)],
+        "type": [types[i % 4] for i in range(count)],
+        "price": [49.99 + i for i in range(count)],
+        "description": [("Coton piqué, coupe ajustée, finitions soignées " * (i % 4)).strip() for i in range(count)],
+        "material": [None if i % 3 else "Coton" for i in range(count)],
+        "sizes": [["S", "M", "L", "XL", "XXL", "3XL"] if i % 3 else None for i in range(count)],
+        "colors": [["Blanc", "Marine", "Noir"] if i % 3 else None for i in range(count)],
+    }
+
+
+def stable(sheet):
+    return {key: value for key, value in sheet.items() if key not in VOLATILE}
+
+
+def test_batch_sheets_match_scalar_sheets():
+    columns = catalogue(60)
+    columns["material"] = ["Coton" if i % 3 else "Polyester" for i in range(60)]
+    cols = import_columns(columns)
+    products = import_products(cols)
+    batch = prestashop_sheets(cols)
+    scalar = [generate_prestashop_sheet(product, {"sizes": sizes, "colors": colors})
+              for product, sizes, colors in zip(products, cols["sizes"], cols["colors"])]
+    assert [stable(sheet) for sheet in batch] == [stable(sheet) for sheet in scalar]
+    assert [sheet["product_id"] for sheet in batch] == cols["id"]
+
+
+def test_batch_sheets_do_not_share_mutable_parts():
+    cols = import_columns(catalogue(6))
+    import_products(cols)
+    sheets = prestashop_sheets(cols)
+    sheets[1]["characteristics"]["Matière"] = "modifiée"
+    sheets[1]["variations"][0]["stock"] = 0
+    assert sheets[4]["characteristics"]["Matière"] != "modifiée"
+    assert sheets[4]["variations"][0]["stock"] != 0
+
+
+def test_import_columns_defaults_and_errors():
+    cols = import_columns({"ean": ["3614270000001"], "name": ["Polo"], "brand": ["Lacoste"], "type": ["Polo"],
+                           "price": [95.0], "image": None})
+    assert cols["sku"] == ["SKU36142700"]
+    assert cols["category"] == ["Produits > Divers"]
+    assert cols["sizes"] == [None]
+    with pytest.raises(ValueError, match="manquantes: price"):
+        import_columns({"ean": ["1"], "name": ["a"], "brand": ["b"], "type": ["c"]})
+    with pytest.raises(ValueError, match="longueur"):
+        import_columns({"ean": ["1", "2"], "name": ["a"], "brand": ["b", "b"], "type": ["c", "c"],
+                        "price": [1.0, 2.0]})
+
+
+def test_seo_fields_respect_limits():
+    cols = import_columns(catalogue(40))
+    seo = seo_columns(cols)
+    assert all(len(title) <= 60 for title in seo["seo_title"])
+    assert all(len(description) <= 160 for description in seo["seo_description"])
+    assert all(slug == slugify(slug) for slug in seo["url_slug"])
+
+
+def test_slugify_transliterates_instead_of_dropping():
+    assert slugify("Polo Classic Fit Piqué") == "polo-classic-fit-pique"
+    assert slugify("L'Œuvre & Cie — Ärger / 100%") == "loeuvre-et-cie-arger-100"
+    assert slugify("Кроссовки Nike") == "nike"
+    assert slugify("  --  ") == ""
+    assert slugify("sweat-shirt capuche zippee", 16) == "sweat-shirt"
+
+
+def test_product_slug_cuts_name_between_words():
+    assert product_slug("Le Coq Sportif", "Sweat-shirt à capuche zippé", 20) == "le-coq-sportif-sweat-shirt-a"
+    assert product_slug.cache_info().currsize >= 1
+
+
+def test_truncate_at_word_boundary():
+    assert truncate("Coton piqué, coupe ajustée", 13) == "Coton piqué"
+    assert truncate("Coton", 10) == "Coton"
+    # Un seul mot très long : coupe franche
+    assert truncate("Anticonstitutionnellement", 10) == "Anticonsti"
+
+
+def test_seo_template_limit_and_fallback():
+    title = SeoTemplate("{brand} {name:.30} - Prix {price}€", 40,
+                        fallback=SeoTemplate("{brand} {name:.10} - {price}€", 40))
+    assert title.render(brand="Nike", name="Air Max", price=99.0) == "Nike Air Max - Prix 99.0€"
+    # Titre trop long : gabarit de repli, nom coupé à 10 caractères
+    assert title.render(brand="Le Coq Sportif", name="Chemise Oxford Slim", price=59.99) == \
+        "Le Coq Sportif Chemise - 59.99€"
+    assert title.column(brand=["Nike", "Puma"], name=["Air Max", "Suede"], price=[1, 2]) == \
+        ["Nike Air Max - Prix 1€", "Puma Suede - Prix 2€"]
+    assert SeoTemplate("{name} {{marque}}", 12).render(name="Polo piqué") == "Polo piqué"
+    assert SeoTemplate("{name} {{marque}}").render(name="Polo") == "Polo {marque}"
+    with pytest.raises(ValueError):
+        SeoTemplate("{name}", fallback=SeoTemplate("{brand}"))
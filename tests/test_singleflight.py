@@ -0,0 +1,110 @@
+"""Fusion des appels concurrents (single-flight), copies backend et github_export."""
+import asyncio
+
+import pytest
+
+import singleflight as mongo_singleflight
+from backend import singleflight
+
+
+@pytest.fixture(params=[singleflight, mongo_singleflight], ids=["backend", "github_export"])
+def flight(request):
+    return request.param.SingleFlight("test")
+
+
+class Work:
+    """Appel externe factice : compte ses exécutions et attend qu'on le libère"""
+
+    def __init__(self, result="ok", error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self, *args):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return (self.result, *args)
+
+
+def test_concurrent_callers_share_one_execution(flight):
+    async def scenario():
+        work = Work()
+        callers = [asyncio.ensure_future(flight.do("ean", work, 1)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.in_flight == 1
+        work.release.set()
+        assert await asyncio.gather(*callers) == [("ok", 1)] * 5
+        assert work.calls == 1
+        assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0, "coalesced_ratio": 0.8}
+
+    asyncio.run(scenario())
+
+
+def test_exception_reaches_every_waiter(flight):
+    async def scenario():
+        work = Work(error=ValueError("recherche impossible"))
+        callers = [asyncio.ensure_future(flight.do("ean", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert [str(result) for result in results] == ["recherche impossible"] * 3
+        assert all(isinstance(result, ValueError) for result in results)
+        assert work.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call(flight):
+    async def scenario():
+        work = Work()
+        first = asyncio.ensure_future(flight.do("ean", work))
+        second = asyncio.ensure_future(flight.do("ean", work))
+        await asyncio.sleep(0)
+        # Le premier appelant (celui qui a lancé le travail) se déconnecte
+        first.cancel()
+        await asyncio.sleep(0)
+        assert first.cancelled()
+        assert flight.in_flight == 1
+        work.release.set()
+        assert await second == ("ok",)
+        assert work.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_key_is_released_after_completion(flight):
+    async def scenario():
+        work = Work()
+        work.release.set()
+        assert await flight.do("ean", work) == ("ok",)
+        await asyncio.sleep(0)
+        assert flight.in_flight == 0
+        # Un nouvel appel relance le travail au lieu de resservir l'ancien résultat
+        assert await flight.do("ean", work) == ("ok",)
+        assert work.calls == 2
+        assert flight.stats()["coalesced"] == 0
+
+        failing = Work(error=RuntimeError("panne"))
+        failing.release.set()
+        with pytest.raises(RuntimeError):
+            await flight.do("autre", failing)
+        await asyncio.sleep(0)
+        assert flight.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_distinct_keys_run_independently(flight):
+    async def scenario():
+        work = Work()
+        callers = [asyncio.ensure_future(flight.do(key, work, key)) for key in ("a", "b")]
+        await asyncio.sleep(0)
+        assert flight.in_flight == 2
+        work.release.set()
+        assert await asyncio.gather(*callers) == [("ok", "a"), ("ok", "b")]
+        assert work.calls == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,91 @@
+"""Page d'interface précompressée : choix de l'encodage, Vary et 304."""
+import gzip
+
+import pytest
+from starlette.requests import Request
+
+from backend import static_page
+from backend.static_page import StaticPage, accepted_encodings
+
+HTML = "<html><head><title>Fiches</title></head><body>" + "<p>Produit</p>" * 200 + "</body></html>"
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture
+def page(monkeypatch):
+    # Sans brotli : gzip puis identity, quel que soit l'environnement
+    monkeypatch.setattr(static_page, "brotli", None)
+    return StaticPage(HTML, max_age=60)
+
+
+def test_accepted_encodings_honours_quality():
+    assert accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+    assert accepted_encodings("GZIP;q=0.5, *;q=bad") == {"gzip"}
+    assert accepted_encodings(None) == set()
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate", "gzip"),
+    ("br;q=1, gzip;q=0.8", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("*", "gzip"),
+    ("", "identity"),
+])
+def test_selects_gzip_or_identity(page, accept_encoding, expected):
+    response = page.response(request(accept_encoding=accept_encoding))
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert response.headers["etag"] == page.etags[expected]
+    if expected == "gzip":
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(response.body).decode() == HTML
+    else:
+        assert "content-encoding" not in response.headers
+        assert response.body.decode() == HTML
+
+
+def test_brotli_preferred_when_available():
+    brotli = pytest.importorskip("brotli")
+    page = StaticPage(HTML)
+    assert list(page.variants) == ["br", "gzip", "identity"]
+    response = page.response(request(accept_encoding="gzip, br"))
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.body).decode() == HTML
+    assert page.response(request(accept_encoding="gzip")).headers["content-encoding"] == "gzip"
+
+
+def test_each_variant_has_its_own_strong_etag(page):
+    etags = list(page.etags.values())
+    assert len(set(etags)) == len(etags)
+    assert all(etag.startswith('"') and not etag.startswith("W/") for etag in etags)
+
+
+def test_matching_etag_returns_304(page):
+    etag = page.etags["gzip"]
+    response = page.response(request(accept_encoding="gzip", if_none_match=etag))
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in response.headers
+    # ETag faible (relais) et liste de validateurs
+    weak = page.response(request(accept_encoding="gzip", if_none_match=f'"x", W/{etag}'))
+    assert weak.status_code == 304
+    assert page.response(request(accept_encoding="gzip", if_none_match="*")).status_code == 304
+
+
+def test_etag_of_another_encoding_is_not_a_match(page):
+    response = page.response(request(accept_encoding="identity", if_none_match=page.etags["gzip"]))
+    assert response.status_code == 200
+    assert response.headers["etag"] == page.etags["identity"]
+
+
+def test_stylesheet_is_inlined():
+    page = StaticPage(HTML, stylesheet="app.css")
+    css = (static_page.STATIC_DIR / "app.css").read_text(encoding="utf-8")
+    assert f"<style>{css}</style>\n</head>".encode() in page.variants["identity"]
@@ -0,0 +1,101 @@
+"""Statistiques incrémentales du catalogue ($inc, recalcul, clés échappées)."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from stats import STATS_ID, CatalogueStats
+
+
+@pytest.fixture
+def db(mongo_collection):
+    return SimpleNamespace(**{
+        name: mongo_collection(name)
+        for name in ("app_stats", "products", "product_sheets", "product_searches")
+    })
+
+
+def add_products(db, *categories):
+    db.products.sync.insert_many([{"id": str(i), "category": category} for i, category in enumerate(categories)])
+
+
+def test_get_without_document_runs_full_refresh(db):
+    add_products(db, "Polo", "Polo", "Sneakers")
+    db.product_searches.sync.insert_one({"id": "s"})
+    stats = asyncio.run(CatalogueStats(db).get())
+    assert (stats["total_products"], stats["total_sheets"], stats["total_searches"]) == (3, 0, 1)
+    assert stats["categories"] == {"Polo": 2, "Sneakers": 1}
+    assert stats["refreshed_at"] is not None
+
+
+def test_record_increments_on_save_and_delete(db):
+    async def scenario():
+        stats = CatalogueStats(db)
+        await stats.refresh()
+        await stats.record(products=2, sheets=1, categories={"Polo": 2})
+        await stats.record(searches=1)
+        current = await stats.get()
+        assert (current["total_products"], current["total_sheets"], current["total_searches"]) == (2, 1, 1)
+        assert current["categories"] == {"Polo": 2}
+        # Suppression : la catégorie vidée disparaît de la réponse
+        await stats.record(products=-2, sheets=-1, categories={"Polo": -2})
+        current = await stats.get()
+        assert (current["total_products"], current["total_sheets"]) == (0, 0)
+        assert current["categories"] == {}
+
+    asyncio.run(scenario())
+
+
+def test_record_without_document_does_not_create_partial_counters(db):
+    async def scenario():
+        add_products(db, "Polo")
+        stats = CatalogueStats(db)
+        await stats.record(products=1, categories={"Polo": 1})
+        assert db.app_stats.sync.find_one({"_id": STATS_ID}) is None
+        # Le premier get() recalcule à partir des collections
+        assert (await stats.get())["total_products"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_refresh_reconciles_drift(db):
+    async def scenario():
+        stats = CatalogueStats(db)
+        await stats.refresh()
+        # Écritures hors application et $inc perdus
+        add_products(db, "Chemise", "Chemise")
+        await stats.record(products=5, categories={"Polo": 5})
+        assert (await stats.get())["total_products"] == 5
+        current = await stats.refresh()
+        assert current["total_products"] == 2
+        assert current["categories"] == {"Chemise": 2}
+        assert (await stats.get())["categories"] == {"Chemise": 2}
+
+    asyncio.run(scenario())
+
+
+def test_category_keys_with_dots_and_dollars_are_escaped(db):
+    async def scenario():
+        add_products(db, "T-shirt 2.0", "$Promo")
+        stats = CatalogueStats(db)
+        current = await stats.refresh()
+        assert current["categories"] == {"T-shirt 2.0": 1, "$Promo": 1}
+        await stats.record(products=1, categories={"T-shirt 2.0": 1})
+        stored = db.app_stats.sync.find_one({"_id": STATS_ID})["categories"]
+        assert all("." not in key and "$" not in key for key in stored)
+        # Un seul compteur incrémenté, pas de sous-document « T-shirt 2 » → « 0 »
+        assert len(stored) == 2
+        assert (await stats.get())["categories"] == {"T-shirt 2.0": 2, "$Promo": 1}
+
+    asyncio.run(scenario())
+
+
+def test_record_logs_instead_of_raising(db, caplog):
+    class DownCollection:
+        async def update_one(self, *args, **kwargs):
+            raise ConnectionError("MongoDB injoignable")
+
+    stats = CatalogueStats(db)
+    stats.collection = DownCollection()
+    asyncio.run(stats.record(products=1))
+    assert "Statistiques non mises à jour" in caplog.text
@@ -0,0 +1,149 @@
+"""Journal JSON-lines des produits : ajout, compaction, reprise après crash, pages."""
+import json
+
+import pytest
+
+from backend.storage import ProductIndex, ProductStore
+
+
+def entry(i, brand="Nike", ptype="Sneakers"):
+    return {
+        "product": {"id": f"p{i}", "ean": f"36142700{i:05d}", "sku": f"SKU{i}", "name": f"Produit {i}",
+                    "brand": brand, "type": ptype, "description": "", "created_at": f"2024-01-{i % 28 + 1:02d}"},
+        "sheet": {"id": f"s{i}"},
+    }
+
+
+def log_lines(store):
+    return store.log_path.read_bytes().splitlines()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProductStore(tmp_path / "products.jsonl", compact_min_stale=1000)
+
+
+def test_append_replace_delete_survive_reopen(store, tmp_path):
+    store.append_many([entry(1), entry(2), entry(3)])
+    replaced = entry(2)
+    replaced["product"]["name"] = "Renommé"
+    store.append(replaced)
+    assert store.delete("p3")
+    assert not store.delete("p3")
+
+    reopened = ProductStore(tmp_path / "products.jsonl")
+    assert len(reopened) == 2
+    assert reopened.get("p2")["product"]["name"] == "Renommé"
+    assert reopened.get_by_sheet("s1")["product"]["id"] == "p1"
+    assert "p3" not in reopened
+    # Remplacement et suppression ajoutent des lignes, sans réécrire le fichier
+    assert len(log_lines(store)) == 5
+
+
+def test_other_worker_writes_are_visible(store, tmp_path):
+    other = ProductStore(tmp_path / "products.jsonl")
+    other.append(entry(1))
+    assert store.find(ean=entry(1)["product"]["ean"])[0]["product"]["id"] == "p1"
+    store.delete("p1")
+    assert other.get("p1") is None
+
+
+def test_compaction_keeps_only_live_entries(tmp_path):
+    store = ProductStore(tmp_path / "products.jsonl", compact_min_stale=4, compact_ratio=0.5)
+    reader = ProductStore(tmp_path / "products.jsonl")
+    store.append_many([entry(i) for i in range(4)])
+    for i in range(3):
+        store.append(entry(i, brand="Lacoste"))
+    store.delete("p3")
+    # 4 lignes obsolètes sur 8 : le journal est réécrit
+    assert len(log_lines(store)) == 3
+    assert [json.loads(line)["id"] for line in log_lines(store)] == ["p0", "p1", "p2"]
+    # Un autre worker détecte le remplacement du fichier et reconstruit son index
+    assert {item["product"]["brand"] for item in reader.items()} == {"Lacoste"}
+    assert len(reader) == 3
+
+
+def test_torn_line_is_ignored_then_truncated(store, tmp_path):
+    store.append(entry(1))
+    # Crash au milieu d'une écriture : ligne incomplète en fin de journal
+    with open(store.log_path, "ab") as f:
+        f.write(b'{"id": "p2", "item": {"prod')
+    recovered = ProductStore(tmp_path / "products.jsonl")
+    assert len(recovered) == 1
+    recovered.append(entry(3))
+    ids = [json.loads(line)["id"] for line in log_lines(recovered)]
+    assert ids == ["p1", "p3"]
+    assert ProductStore(tmp_path / "products.jsonl").get("p3") is not None
+
+
+def test_unreadable_line_is_skipped(store, tmp_path):
+    store.append(entry(1))
+    with open(store.log_path, "ab") as f:
+        f.write(b"pas du json\n")
+    store.append(entry(2))
+    assert [item["product"]["id"] for item in ProductStore(tmp_path / "products.jsonl").items()] == ["p1", "p2"]
+
+
+def test_lock_is_released_after_a_failed_write(store, monkeypatch):
+    def fail(records):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(store, "_write", fail)
+    with pytest.raises(OSError):
+        store.append(entry(1))
+    monkeypatch.undo()
+    # Le verrou fichier et le verrou du processus ont été rendus
+    store.append(entry(2))
+    assert len(store) == 1
+
+
+def test_legacy_products_json_is_migrated_once(tmp_path):
+    legacy = tmp_path / "products.json"
+    legacy.write_text(json.dumps([entry(1), entry(2)]), encoding="utf-8")
+    store = ProductStore(tmp_path / "products.jsonl", legacy_path=legacy)
+    assert len(store) == 2
+    legacy.write_text(json.dumps([entry(3)]), encoding="utf-8")
+    assert len(ProductStore(tmp_path / "products.jsonl", legacy_path=legacy)) == 2
+
+
+def walk(store, **kwargs):
+    seen, cursor = [], None
+    while True:
+        entries, cursor = store.page(cursor=cursor, **kwargs)
+        seen += [product["id"] for product in entries]
+        if cursor is None:
+            return seen
+
+
+def test_cursor_pages_cover_every_entry_once(store):
+    store.append_many([entry(i, brand="Lacoste" if i % 3 else "Nike") for i in range(25)])
+    store.append(entry(4, brand="Nike"))  # déplacé en fin de journal
+    everything = [item["product"]["id"] for item in store.items()]
+    assert walk(store, limit=4) == everything
+    assert walk(store, limit=4, brand="nike") == [key for key in everything
+                                                  if store.get(key)["product"]["brand"] == "Nike"]
+    assert walk(store, limit=4, brand="inconnue") == []
+
+
+def test_cursor_expires_after_compaction(store):
+    store.append_many([entry(i) for i in range(5)])
+    _, cursor = store.page(limit=2)
+    store.compact()
+    with pytest.raises(ValueError):
+        store.page(cursor=cursor, limit=2)
+    with pytest.raises(ValueError):
+        store.page(cursor="pas-un-curseur", limit=2)
+
+
+def test_index_page_resumes_after_position():
+    index = ProductIndex()
+    for i in range(10):
+        index.add(f"p{i}", entry(i), position=i * 10)
+    index.remove("p3")
+    index.add("p3", entry(3), position=200)
+    entries, last = index.page(after=45, limit=3)
+    assert [product["id"] for product in entries] == ["p5", "p6", "p7"]
+    assert last == 70
+    entries, last = index.page(after=last)
+    assert [product["id"] for product in entries] == ["p8", "p9", "p3"]
+    assert last is None
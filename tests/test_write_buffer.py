@@ -0,0 +1,133 @@
+"""Tampon d'écriture MongoDB : regroupement et erreurs rendues à chaque appelant."""
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from write_buffer import WriteBuffer
+
+
+class FakeCollection:
+    """insert_many non ordonné : les documents marqués `dup` sont refusés, les autres écrits"""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def insert_many(self, docs, ordered=True):
+        await asyncio.sleep(0)
+        self.db.calls.append(len(docs))
+        if self.db.down:
+            raise ConnectionError("MongoDB injoignable")
+        errors = [{"index": i, "code": 11000, "errmsg": f"doublon {doc['id']}"}
+                  for i, doc in enumerate(docs) if doc.get("dup")]
+        self.db.written += [doc["id"] for doc in docs if not doc.get("dup")]
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class FakeDB:
+    def __init__(self):
+        self.calls = []
+        self.written = []
+        self.down = False
+
+    def __getitem__(self, name):
+        return FakeCollection(self)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_inserts_share_one_write():
+    db = FakeDB()
+    buffer = WriteBuffer(db, max_batch=100, max_delay=0.01)
+
+    async def main():
+        await asyncio.gather(*(buffer.insert("products", {"id": f"p{i}"}) for i in range(20)))
+        await buffer.close()
+
+    run(main())
+    assert db.calls == [20]
+    assert sorted(db.written) == sorted(f"p{i}" for i in range(20))
+    assert buffer.stats()["documents"] == 20
+
+
+def test_full_buffer_is_split_into_batches():
+    db = FakeDB()
+    buffer = WriteBuffer(db, max_batch=8, max_delay=1)
+
+    async def main():
+        await asyncio.wait_for(buffer.insert_many("products", [{"id": f"p{i}"} for i in range(20)]), 0.5)
+        await buffer.close()
+
+    run(main())
+    assert db.calls == [8, 8, 4]
+
+
+def test_each_caller_gets_only_its_own_error():
+    db = FakeDB()
+    buffer = WriteBuffer(db, max_batch=100, max_delay=0.01)
+
+    async def main():
+        return await asyncio.gather(
+            buffer.insert_many("products", [{"id": "a1"}, {"id": "a2"}]),
+            buffer.insert_many("products", [{"id": "b1"}, {"id": "b2", "dup": True}]),
+            buffer.insert("products", {"id": "c1"}),
+            return_exceptions=True
+        )
+
+    first, second, third = run(main())
+    assert first is None and third is None
+    assert isinstance(second, BulkWriteError)
+    assert second.details["writeErrors"][0]["errmsg"] == "doublon b2"
+    # Écriture non ordonnée : les autres documents sont écrits malgré le doublon
+    assert sorted(db.written) == ["a1", "a2", "b1", "c1"]
+    assert buffer.stats()["documents"] == 4
+
+
+def test_failed_write_fails_every_caller_of_the_batch():
+    db = FakeDB()
+    db.down = True
+    buffer = WriteBuffer(db, max_batch=100, max_delay=0.01)
+
+    async def main():
+        return await asyncio.gather(buffer.insert("products", {"id": "a"}), buffer.insert("sheets", {"id": "b"}),
+                                    return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert buffer.stats()["documents"] == 0
+
+
+def test_cancelled_caller_does_not_break_the_batch():
+    db = FakeDB()
+    buffer = WriteBuffer(db, max_batch=100, max_delay=0.05)
+
+    async def main():
+        cancelled = asyncio.ensure_future(buffer.insert("products", {"id": "parti"}))
+        kept = asyncio.ensure_future(buffer.insert("products", {"id": "reste"}))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await kept
+        await buffer.close()
+
+    run(main())
+    assert sorted(db.written) == ["parti", "reste"]
+
+
+def test_close_flushes_then_writes_directly():
+    db = FakeDB()
+    buffer = WriteBuffer(db, max_batch=100, max_delay=10)
+
+    async def main():
+        pending = asyncio.ensure_future(buffer.insert("products", {"id": "en-attente"}))
+        await asyncio.sleep(0)
+        await buffer.close()
+        await pending
+        await buffer.insert("products", {"id": "après"})
+        with pytest.raises(BulkWriteError):
+            await buffer.insert("products", {"id": "doublon", "dup": True})
+
+    run(main())
+    assert db.written == ["en-attente", "après"]